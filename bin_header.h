@@ -0,0 +1,18 @@
+/*
+ * This file has been generated by CML build tools.
+ */
+
+#ifndef __MINFS_FILE_H__
+#define __MINFS_FILE_H__
+
+/***************************************************************************************************
+* Macro definitions
+***************************************************************************************************/
+
+/* MinFS data */
+#define MINFS_FILE {\
+    0x00,0x01,0x02,0x03,0x04,0x05,0x06,0x07,  0x08,0x09,0x0A,0x0B,0x0C,0x0D,0x0E,0x0F, \
+    0x10,0x11,0x12,0x13, \
+}
+
+#endif /* __MINFS_FILE_H__ */
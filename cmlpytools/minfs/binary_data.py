@@ -1,10 +1,10 @@
 """
 An abstract class that implements conversion to binary and c headers
 """
-from builtins import hex
 from builtins import object
 import abc
 from future.utils import with_metaclass
+from cmlpytools.tahini.text_emitter import TextEmitter
 
 FILE_TEMPLATE = """\
 /*
@@ -26,6 +26,30 @@ FILE_TEMPLATE = """\
 #endif /* __MINFS_FILE_H__ */
 """
 
+# Bytes per line of the C header, with an extra space after each half line
+_BYTES_PER_LINE = 16
+_HALF_LINE = _BYTES_PER_LINE // 2
+_BYTE_FORMAT = "0x%02X,"
+_LINE_FORMAT = _BYTE_FORMAT * _HALF_LINE + "  " + _BYTE_FORMAT * _HALF_LINE
+_LINE_SEPARATOR = " \\\n    "
+
+
+def _hex_line(line_data) -> str:
+    """Format one line of bytes of the C header array
+
+    Args:
+        line_data (bytes): Up to 16 bytes
+
+    Returns:
+        str: Formatted bytes, e.g. "0xBA,0xAD,0xBE,0xEF,"
+    """
+    if len(line_data) == _BYTES_PER_LINE:
+        return _LINE_FORMAT % tuple(line_data)
+    line_format = _BYTE_FORMAT * min(len(line_data), _HALF_LINE)
+    if len(line_data) > _HALF_LINE:
+        line_format += "  " + _BYTE_FORMAT * (len(line_data) - _HALF_LINE)
+    return line_format % tuple(line_data)
+
 
 class BinaryData(with_metaclass(abc.ABCMeta, object)):
     """Class for creating binary and c header files
@@ -46,18 +70,16 @@ class BinaryData(with_metaclass(abc.ABCMeta, object)):
         Args:
             c_path (str): specifies the path to the output file
         """
-        hex_array = ""
-        i = 0
-        for single_byte in self.data:
-            if not i % 16 and i != 0:
-                hex_array += " \\\n    "
-            elif not i % 8 and i != 0:
-                hex_array += "  "
-            hex_array += '0x' + hex(single_byte).upper()[2:].zfill(2)+","
-            i += 1
-        file_content = FILE_TEMPLATE.replace("%%BYTE_ARRAY%%", hex_array)
+        data = memoryview(self.data).cast("B")
+        template_head, template_tail = FILE_TEMPLATE.split("%%BYTE_ARRAY%%")
         with open(c_path, "w", encoding="utf-8") as new_file:
-            new_file.write(file_content)
+            with TextEmitter(new_file) as emitter:
+                emitter.write(template_head)
+                for offset in range(0, len(data), _BYTES_PER_LINE):
+                    if offset:
+                        emitter.write(_LINE_SEPARATOR)
+                    emitter.write(_hex_line(data[offset:offset + _BYTES_PER_LINE]))
+                emitter.write(template_tail)
 
     @property
     @abc.abstractmethod
@@ -5,10 +5,11 @@ CalmapFile class for creating minfs calmap files
 # from os import path
 from builtins import str
 import json
+from typing import Union
 from cmlpytools import tahini
 from .shared import CalmapFileWriter
 from .file_types import FileTypes
-from .file_base import FileBase
+from .file_base import FileBase, load_regmap
 
 CAL_REG_TYPES = {'REG_TYPE_NONE':               0,  # no special handling required
                  'REG_TYPE_ACTUATOR':           1,
@@ -18,13 +19,15 @@ CAL_REG_TYPES = {'REG_TYPE_NONE':               0,  # no special handling requir
                  }
 
 
-def _get_register_offset_in_struct(cmap: tahini.CmapFullRegmap, reg_name: str, struct_name: str) -> int:
+def _get_register_offset_in_struct(cmap: tahini.CmapFullRegmap, reg_name: str, struct_name: str,
+                                   index: tahini.SearchIndex = None) -> int:
     """Get the offset of a register in a given struct using their names.
 
     Args:
         cmap (tahini.CmapFullRegmap): cmapsource containing regmap information
         reg_name (str): Name of the register
         struct_name (str): Name of the struct
+        index (tahini.SearchIndex, optional): Search index of the cmapsource. Defaults to a full search.
 
     Raises:
         CalmapParseError: Register could not be found in struct
@@ -32,13 +35,14 @@ def _get_register_offset_in_struct(cmap: tahini.CmapFullRegmap, reg_name: str, s
     Returns:
         int: Offset in bytes of the register relatively to the struct
     """
-    struct_match = tahini.search(
+    search = index.search if index is not None else tahini.search
+    struct_match = search(
         name=struct_name, cmap_type=tahini.CmapType.STRUCT, node=cmap)
     if not struct_match:
         raise CalmapParseError(
             f"Struct name '{struct_name}' could not be found in the register map")
 
-    reg_match = tahini.search(
+    reg_match = search(
         name=reg_name, cmap_type=tahini.CmapType.REGISTER, node=struct_match.result)
     if not reg_match:
         raise CalmapParseError(
@@ -57,13 +61,16 @@ class CalmapFile(FileBase):
     """Class used to create and manipulate packed structure files
     """
 
-    def __init__(self, regmap_file: str, calmap_file: str, file_name: str = None):
+    def __init__(self, regmap_file: Union[str, tahini.CmapFullRegmap], calmap_file: str, file_name: str = None,
+                 index: tahini.SearchIndex = None):
         """Create a handle that can be used to write a new calibration map file.
 
         Args:
-            regmap_file (str): specifies the path to the top-level regmap file
+            regmap_file (Union[str, tahini.CmapFullRegmap]): specifies the path to the top-level regmap file, or the
+                regmap already loaded
             calmap_file (str): specifies the path to the calibration map file
             file_name (str): specifies the name of the output file
+            index (tahini.SearchIndex, optional): search index of the regmap already loaded
 
         Returns:
             CalmapFile object
@@ -78,7 +85,7 @@ class CalmapFile(FileBase):
             self.file_name = self._get_name_from_path(calmap_file)
 
         # Load top-level regmap
-        cmap = tahini.CmapFullRegmap.load_json(regmap_file)
+        cmap, index = load_regmap(regmap_file, index)
 
         # Load calmap definition file
         with open(calmap_file, "r", encoding="utf-8") as file_io:
@@ -92,6 +99,7 @@ class CalmapFile(FileBase):
 
         h_writer = CalmapFileWriter(len(calibration_regs), map_ver)
 
+        entries = []
         for reg_name in list(calibration_regs.keys()):
             try:
                 reg_type = calibration_regs[reg_name]['type']
@@ -114,17 +122,18 @@ class CalmapFile(FileBase):
             if reg_type == CAL_REG_TYPES['REG_TYPE_LIB_PARAM']:
                 # Calibration value that needs to be stored in the library parameter regmap structure
                 struct_name = f_calmap['Persist_Name'][0]
-                regmap_offset = _get_register_offset_in_struct(cmap, reg_name, struct_name)
+                regmap_offset = _get_register_offset_in_struct(cmap, reg_name, struct_name, index)
             elif reg_type == CAL_REG_TYPES['REG_TYPE_FW_REG']:
                 # Calibration value that needs to be stored in the top-level firmware register structure
                 struct_name = f_calmap['Top_Level_FW_Reg_Name'][0]
-                regmap_offset = _get_register_offset_in_struct(cmap, reg_name, struct_name)
+                regmap_offset = _get_register_offset_in_struct(cmap, reg_name, struct_name, index)
             else:
                 # Calibration value does not need special handling
                 regmap_offset = 0
 
-            h_writer.add_entry(int(reg_type), int(cal_offset), int(valid_offset), int(num_bytes), int(regmap_offset))
+            entries.append((int(reg_type), int(cal_offset), int(valid_offset), int(num_bytes), int(regmap_offset)))
 
+        h_writer.add_entries(entries)
         self.data = h_writer.get_file()
 
     @property
@@ -4,14 +4,22 @@
 from __future__ import print_function
 from builtins import range
 from os import path
+from functools import partial
 import argparse
 import textwrap
 import sys
-from .regmap_cfg_file import RegmapCfgFile
+from .regmap_cfg_file import RegmapCfgFile, compression_report
 from .calmap_file import CalmapFile
 from .file import File
-from .file_system import FileSystem
-from .utilities import merge_bin
+from .file_system import FileSystem, FsLayoutError
+from .file_builder import build_files
+from .fs_batch import InvalidFsManifestError, load_fs_manifest, fs_batch_build, format_fs_summary
+from .file_cache import FileCache, format_cache_stats
+from .utilities import merge_bin_batch, patch_bin
+from .image_reader import (InvalidImageError, MappedImage, FileSystemImage, RegmapCfgImage, CalmapImage,
+                           format_fs_image, format_entries, extract_files)
+from .image_delta import (DEFAULT_PAGE_SIZE, InvalidDeltaError, make_delta, apply_delta, verify_delta,
+                          format_delta_summary)
 from .regmap_struct_file import RegmapStructFile
 
 
@@ -44,7 +52,12 @@ class CommandParser():
                 calmap        Create or modify a calibration file
                 regmap-struct Create a packed C structure file
                 fs            Create or modify a file system
+                build-many    Create the file systems listed in a manifest
                 mergebin      Merge binary files
+                inspect       Describe a file system, regmap configuration or calibration image
+                extract       Extract the files of a file system image
+                delta         Create the patch of the flash pages changed between two images
+                delta-apply   Apply or verify a patch created by the delta command
 
             For more detailed help, type "minfs <command> -h" '''))
         parser.add_argument('command', help='minfs subcommand', nargs=1)
@@ -85,8 +98,13 @@ class CommandParser():
             Specify the regmap config file compression mode.
                 0: No compression. Make an entry for each inidividual register (default).
                 1: Contiguous registers result as 1 entry.
-                2: Not contiguous but close registers result as 1 entry.'''))
+                2: Not contiguous but close registers result as 1 entry.
+                3: Registers are grouped in entries to make the file as small as possible.'''))
+        parser.add_argument('--compression-report', action='store_true',
+                            help="Print the number of entries and the size of the file in every compression mode.")
         args = parser.parse_args()
+        if args.compression_report:
+            print(compression_report(args.regmap_cfg_json[0], args.regmap[0]))
         regmap_cfg_file = RegmapCfgFile(args.regmap_cfg_json[0], args.regmap[0], None,
                                         args.compress_regmap)
         if args.o:
@@ -181,7 +199,7 @@ class CommandParser():
     def fs(self):  # pylint: disable=invalid-name,too-many-branches
         """File system command
         """
-        files = []
+        builders = []
         json_struct_files = []
         cfg_paths = []
         parser = argparse.ArgumentParser(
@@ -200,6 +218,7 @@ class CommandParser():
                 0: No compression. Make an entry for each inidividual register (default).
                 1: Contiguous registers result as 1 entry.
                 2: Not contiguous but close registers result as 1 entry.
+                3: Registers are grouped in entries to make the file as small as possible.
             If this parameter is used, then the compression mode must be specified for every regmap
             configuration file.
             i.e. the number of "--compress-regmap" must be equal to the number of
@@ -218,8 +237,38 @@ class CommandParser():
                             help="Generate a C header file at the specified location.")
         parser.add_argument('-o', nargs='?', metavar="path",
                             help="Generate a binary file at the specified location.")
+        parser.add_argument('--jobs', type=int, default=1, metavar="N",
+                            help=textwrap.dedent('''\
+            Number of processes used to build the files of the file system (default: 1).
+            0 uses the number of CPUs. The output does not depend on the number of processes.'''))
+        parser.add_argument('--cache-dir', nargs=1, metavar="[path]",
+                            help=textwrap.dedent('''\
+            Directory of the cache of built files.
+            Files whose inputs did not change since they were cached are not built again.'''))
+        parser.add_argument('--cache-max-size', type=int, default=None, metavar="[bytes]",
+                            help="Maximum size of the cache. The least recently used files are removed first.")
+        parser.add_argument('--page-size', type=lambda value: int(value, 0), default=None, metavar="[bytes]",
+                            help=textwrap.dedent('''\
+            Start the index and each file on a boundary of flash pages of this size, e.g. '0x800'.
+            A file changing then only changes its own pages. Default: files are packed.'''))
+        parser.add_argument('--page-slack', type=int, default=None, metavar="[bytes]",
+                            help="With --page-size, bytes reserved after each file for it to grow (default: 0).")
+        parser.add_argument('--layout-report', action='store_true',
+                            help="Print the location of the files and the utilisation of the pages.")
 
         args = parser.parse_args()
+        if args.jobs < 0:
+            print('Invalid number of jobs')
+            sys.exit(1)
+        if args.page_slack is not None and args.page_size is None:
+            print('--page-slack requires --page-size')
+            sys.exit(1)
+
+        # The regmap is loaded and indexed once, by the first file using it or before the worker processes are
+        # forked. The other files get it from the cache of loaded regmaps.
+        regmap_paths = []
+        if args.regmap and (args.regmap_cfg_json or args.calmap_json or args.regmap_struct_json):
+            regmap_paths.append(args.regmap[0])
 
         if args.regmap_cfg_json:
             if not args.regmap:
@@ -233,15 +282,14 @@ class CommandParser():
                 compression_mode = 0
                 if args.compress_regmap:
                     compression_mode = int(args.compress_regmap[i][0])
-                    if compression_mode not in list(range(3)):
+                    if compression_mode not in list(range(4)):
                         print('Invalid compression mode')
                         sys.exit(1)
                 if len(json_file) > 1:
                     file_name = json_file[1]
                 else:
                     file_name = None
-                files.append(RegmapCfgFile(json_file[0], args.regmap[0], file_name,
-                                           compression_mode))
+                builders.append(partial(RegmapCfgFile, json_file[0], args.regmap[0], file_name, compression_mode))
                 cfg_paths.append(json_file[0])
                 i += 1
 
@@ -254,7 +302,7 @@ class CommandParser():
                     file_name = json_file[1]
                 else:
                     file_name = None
-                files.append(CalmapFile(args.regmap[0], json_file[0], file_name))
+                builders.append(partial(CalmapFile, args.regmap[0], json_file[0], file_name))
                 cfg_paths.append(json_file[0])
 
         if args.regmap_struct_json:
@@ -279,7 +327,8 @@ class CommandParser():
                 if len(json_files) > 1:
                     if len(path.splitext(json_files[-1])) == 1:
                         file_name = json_files[-1]
-                files.append(RegmapStructFile(json_struct_files, args.regmap[0], args.struct[0], file_name))
+                builders.append(partial(RegmapStructFile, list(json_struct_files), args.regmap[0], args.struct[0],
+                                        file_name))
 
         if args.bin_file:
             for bin_file in args.bin_file:
@@ -290,10 +339,18 @@ class CommandParser():
                 else:
                     print("The file type is missing")
                     sys.exit(1)
-                files.append(File(bin_file[0], bin_file[1], file_name))
+                builders.append(partial(File, bin_file[0], bin_file[1], file_name))
                 cfg_paths.append(bin_file[0])
 
-        file_system = FileSystem(files)
+        if args.cache_dir:
+            cache = FileCache(args.cache_dir[0], args.cache_max_size)
+            files = cache.build_files(builders, jobs=args.jobs or None, regmap_paths=regmap_paths)
+            print(format_cache_stats(cache.stats))
+        else:
+            files = build_files(builders, jobs=args.jobs or None, regmap_paths=regmap_paths)
+        file_system = FileSystem(files, args.page_size, args.page_slack or 0)
+        if args.layout_report:
+            print(file_system.layout_report())
 
         if args.o:
             output_dir = path.dirname(args.o)
@@ -313,6 +370,51 @@ class CommandParser():
         else:
             print("c header file path is not specified")
 
+    def build_many(self):
+        """Build many file systems command
+        """
+        parser = argparse.ArgumentParser(
+            description=textwrap.dedent('''\
+                Cambridge Mechatronics Ltd.
+                Utility for creating many MinFS file systems listed in a json manifest.
+                Each regmap is loaded once, and member files shared by several file systems are built once.'''),
+            usage='minfs build-many <manifest> [options]',
+            formatter_class=argparse.RawTextHelpFormatter)
+        parser.add_argument('command', help=argparse.SUPPRESS)
+        parser.add_argument('manifest', nargs=1, metavar="[path]",
+                            help="Json manifest listing the file systems and their files")
+        parser.add_argument('--jobs', type=int, default=None, metavar="N",
+                            help="Number of processes used to build the files. Default: number of CPUs")
+        parser.add_argument('--report', nargs=1, metavar="[path]",
+                            help="Write the summary of the built file systems at the specified location.")
+        parser.add_argument('--cache-dir', nargs=1, metavar="[path]",
+                            help=textwrap.dedent('''\
+            Directory of the cache of built files.
+            Files whose inputs did not change since they were cached are not built again.'''))
+        parser.add_argument('--cache-max-size', type=int, default=None, metavar="[bytes]",
+                            help="Maximum size of the cache. The least recently used files are removed first.")
+
+        args = parser.parse_args()
+        if args.jobs is not None and args.jobs < 1:
+            print('Invalid number of jobs')
+            sys.exit(1)
+
+        cache = FileCache(args.cache_dir[0], args.cache_max_size) if args.cache_dir else None
+        try:
+            manifest = load_fs_manifest(args.manifest[0])
+            results = fs_batch_build(manifest, jobs=args.jobs, cache=cache)
+        except (InvalidFsManifestError, FsLayoutError) as error:
+            print(error)
+            sys.exit(1)
+        summary = format_fs_summary(results, len(manifest.builders))
+        if cache is not None:
+            summary += "\n" + format_cache_stats(cache.stats)
+
+        print(summary)
+        if args.report:
+            with open(args.report[0], "w", encoding="utf-8") as report_file:
+                report_file.write(summary + "\n")
+
     def mergebin(self):
         """Merge bin command
         """
@@ -323,22 +425,176 @@ class CommandParser():
             usage='minfs mergebin <options> [args]',
             formatter_class=argparse.RawTextHelpFormatter)
         parser.add_argument('command', help=argparse.SUPPRESS)
-        parser.add_argument('--firmware', required=True, nargs=1, metavar="[path]",
-                            help="Firmware binary")
-        parser.add_argument('--params', required=True, nargs=2, metavar="[param]",
+        parser.add_argument('--firmware', nargs=1, metavar="[path]",
+                            help="Firmware binary. Not used with --in-place.")
+        parser.add_argument('--params', required=True, action='append', nargs=2, metavar="[param]",
                             help=textwrap.dedent('''\
             Specify the parameter file to merge in the firmware binary.
             [Parameter 1] - offster of the file system in the final binary in hexadeximal format.
                             Example: '0x7000'
             [Parameter 2] - Path to the binary which can be a file system bin,
-                            or a regmap configuration file bin.'''))
-        parser.add_argument('-o', required=True, nargs=1, metavar="[path]",
+                            or a regmap configuration file bin.
+            This argument can be repeated with -o to merge several parameter files with the same firmware,
+            each in its own output binary.'''))
+        parser.add_argument('-o', required=True, action='append', nargs=1, metavar="[path]",
                             help="Generate a binary file at the specified location.")
+        parser.add_argument('--in-place', action='store_true',
+                            help=textwrap.dedent('''\
+            Replace the parameter file of an existing merged binary, given with -o,
+            without writing its firmware part again.'''))
 
         args = parser.parse_args()
+        if len(args.params) != len(args.o):
+            print('The number of "--params" must be equal to the number of "-o"')
+            sys.exit(1)
 
-        offset = int(args.params[0], 0)
-        merge_bin(args.firmware[0], args.params[1], offset, args.o[0])
+        variants = [(params[1], int(params[0], 0), output[0]) for params, output in zip(args.params, args.o)]
+        if not args.in_place and not args.firmware:
+            print('Please specify a firmware binary')
+            sys.exit(1)
+        try:
+            if args.in_place:
+                for params_bin, offset, output in variants:
+                    patch_bin(params_bin, offset, output)
+            else:
+                merge_bin_batch(args.firmware[0], variants)
+        except ValueError as error:
+            print(error)
+            sys.exit(1)
+
+    def inspect(self):
+        """Inspect image command
+        """
+        parser = argparse.ArgumentParser(
+            description=textwrap.dedent('''\
+                Cambridge Mechatronics Ltd.
+                Utility for describing MinFS images without the MinFS library.
+                The uid of file systems is checked against the content of their files.'''),
+            usage='minfs inspect <image> [options]',
+            formatter_class=argparse.RawTextHelpFormatter)
+        parser.add_argument('command', help=argparse.SUPPRESS)
+        parser.add_argument('image', nargs=1, metavar="[path]", help="Image, or binary containing a file system")
+        parser.add_argument('--type', choices=['fs', 'regmap-cfg', 'calmap'], default='fs',
+                            help="Type of the image (default: fs)")
+        parser.add_argument('--offset', type=lambda value: int(value, 0), default=0, metavar="[offset]",
+                            help="Offset of the file system in the binary, e.g. '0x7000' (default: 0)")
+        parser.add_argument('--entries', action='store_true',
+                            help="Also describe the entries of the regmap configuration and calibration files")
+
+        args = parser.parse_args()
+
+        uid_valid = True
+        try:
+            with MappedImage(args.image[0]) as image:
+                if args.type == 'fs':
+                    fs_image = FileSystemImage(image.view, args.offset)
+                    description = format_fs_image(fs_image, args.entries)
+                    uid_valid = fs_image.compute_uid() == fs_image.uid
+                elif args.type == 'regmap-cfg':
+                    description = format_entries(RegmapCfgImage(image.view))
+                else:
+                    description = format_entries(CalmapImage(image.view))
+        except InvalidImageError as error:
+            print(error)
+            sys.exit(1)
+        print(description)
+        # The uid does not match the content of the files, e.g. a corrupt image
+        if not uid_valid:
+            sys.exit(1)
+
+    def extract(self):
+        """Extract files command
+        """
+        parser = argparse.ArgumentParser(
+            description=textwrap.dedent('''\
+                Cambridge Mechatronics Ltd.
+                Utility for extracting the files of a MinFS file system image, as <index>_<name>.bin'''),
+            usage='minfs extract <image> <output_dir> [options]',
+            formatter_class=argparse.RawTextHelpFormatter)
+        parser.add_argument('command', help=argparse.SUPPRESS)
+        parser.add_argument('image', nargs=1, metavar="[path]", help="Image, or binary containing a file system")
+        parser.add_argument('output_dir', nargs=1, metavar="[path]", help="Directory of the extracted files")
+        parser.add_argument('--offset', type=lambda value: int(value, 0), default=0, metavar="[offset]",
+                            help="Offset of the file system in the binary, e.g. '0x7000' (default: 0)")
+        parser.add_argument('--file', action='append', default=[], metavar="[name]",
+                            help="Name of a file to extract (default: all the files)")
+
+        args = parser.parse_args()
+
+        try:
+            with MappedImage(args.image[0]) as image:
+                written = extract_files(FileSystemImage(image.view, args.offset), args.output_dir[0], args.file)
+        except InvalidImageError as error:
+            print(error)
+            sys.exit(1)
+        for output_path in written:
+            print(path.basename(output_path)+" has been succesfully created")
+
+    def delta(self):
+        """Delta patch command
+        """
+        parser = argparse.ArgumentParser(
+            description=textwrap.dedent('''\
+                Cambridge Mechatronics Ltd.
+                Utility for creating the patch of the flash pages changed between two images,
+                e.g. two firmware+parameters binaries. Only the pages in the patch need to be programmed.'''),
+            usage='minfs delta <old> <new> -o <patch> [options]',
+            formatter_class=argparse.RawTextHelpFormatter)
+        parser.add_argument('command', help=argparse.SUPPRESS)
+        parser.add_argument('old', nargs=1, metavar="[path]", help="Image currently programmed")
+        parser.add_argument('new', nargs=1, metavar="[path]", help="Image to program")
+        parser.add_argument('-o', required=True, nargs=1, metavar="[path]",
+                            help="Generate the patch at the specified location.")
+        parser.add_argument('--page-size', type=lambda value: int(value, 0), default=DEFAULT_PAGE_SIZE,
+                            metavar="[bytes]",
+                            help=f"Size of a flash page or erase block, e.g. '0x800' (default: {DEFAULT_PAGE_SIZE})")
+
+        args = parser.parse_args()
+        if args.page_size <= 0:
+            print('Invalid page size')
+            sys.exit(1)
+
+        try:
+            summary = make_delta(args.old[0], args.new[0], args.o[0], args.page_size)
+        except ValueError as error:
+            print(error)
+            sys.exit(1)
+        print(format_delta_summary(summary))
+        print(path.basename(args.o[0])+" has been succesfully created")
+
+    def delta_apply(self):
+        """Apply delta patch command
+        """
+        parser = argparse.ArgumentParser(
+            description=textwrap.dedent('''\
+                Cambridge Mechatronics Ltd.
+                Utility for applying a patch created by `minfs delta` to the old image, or for checking
+                that an image is the new image of a patch. The sizes and CRC32 of the images are checked.'''),
+            usage='minfs delta-apply <image> <patch> [options]',
+            formatter_class=argparse.RawTextHelpFormatter)
+        parser.add_argument('command', help=argparse.SUPPRESS)
+        parser.add_argument('image', nargs=1, metavar="[path]", help="Old image, or image to verify")
+        parser.add_argument('patch', nargs=1, metavar="[path]", help="Patch created by `minfs delta`")
+        parser.add_argument('-o', nargs=1, metavar="[path]",
+                            help="Generate the new image at the specified location. Default: patch the image in place")
+        parser.add_argument('--verify', action='store_true',
+                            help="Only check that the image is the new image of the patch")
+
+        args = parser.parse_args()
+
+        try:
+            if args.verify:
+                if not verify_delta(args.image[0], args.patch[0]):
+                    print(path.basename(args.image[0])+" does not match the patch")
+                    sys.exit(1)
+                print(path.basename(args.image[0])+" matches the patch")
+            else:
+                output_path = args.o[0] if args.o else args.image[0]
+                apply_delta(args.image[0], args.patch[0], output_path)
+                print(path.basename(output_path)+" has been succesfully patched")
+        except (InvalidDeltaError, ValueError) as error:
+            print(error)
+            sys.exit(1)
 
 
 def run_command_parser():
@@ -2,11 +2,32 @@
 File base class
 """
 from os import path
+from typing import Tuple, Union
 import abc
+from cmlpytools import tahini
 from .binary_data import BinaryData
 from .file_types import FileTypes
 
 
+def load_regmap(regmap_file: Union[str, tahini.CmapFullRegmap],
+                index: tahini.SearchIndex = None) -> Tuple[tahini.CmapFullRegmap, tahini.SearchIndex]:
+    """Get a regmap and its search index, loading the regmap file if a path is given. Loaded regmap files are
+    kept in memory, so that the files of a same file system share the same regmap.
+
+    Args:
+        regmap_file (Union[str, tahini.CmapFullRegmap]): Path to the regmap file, or regmap already loaded
+        index (tahini.SearchIndex, optional): Search index of the regmap already loaded. Built if not given.
+
+    Returns:
+        Tuple[tahini.CmapFullRegmap, tahini.SearchIndex]: Regmap and its search index
+    """
+    if isinstance(regmap_file, str):
+        return tahini.load_indexed_cmap(regmap_file)
+    if index is None or index.cmap is not regmap_file:
+        index = tahini.SearchIndex(regmap_file)
+    return regmap_file, index
+
+
 class FileBase(BinaryData):
     """Class used as a base for different types of files supported by MinFS
     """
@@ -0,0 +1,95 @@
+"""
+Build the member files of a file system, optionally in a pool of processes
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from typing import Callable, List, Optional, Sequence
+from cmlpytools import tahini
+from .file_base import FileBase
+from .file_types import FileTypes
+
+# A file builder is a picklable callable creating one member file, e.g. functools.partial(RegmapCfgFile, ...)
+FileBuilder = Callable[[], FileBase]
+
+
+class BuiltFile(FileBase):
+    """Member file already built, e.g. by another process
+    """
+
+    def __init__(self, file_name: str, file_type: FileTypes, data: bytes):
+        """Create a handle on the content of a member file
+
+        Args:
+            file_name (str): specifies the name of the file
+            file_type (FileTypes): specifies the type of the file
+            data (bytes): content of the file
+        """
+        self.file_name = file_name
+        self.file_type = file_type
+        self.data = data
+
+    @property
+    def file_name(self) -> str:
+        return self._file_name
+
+    @file_name.setter
+    def file_name(self, newname: str):
+        self._file_name = newname
+
+    @property
+    def file_type(self) -> FileTypes:
+        return self._file_type
+
+    @file_type.setter
+    def file_type(self, newtype: FileTypes):
+        self._file_type = newtype
+
+    @property
+    def data(self) -> bytes:
+        return self._data
+
+    @data.setter
+    def data(self, newdata: bytes):
+        self._data = newdata
+
+
+def _build_file(builder: FileBuilder) -> BuiltFile:
+    """Build a member file and copy its content out of the minfs library buffers, so that it can be sent back to the
+    parent process. This function runs in the worker processes.
+
+    Args:
+        builder (FileBuilder): Builder of the file
+
+    Returns:
+        BuiltFile: Built file
+    """
+    fs_file = builder()
+    return BuiltFile(fs_file.file_name, fs_file.file_type, bytes(fs_file.data))
+
+
+def build_files(builders: List[FileBuilder], jobs: Optional[int] = 1,
+                regmap_paths: Sequence[str] = ()) -> List[FileBase]:
+    """Build the member files of a file system. With several jobs, the files are built in a pool of processes. Where
+    the platform supports it the workers are forked, so they share the regmaps already loaded by this process
+    (see tahini.load_indexed_cmap) instead of loading them again.
+
+    Args:
+        builders (List[FileBuilder]): Builders of the files, in the order of the file system
+        jobs (Optional[int], optional): Number of worker processes. None for the number of CPUs. Defaults to 1, which
+            builds the files in this process.
+        regmap_paths (Sequence[str], optional): Regmaps used by the builders, loaded before the workers are forked
+
+    Returns:
+        List[FileBase]: Built files, in the order of the builders
+    """
+    if jobs == 1 or len(builders) <= 1:
+        return [builder() for builder in builders]
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        for regmap_path in regmap_paths:
+            tahini.load_indexed_cmap(regmap_path)
+        context = multiprocessing.get_context("fork")
+    else:
+        context = None
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as executor:
+        return list(executor.map(_build_file, builders))
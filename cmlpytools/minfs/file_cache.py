@@ -0,0 +1,335 @@
+"""
+Cache of built member files, stored in a directory and looked up by the content of their inputs
+"""
+from dataclasses import dataclass
+from functools import lru_cache, partial
+import glob
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .file_builder import BuiltFile, FileBuilder, build_files
+from .file_base import FileBase
+from .file_types import FileTypes
+from .shared import library_digest
+
+# Changed whenever the format of the entries or of the keys changes
+CACHE_FORMAT_VERSION = 1
+ENTRY_SUFFIX = ".mfc"
+# File type and length of the file name, followed by the file name and the file content
+_ENTRY_HEADER = struct.Struct("<BB")
+
+# Real path of the file -> ((modification time, size), content digest)
+_DIGEST_CACHE: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+
+def _file_digest(file_path: str) -> str:
+    """Get a digest of the content of a file. Digests are kept in memory as long as the file is not modified, so
+    that a regmap shared by many files is read once.
+
+    Args:
+        file_path (str): Path to the file
+
+    Returns:
+        str: SHA-256 digest of the file, in hexadecimal
+    """
+    real_path = os.path.realpath(file_path)
+    stat = os.stat(real_path)
+    file_version = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _DIGEST_CACHE.get(real_path)
+    if cached is not None and cached[0] == file_version:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(real_path, "rb") as input_file:
+        for chunk in iter(lambda: input_file.read(1 << 20), b""):
+            digest.update(chunk)
+    _DIGEST_CACHE[real_path] = (file_version, digest.hexdigest())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _code_digest(module_name: str) -> str:
+    """Get a digest of the code packing the files: the sources of this package and of tahini, which parses the
+    cmapsource and the regmaps, and of the module of the file class if it is defined elsewhere. Upgrading the package,
+    or editing it, builds new entries.
+
+    Args:
+        module_name (str): Name of the module of the file class
+
+    Returns:
+        str: SHA-256 digest of the source files, in hexadecimal
+    """
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    source_paths = set()
+    for source_dir in (package_dir, os.path.join(os.path.dirname(package_dir), "tahini")):
+        source_paths.update(glob.glob(os.path.join(source_dir, "*.py")))
+    module_path = getattr(sys.modules.get(module_name), "__file__", None)
+    if module_path is not None:
+        source_paths.add(os.path.abspath(module_path))
+
+    digest = hashlib.sha256()
+    for source_path in sorted(source_paths):
+        # Both packages have an __init__.py, the name of the directory tells them apart
+        source_name = os.path.join(os.path.basename(os.path.dirname(source_path)), os.path.basename(source_path))
+        digest.update(f"{source_name}:{_file_digest(source_path)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _new_file_mode() -> int:
+    """Get the permissions of a new file, which mkstemp does not use
+
+    Returns:
+        int: Permission bits
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def _describe_argument(argument: Any) -> str:
+    """Describe an argument of a file builder by its value, or by its content if it is a path to a file. The name of
+    the file is part of the description as well, since member files are named after their input file by default.
+
+    Args:
+        argument (Any): Argument of the builder
+
+    Returns:
+        str: Description of the argument
+    """
+    if isinstance(argument, str) and os.path.isfile(argument):
+        return f"file:{os.path.basename(argument)}:{_file_digest(argument)}"
+    if isinstance(argument, (list, tuple)):
+        return "[" + ",".join(_describe_argument(item) for item in argument) + "]"
+    return repr(argument)
+
+
+@dataclass
+class FileCacheStats:
+    """Statistics of a file cache
+    """
+    hits: int = 0
+    misses: int = 0
+    stored: int = 0
+    evicted: int = 0
+    entries: int = 0
+    size: int = 0
+
+
+class FileCache:
+    """Directory of built member files. An entry is identified by a digest of the minfs library and of the code of this
+    package and of tahini, the type of file built, and the content of the input files (e.g. the config json files and
+    the cmapsource) or the value of the other arguments (e.g. the file name and the compression mode). Changing any of
+    them builds a new entry.
+
+    When a maximum size is set, the least recently used entries are removed to stay under it.
+    """
+
+    def __init__(self, cache_dir: str, max_size: Optional[int] = None):
+        """Open a cache directory, creating it if necessary
+
+        Args:
+            cache_dir (str): Path to the cache directory
+            max_size (Optional[int], optional): Maximum size of the entries in bytes. Defaults to no limit.
+        """
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        self._stats = FileCacheStats()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def stats(self) -> FileCacheStats:
+        """Statistics of the cache since it was opened, and current number and size of its entries
+        """
+        entries = self._list_entries()
+        self._stats.entries = len(entries)
+        self._stats.size = sum(size for _, _, size in entries)
+        return self._stats
+
+    def key(self, builder: FileBuilder) -> str:
+        """Get the key of the file built by a builder
+
+        Args:
+            builder (FileBuilder): Builder of the file, a functools.partial of a file class
+
+        Raises:
+            TypeError: The builder is not a functools.partial
+
+        Returns:
+            str: Key of the file
+        """
+        if not isinstance(builder, partial):
+            raise TypeError("Only functools.partial file builders can be cached")
+        description = [f"format:{CACHE_FORMAT_VERSION}", f"library:{library_digest()}",
+                       f"code:{_code_digest(builder.func.__module__)}",
+                       f"builder:{builder.func.__module__}.{builder.func.__qualname__}"]
+        description += [_describe_argument(argument) for argument in builder.args]
+        description += [f"{name}={_describe_argument(argument)}"
+                        for name, argument in sorted(builder.keywords.items())]
+        return hashlib.sha256("\n".join(description).encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, key + ENTRY_SUFFIX)
+
+    def get(self, key: str) -> Optional[BuiltFile]:
+        """Get a file from the cache. An entry that cannot be read, e.g. a truncated one, is removed.
+
+        Args:
+            key (str): Key of the file
+
+        Returns:
+            Optional[BuiltFile]: Cached file, or None if the file is not in the cache
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "rb") as entry_file:
+                entry = entry_file.read()
+        except FileNotFoundError:
+            self._stats.misses += 1
+            return None
+
+        try:
+            file_type, name_length = _ENTRY_HEADER.unpack_from(entry)
+            name_end = _ENTRY_HEADER.size + name_length
+            if name_end > len(entry):
+                raise ValueError("Truncated file name")
+            built_file = BuiltFile(entry[_ENTRY_HEADER.size:name_end].decode("utf-8"), FileTypes(file_type),
+                                   entry[name_end:])
+        except (struct.error, ValueError):
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+            self._stats.misses += 1
+            return None
+
+        self._touch(entry_path)
+        self._stats.hits += 1
+        return built_file
+
+    def put(self, key: str, fs_file: FileBase) -> None:
+        """Add a file to the cache, then remove the least recently used entries if the cache is too large
+
+        Args:
+            key (str): Key of the file
+            fs_file (FileBase): File to add
+        """
+        self._put(key, fs_file)
+        if self._max_size is not None:
+            self._evict(self._max_size)
+
+    def _put(self, key: str, fs_file: FileBase) -> None:
+        """Add a file to the cache
+
+        Args:
+            key (str): Key of the file
+            fs_file (FileBase): File to add
+        """
+        file_name = fs_file.file_name.encode("utf-8")
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self._cache_dir, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as entry_file:
+                entry_file.write(_ENTRY_HEADER.pack(int(fs_file.file_type), len(file_name)))
+                entry_file.write(file_name)
+                entry_file.write(fs_file.data)
+            os.chmod(temp_path, _new_file_mode())
+            os.replace(temp_path, self._entry_path(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._touch(self._entry_path(key))
+        self._stats.stored += 1
+
+    @staticmethod
+    def _touch(entry_path: str) -> None:
+        """Mark an entry as used now. The time is set explicitly, as file systems may store coarser times.
+
+        Args:
+            entry_path (str): Path to the entry
+        """
+        now = time.time_ns()
+        os.utime(entry_path, ns=(now, now))
+
+    def _list_entries(self) -> List[Tuple[int, str, int]]:
+        """List the entries of the cache
+
+        Returns:
+            List[Tuple[int, str, int]]: Last use time, path and size of the entries
+        """
+        entries = []
+        with os.scandir(self._cache_dir) as dir_entries:
+            for dir_entry in dir_entries:
+                if dir_entry.name.endswith(ENTRY_SUFFIX):
+                    try:
+                        stat = dir_entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime_ns, dir_entry.path, stat.st_size))
+        return entries
+
+    def _evict(self, max_size: int) -> None:
+        """Remove the least recently used entries until the cache is not larger than a given size
+
+        Args:
+            max_size (int): Maximum size of the entries in bytes
+        """
+        entries = sorted(self._list_entries())
+        total_size = sum(size for _, _, size in entries)
+        for _, entry_path, size in entries:
+            if total_size <= max_size:
+                break
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+            self._stats.evicted += 1
+
+    def build_files(self, builders: List[FileBuilder], jobs: Optional[int] = 1,
+                    regmap_paths: Sequence[str] = ()) -> List[FileBase]:
+        """Get member files from the cache, and build the missing ones (see file_builder.build_files). Regmaps are
+        only loaded if a file is missing. The cache is then reduced to its maximum size, if it has one.
+
+        Args:
+            builders (List[FileBuilder]): Builders of the files, in the order of the file system
+            jobs (Optional[int], optional): Number of worker processes building the missing files. None for the
+                number of CPUs. Defaults to 1, which builds the files in this process.
+            regmap_paths (Sequence[str], optional): Regmaps used by the builders, loaded before the workers are forked
+
+        Returns:
+            List[FileBase]: Files, in the order of the builders
+        """
+        keys = [self.key(builder) for builder in builders]
+        files = [self.get(key) for key in keys]
+        missing = [position for position, fs_file in enumerate(files) if fs_file is None]
+
+        for position, fs_file in zip(missing, build_files([builders[position] for position in missing], jobs=jobs,
+                                                         regmap_paths=regmap_paths)):
+            self._put(keys[position], fs_file)
+            files[position] = fs_file
+
+        if self._max_size is not None:
+            self._evict(self._max_size)
+        return files
+
+    def clear(self) -> None:
+        """Remove all the entries of the cache
+        """
+        self._evict(0)
+
+
+def format_cache_stats(stats: FileCacheStats) -> str:
+    """Format the statistics of a file cache
+
+    Args:
+        stats (FileCacheStats): Statistics
+
+    Returns:
+        str: Statistics on one line
+    """
+    return (f"File cache: {stats.hits} hit(s), {stats.misses} miss(es), {stats.stored} stored, "
+            f"{stats.evicted} evicted, {stats.entries} entries using {stats.size} bytes")
@@ -1,15 +1,45 @@
 """
 RegmapCfgFile class for creating minfs regmap config files
 """
-from typing import List
+from dataclasses import dataclass
+from typing import List, Optional
 from builtins import str
 import os
-import binascii
+import zlib
 from subprocess import Popen, PIPE
 from io import FileIO
 from .shared import FileSystemWriter
 from .binary_data import BinaryData
 from .file_base import FileBase
+from .image_reader import FS_HEADER, FS_INDEX_ENTRY, IMAGE_VERSION
+
+# Alignment of the files written by the minfs library
+FILE_ALIGNMENT = 8
+# Value of the unused bytes of page-aligned file systems, as in erased flash
+ERASED_BYTE = 0xff
+# Offsets and lengths in the index are 16-bit
+MAX_FS_SIZE = 0xffff
+
+
+class FsLayoutError(Exception):
+    """Class used to handle file systems that cannot be laid out
+    """
+    pass
+
+
+@dataclass
+class FsLayoutEntry:
+    """Location of a file in a file system
+    """
+    name: str
+    offset: int
+    size: int
+    # Bytes reserved for the file, from its offset to the next file
+    allocated: int
+
+
+def _align(value: int, alignment: int) -> int:
+    return ((value + alignment - 1) // alignment) * alignment
 
 
 class FileSystem(BinaryData):
@@ -17,34 +47,140 @@ class FileSystem(BinaryData):
     Class used to create and manipulate regmap cfg files
     """
 
-    def __init__(self, files: List[FileBase]):
+    def __init__(self, files: List[FileBase], page_size: Optional[int] = None, slack: int = 0):
         """Create a new file system handle from the provided files.
 
+        By default the files are packed back to back by the minfs library, so a file changing size moves all the
+        following files. With a page size, the index and each file start on a page boundary, so that a change to a
+        file only changes the pages of this file.
+
         Args:
             files (List[FileBase]): List of files for the file system
+            page_size (Optional[int], optional): Size of a flash page or erase block to align the files to.
+                Defaults to packing the files.
+            slack (int, optional): Bytes reserved after each file for it to grow without moving the next files,
+                with a page size. Defaults to 0.
+
+        Raises:
+            FsLayoutError: Invalid page size, or the file system does not fit in the 16-bit offsets of the index
         """
         super().__init__()
 
         self._fs_size = 0
-        fs_data = bytearray()
+        fs_data_len = 0
+        fs_checksum = 0
         for fs_file in files:
             self._fs_size += (((len(fs_file.data)+7) >> 3)*8)
-            fs_data += fs_file.data
+            fs_data_len += len(fs_file.data)
+            # The uid is computed over the content of the files, one buffer at a time
+            fs_checksum = zlib.crc32(fs_file.data, fs_checksum)
 
-        if len(fs_data) > 0:
-            fs_data = binascii.hexlify(fs_data)
-            self.uid = f"0x{format((hash(fs_data) & 0xffffffff), 'x')}"
+        if fs_data_len > 0:
+            self.uid = f"0x{format(fs_checksum, 'x')}"
         else:
             self.uid = f"0x{format(0xffffffff, 'x')}"
 
-        self._file_system = FileSystemWriter(len(files), self._fs_size)
-
         uid_int = int(self.uid, 16)
 
+        if page_size is None:
+            self._file_system = FileSystemWriter(len(files), self._fs_size)
+            self._file_system.add_files((fs_file.file_name, fs_file.file_type, fs_file.data, uid_int)
+                                        for fs_file in files)
+            self.data = self._file_system.get_fs()
+            self._page_size = None
+            self._layout = self._get_layout(files, FILE_ALIGNMENT, 0)
+        else:
+            if page_size <= 0 or slack < 0:
+                raise FsLayoutError("The page size must be positive and the slack must not be negative")
+            self._page_size = page_size
+            self._layout = self._get_layout(files, page_size, slack)
+            fs_size = self._fs_end(len(files))
+            if fs_size > MAX_FS_SIZE:
+                raise FsLayoutError(f"The file system needs {fs_size} bytes, more than the {MAX_FS_SIZE} bytes the "
+                                    f"index can address")
+            self.data = self._write_aligned(files, uid_int)
+
+    @staticmethod
+    def _get_layout(files: List[FileBase], alignment: int, slack: int) -> List[FsLayoutEntry]:
+        """Place the files after the index, each file starting on a multiple of the alignment
+
+        Args:
+            files (List[FileBase]): Files of the file system
+            alignment (int): Alignment of the index and of the files
+            slack (int): Bytes reserved after each file
+
+        Returns:
+            List[FsLayoutEntry]: Location of the files, in the order of the index
+        """
+        offset = _align(FS_HEADER.size + len(files) * FS_INDEX_ENTRY.size, alignment)
+        layout = []
         for fs_file in files:
-            self._file_system.add_file(fs_file.file_name, fs_file.file_type, fs_file.data, uid_int)
+            allocated = _align(len(fs_file.data) + slack, alignment)
+            layout.append(FsLayoutEntry(name=fs_file.file_name[:8], offset=offset, size=len(fs_file.data),
+                                        allocated=allocated))
+            offset += allocated
+        return layout
+
+    def _fs_end(self, file_count: int) -> int:
+        """Get the size of a page-aligned file system, from the index to the end of the space reserved for its last
+        file
+        """
+        if self._layout:
+            return self._layout[-1].offset + self._layout[-1].allocated
+        return _align(FS_HEADER.size + file_count * FS_INDEX_ENTRY.size, self._page_size)
+
+    def _write_aligned(self, files: List[FileBase], uid: int) -> bytearray:
+        """Write a file system in the minfs format, with the files at the offsets of the layout
+
+        Args:
+            files (List[FileBase]): Files of the file system
+            uid (int): Unique identifier of the file system
+
+        Returns:
+            bytearray: File system
+        """
+        data = bytearray([ERASED_BYTE]) * self._fs_end(len(files))
+        FS_HEADER.pack_into(data, 0, IMAGE_VERSION, len(files), len(files))
+        for index, (fs_file, entry) in enumerate(zip(files, self._layout)):
+            FS_INDEX_ENTRY.pack_into(data, FS_HEADER.size + index * FS_INDEX_ENTRY.size, entry.offset, entry.size,
+                                     int(fs_file.file_type), uid, fs_file.file_name.encode("utf-8")[:8])
+            data[entry.offset:entry.offset + entry.size] = fs_file.data
+        return data
+
+    @property
+    def layout(self) -> List[FsLayoutEntry]:
+        """Location of the files in the file system
+        """
+        return self._layout
+
+    def layout_report(self, page_size: Optional[int] = None) -> str:
+        """Describe the location of the files, and how much of the pages they use is filled
+
+        Args:
+            page_size (Optional[int], optional): Size of a flash page. Defaults to the page size of the file system,
+                if it has one.
+
+        Returns:
+            str: Layout report
+        """
+        page_size = page_size or self._page_size
+        index_size = FS_HEADER.size + len(self._layout) * FS_INDEX_ENTRY.size
+        lines = [f"{'Name':<8}  {'Offset':>8}  {'Size':>6}  {'Reserved':>8}  {'Pages':>5}  Used",
+                 f"{'(index)':<8}  0x{0:06x}  {index_size:>6}"]
+        for entry in self._layout:
+            line = f"{entry.name:<8}  0x{entry.offset:06x}  {entry.size:>6}  {entry.allocated:>8}"
+            if page_size:
+                first_page = entry.offset // page_size
+                last_page = (entry.offset + max(entry.size, 1) - 1) // page_size
+                line += f"  {last_page - first_page + 1:>5}  {100 * entry.size / max(entry.allocated, 1):3.0f}%"
+            lines.append(line)
 
-        self.data = self._file_system.get_fs()
+        data_size = index_size + sum(entry.size for entry in self._layout)
+        summary = f"{len(self.data)} bytes, {data_size} used ({100 * data_size / max(len(self.data), 1):.0f}%)"
+        if page_size:
+            summary += f", {(len(self.data) + page_size - 1) // page_size} page(s) of {page_size} bytes"
+        lines.append(summary)
+        return "\n".join(lines)
 
     @property
     def data(self) -> bytes:
@@ -0,0 +1,261 @@
+"""
+Build many file systems in one process, listed in a manifest, e.g.
+
+{
+    "regmap": "regmap_cmapsource.json",
+    "images": [
+        {
+            "output": "out/variant_a.bin",
+            "c_header": "out/variant_a.h",
+            "files": [
+                {"type": "regmap-cfg", "path": "variant_a.json", "name": "config0", "compression": 2},
+                {"type": "calmap", "path": "calmap.json", "name": "calmap0"},
+                {"type": "regmap-struct", "paths": ["params.json"], "struct": "cml_params", "name": "struct0"},
+                {"type": "bin", "path": "csa.bin", "file_type": "CSA_FILE", "name": "csa"}
+            ]
+        },
+        ...
+    ]
+}
+
+Relative paths are relative to the directory of the manifest. "regmap" and "struct" can be given for the whole
+manifest, for an image or for a file. "name", "compression" (default 0) and "c_header" are optional. "page_size"
+and "page_slack" can be given for the whole manifest or for an image, to align the files on flash pages (see
+FileSystem).
+"""
+from dataclasses import dataclass, field
+from functools import partial
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from .calmap_file import CalmapFile
+from .file import File
+from .file_builder import FileBuilder, build_files
+from .file_cache import FileCache
+from .file_system import FileSystem
+from .file_types import FileTypes
+from .regmap_cfg_file import RegmapCfgFile
+from .regmap_struct_file import RegmapStructFile
+
+
+class InvalidFsManifestError(Exception):
+    """Class used to handle invalid `minfs build-many` manifests
+    """
+    pass
+
+
+@dataclass
+class FsImage:
+    """File system listed in a manifest
+    """
+    output_path: str
+    c_header_path: Optional[str]
+    # Keys of the member files, in the order of the file system
+    file_keys: List[Tuple] = field(default_factory=list)
+    page_size: Optional[int] = None
+    page_slack: int = 0
+
+
+@dataclass
+class FsManifest:
+    """File systems listed in a manifest, and the builders of their member files. Member files described the same
+    way in several images have a single builder.
+    """
+    images: List[FsImage] = field(default_factory=list)
+    builders: Dict[Tuple, FileBuilder] = field(default_factory=dict)
+    regmap_paths: List[str] = field(default_factory=list)
+
+
+@dataclass
+class FsResult:
+    """File system built by `minfs build-many`
+    """
+    output_path: str
+    uid: str
+    size: int
+    file_count: int
+    shared_file_count: int
+
+
+def _get_member(member_data: Dict[str, Any], key: str, image_index: int) -> Any:
+    """Get a mandatory field of a member file
+
+    Raises:
+        InvalidFsManifestError: The field is missing
+    """
+    try:
+        return member_data[key]
+    except KeyError as exc:
+        raise InvalidFsManifestError(f"Missing field '{key}' in a file of image {image_index}") from exc
+
+
+def _parse_member(member_data: Dict[str, Any], defaults: Dict[str, Any], manifest_dir: str,
+                  image_index: int) -> Tuple[Tuple, FileBuilder, Optional[str]]:
+    """Parse the description of a member file
+
+    Args:
+        member_data (Dict[str, Any]): Description of the file
+        defaults (Dict[str, Any]): "regmap" and "struct" of the image or of the manifest
+        manifest_dir (str): Directory of the manifest
+        image_index (int): Index of the image, for error messages
+
+    Raises:
+        InvalidFsManifestError: Invalid description
+
+    Returns:
+        Tuple[Tuple, FileBuilder, Optional[str]]: Key identifying the file, builder of the file, and path of the
+            regmap used by the file
+    """
+    def resolve(file_path: str) -> str:
+        # Input files are checked here, the files are only built once the whole manifest is loaded
+        resolved_path = os.path.normpath(os.path.join(manifest_dir, file_path))
+        if not os.path.isfile(resolved_path):
+            raise InvalidFsManifestError(f"File not found in image {image_index}: {resolved_path}")
+        return resolved_path
+
+    file_kind = _get_member(member_data, "type", image_index)
+    file_name = member_data.get("name")
+    regmap = member_data.get("regmap", defaults.get("regmap"))
+    regmap_path = resolve(regmap) if regmap is not None else None
+    if file_kind in ("regmap-cfg", "calmap", "regmap-struct") and regmap_path is None:
+        raise InvalidFsManifestError(f"No regmap file specified for a {file_kind} file of image {image_index}")
+
+    if file_kind == "regmap-cfg":
+        cfg_path = resolve(_get_member(member_data, "path", image_index))
+        compression_mode = int(member_data.get("compression", 0))
+        key = (file_kind, cfg_path, regmap_path, file_name, compression_mode)
+        builder = partial(RegmapCfgFile, cfg_path, regmap_path, file_name, compression_mode)
+    elif file_kind == "calmap":
+        calmap_path = resolve(_get_member(member_data, "path", image_index))
+        key = (file_kind, calmap_path, regmap_path, file_name)
+        builder = partial(CalmapFile, regmap_path, calmap_path, file_name)
+    elif file_kind == "regmap-struct":
+        struct_paths = [resolve(struct_path) for struct_path in _get_member(member_data, "paths", image_index)]
+        struct_name = member_data.get("struct", defaults.get("struct"))
+        if struct_name is None:
+            raise InvalidFsManifestError(f"No structure name specified for a regmap-struct file of image "
+                                         f"{image_index}")
+        key = (file_kind, tuple(struct_paths), regmap_path, struct_name, file_name)
+        builder = partial(RegmapStructFile, struct_paths, regmap_path, struct_name, file_name)
+    elif file_kind == "bin":
+        bin_path = resolve(_get_member(member_data, "path", image_index))
+        bin_type = _get_member(member_data, "file_type", image_index)
+        if bin_type not in FileTypes.__members__:
+            raise InvalidFsManifestError(f"Unsupported file_type '{bin_type}' in image {image_index}")
+        key = (file_kind, bin_path, bin_type, file_name)
+        builder = partial(File, bin_path, bin_type, file_name)
+        regmap_path = None
+    else:
+        raise InvalidFsManifestError(f"Unsupported file type '{file_kind}' in image {image_index}")
+
+    return key, builder, regmap_path
+
+
+def load_fs_manifest(manifest_path: str) -> FsManifest:
+    """Load the list of file systems to build from a json file
+
+    Args:
+        manifest_path (str): Path to the json file
+
+    Raises:
+        InvalidFsManifestError: Invalid manifest
+
+    Returns:
+        FsManifest: File systems to build
+    """
+    try:
+        with open(manifest_path, "r", encoding="UTF-8") as manifest_file:
+            manifest_data = json.load(manifest_file)
+    except FileNotFoundError as exc:
+        raise InvalidFsManifestError(f"Manifest not found: {manifest_path}") from exc
+    except json.JSONDecodeError as exc:
+        raise InvalidFsManifestError(f"Invalid json in the manifest: {exc}") from exc
+
+    if not isinstance(manifest_data, dict) or "images" not in manifest_data:
+        raise InvalidFsManifestError("The manifest has no 'images' section")
+
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+    manifest = FsManifest()
+    for image_index, image_data in enumerate(manifest_data["images"]):
+        if "output" not in image_data:
+            raise InvalidFsManifestError(f"Missing field 'output' in image {image_index}")
+        defaults = {key: image_data.get(key, manifest_data.get(key)) for key in ("regmap", "struct")}
+        c_header = image_data.get("c_header")
+        page_size = image_data.get("page_size", manifest_data.get("page_size"))
+        page_slack = image_data.get("page_slack", manifest_data.get("page_slack", 0))
+        for value in (0 if page_size is None else page_size, page_slack):
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise InvalidFsManifestError(f"'page_size' and 'page_slack' of image {image_index} must be integers")
+        image = FsImage(output_path=os.path.join(manifest_dir, image_data["output"]),
+                        c_header_path=os.path.join(manifest_dir, c_header) if c_header else None,
+                        page_size=page_size, page_slack=page_slack)
+
+        for member_data in image_data.get("files", []):
+            key, builder, regmap_path = _parse_member(member_data, defaults, manifest_dir, image_index)
+            manifest.builders.setdefault(key, builder)
+            if regmap_path is not None and regmap_path not in manifest.regmap_paths:
+                manifest.regmap_paths.append(regmap_path)
+            image.file_keys.append(key)
+        manifest.images.append(image)
+
+    return manifest
+
+
+def fs_batch_build(manifest: FsManifest, jobs: Optional[int] = None,
+                   cache: Optional[FileCache] = None) -> List[FsResult]:
+    """Build the file systems of a manifest. Each regmap is loaded once, each distinct member file is built once, in
+    a pool of processes, and each file system is then assembled from its member files.
+
+    Args:
+        manifest (FsManifest): File systems to build
+        jobs (Optional[int], optional): Number of worker processes. Defaults to the number of CPUs.
+        cache (Optional[FileCache], optional): Cache of member files. Defaults to building all the files.
+
+    Returns:
+        List[FsResult]: Built file systems, in the order of the manifest
+    """
+    keys = list(manifest.builders)
+    builders = [manifest.builders[key] for key in keys]
+    if cache is not None:
+        built_files = dict(zip(keys, cache.build_files(builders, jobs=jobs, regmap_paths=manifest.regmap_paths)))
+    else:
+        built_files = dict(zip(keys, build_files(builders, jobs=jobs, regmap_paths=manifest.regmap_paths)))
+
+    results = []
+    seen_keys = set()
+    for image in manifest.images:
+        file_system = FileSystem([built_files[key] for key in image.file_keys], image.page_size, image.page_slack)
+
+        for output_path in (image.output_path, image.c_header_path):
+            if output_path is not None:
+                os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        file_system.tobin(image.output_path)
+        if image.c_header_path is not None:
+            file_system.tocheader(image.c_header_path)
+
+        results.append(FsResult(output_path=image.output_path, uid=file_system.uid, size=len(file_system.data),
+                                file_count=len(image.file_keys),
+                                shared_file_count=sum(key in seen_keys for key in image.file_keys)))
+        seen_keys.update(image.file_keys)
+
+    return results
+
+
+def format_fs_summary(results: List[FsResult], distinct_file_count: int) -> str:
+    """Format the uid, size and member files of the built file systems as a table
+
+    Args:
+        results (List[FsResult]): Built file systems
+        distinct_file_count (int): Number of distinct member files
+
+    Returns:
+        str: Summary table
+    """
+    lines = [f"{'Size (bytes)':>12}  {'UID':<10}  {'Files':>5}  {'Shared':>6}  Output"]
+    for result in results:
+        lines.append(f"{result.size:>12}  {result.uid:<10}  {result.file_count:>5}  {result.shared_file_count:>6}  "
+                     f"{result.output_path}")
+    requested_file_count = sum(result.file_count for result in results)
+    lines.append(f"{len(results)} file system(s) built from {distinct_file_count} distinct member file(s), "
+                 f"{requested_file_count} requested")
+    return "\n".join(lines)
@@ -0,0 +1,238 @@
+"""
+Delta between two images, e.g. two firmware+parameters binaries, at the granularity of flash pages.
+
+A delta patch holds a header followed by runs of consecutive changed pages:
+
+- header: magic "MFSD", format version, page size, size and CRC32 of the old and new images, number of runs
+- each run: index of its first page and number of pages, followed by the content of the pages in the new image
+
+Only the pages listed in the patch need to be programmed to turn the old image into the new one.
+"""
+from dataclasses import dataclass
+import os
+import shutil
+import struct
+import zlib
+from typing import Iterator, List, Optional, Tuple
+from .image_reader import MappedImage
+
+DELTA_MAGIC = b"MFSD"
+# Changed whenever the format of the patches changes
+DELTA_FORMAT_VERSION = 1
+# Magic, format version, padding, page size, old size, old CRC32, new size, new CRC32 and number of runs
+DELTA_HEADER = struct.Struct("<4sB3xIIIIII")
+# First page and number of pages of a run
+DELTA_RUN = struct.Struct("<II")
+
+DEFAULT_PAGE_SIZE = 4096
+# Images are first compared in blocks of this many pages, then page by page in the blocks that differ
+_PAGES_PER_BLOCK = 256
+
+
+class InvalidDeltaError(Exception):
+    """Class used to handle delta patches that cannot be read or applied
+    """
+    pass
+
+
+@dataclass
+class DeltaSummary:
+    """Pages changed between two images
+    """
+    page_size: int
+    page_count: int
+    changed_page_count: int
+    run_count: int
+    patch_size: int
+
+
+def changed_pages(old_view: memoryview, new_view: memoryview, page_size: int) -> List[Tuple[int, int]]:
+    """List the pages of a new image that differ from an old image. Pages past the end of the old image are changed.
+
+    Args:
+        old_view (memoryview): Old image
+        new_view (memoryview): New image
+        page_size (int): Size of a page in bytes
+
+    Returns:
+        List[Tuple[int, int]]: First page and number of pages of each run of consecutive changed pages
+    """
+    block_size = page_size * _PAGES_PER_BLOCK
+    runs: List[Tuple[int, int]] = []
+
+    def add_page(page: int) -> None:
+        if runs and runs[-1][0] + runs[-1][1] == page:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((page, 1))
+
+    # Slices of the views are compared as bytes, with memcmp, rather than item by item
+    for block_start in range(0, len(new_view), block_size):
+        block_end = block_start + block_size
+        if old_view[block_start:block_end].tobytes() == new_view[block_start:block_end].tobytes():
+            continue
+        for page_start in range(block_start, min(block_end, len(new_view)), page_size):
+            page_end = page_start + page_size
+            if old_view[page_start:page_end].tobytes() != new_view[page_start:page_end].tobytes():
+                add_page(page_start // page_size)
+    return runs
+
+
+def _check_output_path(output_path: str, input_paths: Tuple[str, ...]) -> None:
+    """Check that an output file is not one of the inputs, which are mapped in memory while the output is written
+
+    Args:
+        output_path (str): Path to the output file
+        input_paths (Tuple[str, ...]): Paths to the input files
+
+    Raises:
+        ValueError: The output file is one of the inputs
+    """
+    if not os.path.exists(output_path):
+        return
+    for input_path in input_paths:
+        if os.path.samefile(output_path, input_path):
+            raise ValueError(f"{os.path.basename(output_path)} is both an input and the output")
+
+
+def make_delta(old_path: str, new_path: str, patch_path: str, page_size: int = DEFAULT_PAGE_SIZE) -> DeltaSummary:
+    """Write the patch turning an old image into a new one
+
+    Args:
+        old_path (str): Path to the old image
+        new_path (str): Path to the new image
+        patch_path (str): Path to the patch
+        page_size (int, optional): Size of a flash page, or of an erase block, in bytes. Defaults to 4096.
+
+    Raises:
+        ValueError: Invalid page size, or the patch is one of the images
+
+    Returns:
+        DeltaSummary: Pages changed
+    """
+    if page_size <= 0:
+        raise ValueError("The page size must be positive")
+    _check_output_path(patch_path, (old_path, new_path))
+
+    with MappedImage(old_path) as old_image, MappedImage(new_path) as new_image:
+        old_view, new_view = old_image.view, new_image.view
+        runs = changed_pages(old_view, new_view, page_size)
+        with open(patch_path, "wb") as patch_file:
+            patch_file.write(DELTA_HEADER.pack(DELTA_MAGIC, DELTA_FORMAT_VERSION, page_size, len(old_view),
+                                               zlib.crc32(old_view), len(new_view), zlib.crc32(new_view), len(runs)))
+            for first_page, page_count in runs:
+                patch_file.write(DELTA_RUN.pack(first_page, page_count))
+                patch_file.write(new_view[first_page * page_size:(first_page + page_count) * page_size])
+            patch_size = patch_file.tell()
+        page_count = (len(new_view) + page_size - 1) // page_size
+
+    return DeltaSummary(page_size=page_size, page_count=page_count,
+                        changed_page_count=sum(page_count for _, page_count in runs), run_count=len(runs),
+                        patch_size=patch_size)
+
+
+class DeltaPatch:
+    """Delta patch. The runs are read when they are iterated over.
+    """
+
+    def __init__(self, buffer):
+        """Read the header of a patch
+
+        Args:
+            buffer (bytes-like): Patch, e.g. a MappedImage view
+
+        Raises:
+            InvalidDeltaError: The buffer is not a delta patch
+        """
+        self._view = memoryview(buffer)
+        if len(self._view) < DELTA_HEADER.size:
+            raise InvalidDeltaError("No delta patch header")
+        (magic, version, self.page_size, self.old_size, self.old_crc, self.new_size, self.new_crc,
+         self.run_count) = DELTA_HEADER.unpack_from(self._view)
+        if magic != DELTA_MAGIC:
+            raise InvalidDeltaError("Not a delta patch")
+        if version != DELTA_FORMAT_VERSION:
+            raise InvalidDeltaError(f"Unsupported delta patch version {version}")
+
+    def __iter__(self) -> Iterator[Tuple[int, memoryview]]:
+        """Iterate over the runs of the patch
+
+        Raises:
+            InvalidDeltaError: The patch is truncated
+
+        Yields:
+            Tuple[int, memoryview]: Offset of the run in the new image, and content of its pages
+        """
+        position = DELTA_HEADER.size
+        for _ in range(self.run_count):
+            if position + DELTA_RUN.size > len(self._view):
+                raise InvalidDeltaError("The delta patch is truncated")
+            first_page, page_count = DELTA_RUN.unpack_from(self._view, position)
+            offset = first_page * self.page_size
+            length = max(0, min(page_count * self.page_size, self.new_size - offset))
+            position += DELTA_RUN.size
+            if position + length > len(self._view):
+                raise InvalidDeltaError("The delta patch is truncated")
+            yield offset, self._view[position:position + length]
+            position += length
+
+
+def verify_delta(image_path: str, patch_path: str) -> bool:
+    """Check that an image is the new image of a patch, e.g. after the changed pages were programmed
+
+    Args:
+        image_path (str): Path to the image
+        patch_path (str): Path to the patch
+
+    Returns:
+        bool: True if the image is the new image of the patch
+    """
+    with MappedImage(patch_path) as patch_image, MappedImage(image_path) as image:
+        patch = DeltaPatch(patch_image.view)
+        return len(image.view) == patch.new_size and zlib.crc32(image.view) == patch.new_crc
+
+
+def apply_delta(image_path: str, patch_path: str, output_path: Optional[str] = None) -> None:
+    """Apply a patch to the old image, and check the result
+
+    Args:
+        image_path (str): Path to the old image
+        patch_path (str): Path to the patch
+        output_path (Optional[str], optional): Path to the new image. Defaults to patching the old image in place.
+
+    Raises:
+        InvalidDeltaError: The image is not the old image of the patch, or the result is not its new image
+        ValueError: The output image is the patch
+    """
+    _check_output_path(output_path if output_path is not None else image_path, (patch_path,))
+    with MappedImage(patch_path) as patch_image:
+        patch = DeltaPatch(patch_image.view)
+        with MappedImage(image_path) as image:
+            if len(image.view) != patch.old_size or zlib.crc32(image.view) != patch.old_crc:
+                raise InvalidDeltaError(f"{os.path.basename(image_path)} is not the image the patch applies to")
+
+        if output_path is not None and os.path.abspath(output_path) != os.path.abspath(image_path):
+            shutil.copyfile(image_path, output_path)
+        else:
+            output_path = image_path
+        with open(output_path, "r+b") as output_file:
+            for offset, data in patch:
+                output_file.seek(offset)
+                output_file.write(data)
+            output_file.truncate(patch.new_size)
+
+    if not verify_delta(output_path, patch_path):
+        raise InvalidDeltaError("The patched image does not match the new image of the patch")
+
+
+def format_delta_summary(summary: DeltaSummary) -> str:
+    """Format the pages changed between two images
+
+    Args:
+        summary (DeltaSummary): Pages changed
+
+    Returns:
+        str: Summary on one line
+    """
+    return (f"{summary.changed_page_count} of {summary.page_count} page(s) of {summary.page_size} bytes changed, "
+            f"in {summary.run_count} run(s). Patch size: {summary.patch_size} bytes")
@@ -0,0 +1,388 @@
+"""
+Read minfs images (file systems, regmap config files and calmap files) without the minfs library.
+
+Images are mapped in memory and their index is parsed when it is accessed, so that only the pages used are read,
+e.g. the file system of a large firmware+parameters binary. Files and entry data are memoryview slices of the
+image, not copies.
+"""
+from dataclasses import dataclass
+import mmap
+import os
+import struct
+import zlib
+from typing import Iterator, List, Optional, Sequence, Union
+from .file_types import FileTypes
+
+# Version of the image formats supported, first byte of every image
+IMAGE_VERSION = 0
+
+# File system: version, number of files, number of files allocated, padding
+FS_HEADER = struct.Struct("<BBBx")
+# File system index entry: offset of the file in the file system, length, type, padding, uid and name
+FS_INDEX_ENTRY = struct.Struct("<HHHxxI8s")
+# Regmap config file: version, build id, number of entries, padding and firmware uid
+REGMAP_CFG_HEADER = struct.Struct("<BBBxI")
+# Regmap config entry: regmap address, offset of the data in the data section and length of the data
+REGMAP_CFG_ENTRY = struct.Struct("<HHH")
+# Calmap file: version, map version, number of entries and padding
+CALMAP_HEADER = struct.Struct("<BBBx")
+# Calmap entry: type, number of bytes, offset in the calibration buffer, offset of the validity flag and regmap offset
+CALMAP_ENTRY = struct.Struct("<BBHHH")
+
+# uid of a file system without any data
+EMPTY_FS_UID = 0xffffffff
+
+
+class InvalidImageError(Exception):
+    """Class used to handle minfs images that cannot be read
+    """
+    pass
+
+
+@dataclass
+class FsFileInfo:
+    """File of a file system image
+    """
+    index: int
+    name: str
+    # FileTypes, or the raw value for types unknown to this version of minfs
+    file_type: Union[FileTypes, int]
+    uid: int
+    offset: int
+    data: memoryview
+
+
+@dataclass
+class RegmapCfgEntry:
+    """Entry of a regmap config image
+    """
+    addr: int
+    offset: int
+    data: memoryview
+
+
+@dataclass
+class CalmapEntry:
+    """Entry of a calmap image
+    """
+    entry_type: int
+    num_bytes: int
+    cal_buffer_offset: int
+    validity_flag_offset: int
+    regmap_offset: int
+
+
+def _byte_view(buffer) -> memoryview:
+    """Get a view of the bytes of a buffer, without copying it
+    """
+    view = memoryview(buffer)
+    return view if view.format == "B" and view.ndim == 1 else view.cast("B")
+
+
+def _file_type(value: int) -> Union[FileTypes, int]:
+    """Get the type of a file from its value in the index
+    """
+    try:
+        return FileTypes(value)
+    except ValueError:
+        return value
+
+
+class MappedImage:
+    """Image file mapped in memory, read only. Use it as a context manager, and release the views of the image
+    before it is closed.
+    """
+
+    def __init__(self, image_path: str):
+        """Map an image file in memory
+
+        Args:
+            image_path (str): Path to the image file
+        """
+        self._mmap = None
+        with open(image_path, "rb") as image_file:
+            # An empty file cannot be mapped
+            if os.fstat(image_file.fileno()).st_size:
+                self._mmap = mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self._mmap if self._mmap is not None else b"")
+
+    def close(self) -> None:
+        """Unmap the image. If views of the image are still used, it is unmapped once they are released.
+        """
+        self.view.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass
+
+    def __enter__(self) -> "MappedImage":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class FileSystemImage:
+    """File system image. The index entries are parsed the first time they are accessed.
+    """
+
+    def __init__(self, buffer, offset: int = 0):
+        """Read the header of a file system
+
+        Args:
+            buffer (bytes-like): Image, or binary containing the file system, e.g. a MappedImage view
+            offset (int, optional): Offset of the file system in the buffer. Defaults to 0.
+
+        Raises:
+            InvalidImageError: The buffer does not contain a file system at this offset
+        """
+        self._view = _byte_view(buffer)[offset:]
+        if len(self._view) < FS_HEADER.size:
+            raise InvalidImageError(f"No file system header at offset 0x{offset:x}")
+        version, self._count, self.capacity = FS_HEADER.unpack_from(self._view)
+        if version != IMAGE_VERSION:
+            raise InvalidImageError(f"Unsupported file system version {version} at offset 0x{offset:x}")
+        if FS_HEADER.size + self._count * FS_INDEX_ENTRY.size > len(self._view):
+            raise InvalidImageError("The index of the file system is truncated")
+        self._files: List[Optional[FsFileInfo]] = [None] * self._count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> FsFileInfo:
+        """Get a file of the file system
+
+        Args:
+            index (int): Index of the file
+
+        Raises:
+            InvalidImageError: The file is outside of the image
+
+        Returns:
+            FsFileInfo: File
+        """
+        fs_file = self._files[index]
+        if fs_file is None:
+            index = range(self._count)[index]
+            file_offset, length, file_type, uid, name = FS_INDEX_ENTRY.unpack_from(
+                self._view, FS_HEADER.size + index * FS_INDEX_ENTRY.size)
+            if file_offset + length > len(self._view):
+                raise InvalidImageError(f"File {index} is outside of the image")
+            # Names are NUL terminated, unless they are 8 characters long
+            fs_file = FsFileInfo(index=index, name=name.split(b"\0", 1)[0].decode("utf-8", errors="replace"),
+                                 file_type=_file_type(file_type), uid=uid, offset=file_offset,
+                                 data=self._view[file_offset:file_offset + length])
+            self._files[index] = fs_file
+        return fs_file
+
+    def __iter__(self) -> Iterator[FsFileInfo]:
+        return (self[index] for index in range(self._count))
+
+    def find(self, name: str) -> Optional[FsFileInfo]:
+        """Find a file by name
+
+        Args:
+            name (str): Name of the file
+
+        Returns:
+            Optional[FsFileInfo]: First file with this name, or None if there is none
+        """
+        return next((fs_file for fs_file in self if fs_file.name == name), None)
+
+    @property
+    def size(self) -> int:
+        """Size of the file system, up to the end of its last file padded to 8 bytes
+        """
+        end = FS_HEADER.size + self.capacity * FS_INDEX_ENTRY.size
+        for fs_file in self:
+            end = max(end, fs_file.offset + len(fs_file.data))
+        return min(((end + 7) >> 3) * 8, len(self._view))
+
+    @property
+    def uid(self) -> int:
+        """uid stored in the index of the file system
+        """
+        return self[0].uid if self._count else EMPTY_FS_UID
+
+    def compute_uid(self) -> int:
+        """Compute the uid of the file system from the content of its files, like `FileSystem` does
+
+        Returns:
+            int: Computed uid
+        """
+        checksum = 0
+        data_length = 0
+        for fs_file in self:
+            checksum = zlib.crc32(fs_file.data, checksum)
+            data_length += len(fs_file.data)
+        return checksum if data_length else EMPTY_FS_UID
+
+
+class RegmapCfgImage:
+    """Regmap config image. The entries are parsed the first time they are accessed.
+    """
+
+    def __init__(self, buffer):
+        """Read the header of a regmap config file
+
+        Args:
+            buffer (bytes-like): Image, e.g. the data of a file system file
+
+        Raises:
+            InvalidImageError: The buffer is not a regmap config file
+        """
+        self._view = _byte_view(buffer)
+        if len(self._view) < REGMAP_CFG_HEADER.size:
+            raise InvalidImageError("No regmap config file header")
+        version, self.build_id, self._count, self.fw_uid = REGMAP_CFG_HEADER.unpack_from(self._view)
+        if version != IMAGE_VERSION:
+            raise InvalidImageError(f"Unsupported regmap config file version {version}")
+        self._data_offset = REGMAP_CFG_HEADER.size + self._count * REGMAP_CFG_ENTRY.size
+        if self._data_offset > len(self._view):
+            raise InvalidImageError("The index of the regmap config file is truncated")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> RegmapCfgEntry:
+        """Get an entry of the file
+
+        Args:
+            index (int): Index of the entry
+
+        Raises:
+            InvalidImageError: The data of the entry is outside of the image
+
+        Returns:
+            RegmapCfgEntry: Entry
+        """
+        index = range(self._count)[index]
+        addr, offset, length = REGMAP_CFG_ENTRY.unpack_from(
+            self._view, REGMAP_CFG_HEADER.size + index * REGMAP_CFG_ENTRY.size)
+        start = self._data_offset + offset
+        if start + length > len(self._view):
+            raise InvalidImageError(f"The data of entry {index} is outside of the image")
+        return RegmapCfgEntry(addr=addr, offset=offset, data=self._view[start:start + length])
+
+    def __iter__(self) -> Iterator[RegmapCfgEntry]:
+        return (self[index] for index in range(self._count))
+
+
+class CalmapImage:
+    """Calmap image. The entries are parsed the first time they are accessed.
+    """
+
+    def __init__(self, buffer):
+        """Read the header of a calmap file
+
+        Args:
+            buffer (bytes-like): Image, e.g. the data of a file system file
+
+        Raises:
+            InvalidImageError: The buffer is not a calmap file
+        """
+        self._view = _byte_view(buffer)
+        if len(self._view) < CALMAP_HEADER.size:
+            raise InvalidImageError("No calmap file header")
+        version, self.map_version, self._count = CALMAP_HEADER.unpack_from(self._view)
+        if version != IMAGE_VERSION:
+            raise InvalidImageError(f"Unsupported calmap file version {version}")
+        if self.map_version in (0, 0xff):
+            raise InvalidImageError(f"Invalid calmap version {self.map_version}")
+        if CALMAP_HEADER.size + self._count * CALMAP_ENTRY.size > len(self._view):
+            raise InvalidImageError("The index of the calmap file is truncated")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> CalmapEntry:
+        index = range(self._count)[index]
+        return CalmapEntry(*CALMAP_ENTRY.unpack_from(self._view, CALMAP_HEADER.size + index * CALMAP_ENTRY.size))
+
+    def __iter__(self) -> Iterator[CalmapEntry]:
+        return (self[index] for index in range(self._count))
+
+
+def _format_entries(image: Union[RegmapCfgImage, CalmapImage], indent: str = "") -> List[str]:
+    """Format the entries of a regmap config or calmap image, one per line
+    """
+    if isinstance(image, RegmapCfgImage):
+        lines = [f"{indent}Regmap config: {len(image)} entries, firmware uid 0x{image.fw_uid:08x}, "
+                 f"build id 0x{image.build_id:02x}"]
+        lines += [f"{indent}  0x{entry.addr:04x}  {len(entry.data):>5} bytes  {bytes(entry.data[:16]).hex()}"
+                  f"{'...' if len(entry.data) > 16 else ''}" for entry in image]
+    else:
+        lines = [f"{indent}Calmap: {len(image)} entries, map version {image.map_version}"]
+        lines += [f"{indent}  type {entry.entry_type}  {entry.num_bytes:>3} bytes  "
+                  f"cal buffer 0x{entry.cal_buffer_offset:04x}  valid flag 0x{entry.validity_flag_offset:04x}  "
+                  f"regmap 0x{entry.regmap_offset:04x}"
+                  for entry in image]
+    return lines
+
+
+def format_fs_image(image: FileSystemImage, entries: bool = False) -> str:
+    """Format the header and the index of a file system image, and check its uid
+
+    Args:
+        image (FileSystemImage): File system
+        entries (bool, optional): Also format the entries of the regmap config and calmap files. Defaults to False.
+
+    Returns:
+        str: Description of the file system
+    """
+    computed_uid = image.compute_uid()
+    lines = [f"File system: {len(image)} file(s) of {image.capacity}, {image.size} bytes, uid 0x{image.uid:x} "
+             f"({'ok' if computed_uid == image.uid else f'mismatch, computed 0x{computed_uid:x}'})",
+             f"{'Index':>5}  {'Name':<8}  {'Type':<10}  {'Offset':>8}  {'Size':>6}  CRC32"]
+    for fs_file in image:
+        type_name = fs_file.file_type.name if isinstance(fs_file.file_type, FileTypes) else str(fs_file.file_type)
+        lines.append(f"{fs_file.index:>5}  {fs_file.name:<8}  {type_name:<10}  0x{fs_file.offset:06x}  "
+                     f"{len(fs_file.data):>6}  0x{zlib.crc32(fs_file.data):08x}")
+        if entries and fs_file.file_type == FileTypes.REGMAP_CFG:
+            lines += _format_entries(RegmapCfgImage(fs_file.data), indent="       ")
+        elif entries and fs_file.file_type == FileTypes.CALMAP:
+            lines += _format_entries(CalmapImage(fs_file.data), indent="       ")
+    return "\n".join(lines)
+
+
+def format_entries(image: Union[RegmapCfgImage, CalmapImage]) -> str:
+    """Format the header and the entries of a regmap config or calmap image
+
+    Args:
+        image (Union[RegmapCfgImage, CalmapImage]): Image
+
+    Returns:
+        str: Description of the image
+    """
+    return "\n".join(_format_entries(image))
+
+
+def extract_files(image: FileSystemImage, output_dir: str, names: Sequence[str] = ()) -> List[str]:
+    """Write the files of a file system image in a directory, as `<index>_<name>.bin`
+
+    Args:
+        image (FileSystemImage): File system
+        output_dir (str): Output directory, created if necessary
+        names (Sequence[str], optional): Names of the files to write. Defaults to all the files.
+
+    Raises:
+        InvalidImageError: A file name is not in the file system
+
+    Returns:
+        List[str]: Paths to the written files
+    """
+    missing = set(names) - {fs_file.name for fs_file in image}
+    if missing:
+        raise InvalidImageError(f"File(s) not found in the file system: {', '.join(sorted(missing))}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for fs_file in image:
+        if names and fs_file.name not in names:
+            continue
+        output_path = os.path.join(output_dir, f"{fs_file.index:02d}_{fs_file.name}.bin")
+        with open(output_path, "wb") as output_file:
+            output_file.write(fs_file.data)
+        written.append(output_path)
+    return written
@@ -2,12 +2,14 @@
 RegmapCfgFile class for creating minfs regmap config files
 """
 from builtins import range
+from collections import deque
 import json
 from operator import itemgetter
+from typing import Any, Dict, List, Union
 from cmlpytools import tahini
-from .shared import RegmapFileWriter
+from .shared import RegmapFileWriter, MinFsError
 from .file_types import FileTypes
-from .file_base import FileBase
+from .file_base import FileBase, load_regmap
 
 
 class RegmapCfgParseError(Exception):
@@ -74,20 +76,82 @@ class FileEntry():
         return self._end
 
 
+def _optimal_entries(registers: List[Dict[str, Any]], entry_header_size: int, max_entry_size: int) -> List[FileEntry]:
+    """Group registers sorted by address into file entries, so that the file is as small as possible. An entry costs
+    its header and its data, including the padding between its registers. Among the smallest files, the one with the
+    fewest entries is chosen.
+
+    best(j), the smallest size of the first j registers, is the minimum over the first register i of the last entry of
+    best(i) + header + end(j - 1) - start(i). The candidates i form a sliding window bounded by the maximum entry size,
+    whose minimum is kept in a monotonic queue, so the registers are grouped in linear time.
+
+    Args:
+        registers (List[Dict[str, Any]]): Registers sorted by address, with their 'address' and 'data'
+        entry_header_size (int): Size of the header of an entry in bytes
+        max_entry_size (int): Maximum size of the data of an entry in bytes
+
+    Raises:
+        RegmapCfgParseError: Two registers overlap
+
+    Returns:
+        List[FileEntry]: File entries, sorted by address
+    """
+    starts = [reg_conf['address'] for reg_conf in registers]
+    ends = [reg_conf['address'] + len(reg_conf['data']) for reg_conf in registers]
+    for position in range(1, len(registers)):
+        if starts[position] < ends[position - 1]:
+            raise RegmapCfgParseError(
+                f"Register {registers[position]['register']} detected twice in the parameter file.")
+
+    # Size and number of entries of the best grouping of the first j registers, and first register of its last entry
+    best = [(0, 0)]
+    first_register = [0]
+    # Candidate first registers of the last entry, by increasing cost
+    candidates = deque()
+    for end_position, end in enumerate(ends):
+        cost = (best[end_position][0] - starts[end_position], best[end_position][1])
+        while candidates and candidates[-1][0] >= cost:
+            candidates.pop()
+        candidates.append((cost, end_position))
+        while end - starts[candidates[0][1]] > max_entry_size and candidates[0][1] < end_position:
+            candidates.popleft()
+
+        (size, entries), start_position = candidates[0]
+        best.append((size + entry_header_size + end, entries + 1))
+        first_register.append(start_position)
+
+    file_entries = []
+    end_position = len(registers)
+    while end_position > 0:
+        start_position = first_register[end_position]
+        file_entry = FileEntry(starts[start_position], registers[start_position]['data'])
+        for reg_conf in registers[start_position + 1:end_position]:
+            file_entry.append(reg_conf['address'], reg_conf['data'])
+        file_entries.append(file_entry)
+        end_position = start_position
+    file_entries.reverse()
+    return file_entries
+
+
 class RegmapCfgFile(FileBase):
     """Class used to create and manipulate regmap cfg files
     """
 
     FILE_HEADER_SIZE = 6
+    # The size of an entry is stored on 16 bits
+    MAX_ENTRY_SIZE = 0xFFFF
 
-    def __init__(self, cfg_file: str, regmap_file: str, file_name: str = None, compressed: int = 0):
+    def __init__(self, cfg_file: str, regmap_file: Union[str, tahini.CmapFullRegmap], file_name: str = None,
+                 compressed: int = 0, index: tahini.SearchIndex = None):
         """Create a handle that can be used to write a new regmap configuration file.
 
         Args:
             cfg_file (str): specifies the path to the configuration file
-            regmap_file (str): specifies the path to the regmap file
+            regmap_file (Union[str, tahini.CmapFullRegmap]): specifies the path to the regmap file, or the regmap
+                already loaded
             file_name (str): specifies the name of the output file
-            file_compressed (int): mode 1 (1), mode 2 (2) or disable (0) the config file compression
+            file_compressed (int): mode 1 (1), mode 2 (2), optimal (3) or disable (0) the config file compression
+            index (tahini.SearchIndex, optional): search index of the regmap already loaded
 
         Returns:
             RegmapCfgFile object
@@ -108,10 +172,10 @@ class RegmapCfgFile(FileBase):
 
         # Parse the regmap file and the config file
         json_data = json.loads(f_cfg_data)
-        cmap_node = tahini.CmapFullRegmap.load_json(regmap_file)
+        cmap_node, index = load_regmap(regmap_file, index)
 
         if "struct" in json_data:
-            match = tahini.search(name=json_data['struct'], cmap_type=tahini.CmapType.STRUCT, node=cmap_node)
+            match = index.search(name=json_data['struct'], cmap_type=tahini.CmapType.STRUCT, node=cmap_node)
 
             if not match:
                 raise RegmapCfgParseError(
@@ -127,8 +191,8 @@ class RegmapCfgFile(FileBase):
                 namespace = reg_conf['namespace']
             else:
                 namespace = None
-            match = tahini.search(name=reg_conf['register'], cmap_type=tahini.CmapType.REGISTER, node=cmap_node,
-                                  namespace=namespace)
+            match = index.search(name=reg_conf['register'], cmap_type=tahini.CmapType.REGISTER, node=cmap_node,
+                                 namespace=namespace)
 
             if not match:
                 raise RegmapCfgParseError(
@@ -156,7 +220,12 @@ class RegmapCfgFile(FileBase):
                 raise RegmapCfgParseError("No valid value, flag, or state found for the register "
                                           + f"'{reg_conf['register']}' in the regmap config file.")
 
-        if compressed > 0:
+        if compressed == 3:
+            # Group the registers to make the file as small as possible
+            json_data['data'].sort(key=itemgetter('address'))
+            for file_entry in _optimal_entries(json_data['data'], self.FILE_HEADER_SIZE, self.MAX_ENTRY_SIZE):
+                self._add_entry(file_entry.address, file_entry.data)
+        elif compressed > 0:
             new_entry = None
             # determine the maximal distance between two registers based on the chosen
             # compression mode.
@@ -191,8 +260,7 @@ class RegmapCfgFile(FileBase):
                 self._add_entry(reg_conf['address'], reg_conf['data'])
 
         whandle = RegmapFileWriter(self._total_entries, self._total_size)
-        for i in range(self._total_entries):
-            whandle.add_entry(self._addresses[i], self._values[i])
+        whandle.add_entries(zip(self._addresses, self._values))
         self.data = whandle.get_file()
 
     def _add_entry(self, addr, value):
@@ -207,6 +275,12 @@ class RegmapCfgFile(FileBase):
         self._total_entries += 1
         self._total_size += len(value)
 
+    @property
+    def entry_count(self) -> int:
+        """Number of entries of the file
+        """
+        return self._total_entries
+
     @property
     def file_name(self) -> str:
         return self._file_name
@@ -230,3 +304,35 @@ class RegmapCfgFile(FileBase):
     @data.setter
     def data(self, newdata: bytes):
         self._data = newdata
+
+
+COMPRESSION_MODES = {0: "No compression", 1: "Contiguous registers", 2: "Close registers", 3: "Optimal"}
+
+
+def compression_report(cfg_file: str, regmap_file: Union[str, tahini.CmapFullRegmap],
+                       index: tahini.SearchIndex = None) -> str:
+    """Compare the number of entries and the size of a regmap configuration file in every compression mode
+
+    Args:
+        cfg_file (str): Path to the configuration file
+        regmap_file (Union[str, tahini.CmapFullRegmap]): Path to the regmap file, or regmap already loaded
+        index (tahini.SearchIndex, optional): Search index of the regmap already loaded
+
+    Returns:
+        str: Report table
+    """
+    lines = [f"{'Mode':<4}  {'Description':<20}  {'Entries':>7}  {'Size (bytes)':>12}  {'Saving':>6}"]
+    uncompressed_size = None
+    for mode, description in COMPRESSION_MODES.items():
+        try:
+            regmap_cfg_file = RegmapCfgFile(cfg_file, regmap_file, None, mode, index)
+        except (RegmapCfgParseError, MinFsError) as exc:
+            lines.append(f"{mode:<4}  {description:<20}  Failed: {exc}")
+            continue
+
+        size = len(regmap_cfg_file.data)
+        if mode == 0:
+            uncompressed_size = size
+        saving = f"{100 * (uncompressed_size - size) / uncompressed_size:5.1f}%" if uncompressed_size else "-"
+        lines.append(f"{mode:<4}  {description:<20}  {regmap_cfg_file.entry_count:>7}  {size:>12}  {saving:>6}")
+    return "\n".join(lines)
@@ -4,10 +4,11 @@ RegmapCfgMergeFile class for merging config files with different namespaces
 from builtins import range
 import json
 from operator import itemgetter
+from typing import Dict, List, Union
 from cmlpytools import tahini
 from .shared import RegmapFileWriter
 from .file_types import FileTypes
-from .file_base import FileBase
+from .file_base import load_regmap
 import os
 
 def attach_namespace(data_list, namespace):
@@ -22,11 +23,33 @@ def attach_namespace(data_list, namespace):
         register['namespace'] = namespace
     return data_list
 
+
+def remove_registers(data_list: List[dict], registers: Dict[str, List[dict]]) -> List[dict]:
+    """
+    A function to remove registers from the register data section of a config file. Each register removes the first
+    register of the data equal to it.
+
+    Args:
+        data_list (List[dict]): the register data section of a config file
+        registers (Dict[str, List[dict]]): registers to remove, grouped by register name
+    """
+    remaining = {name: list(name_registers) for name, name_registers in registers.items()}
+    kept = []
+    for register in data_list:
+        name_registers = remaining.get(register['register'])
+        if name_registers and register in name_registers:
+            name_registers.remove(register)
+        else:
+            kept.append(register)
+    return kept
+
+
 class RegmapCfgMergeFile(object):
     """
     Class used to create merge regmap parameter files together
     """
-    def __init__(self, top_level_config: str, json_path: str, cmap_source: str):
+    def __init__(self, top_level_config: str, json_path: str, cmap_source: Union[str, tahini.CmapFullRegmap],
+                 index: tahini.SearchIndex = None):
         """ 
         Create a handle that can be used to merge together several regmap parameter files with
         different namespaces
@@ -34,12 +57,17 @@ class RegmapCfgMergeFile(object):
         Args:
             top_level_config (str): a top level config file
             json_path (str): path to the cml json configs
+            cmap_source (Union[str, tahini.CmapFullRegmap]): path to the cmapsource file, or the regmap already loaded
+            index (tahini.SearchIndex, optional): search index of the regmap already loaded
         """
         with open(top_level_config, 'r', encoding="UTF-8") as f_cfg:
             tl_cfg_data = f_cfg.read()
         tl_json_data = json.loads(tl_cfg_data)
 
-        cmap_full_regmap = tahini.CmapFullRegmap.load_json(cmap_source)
+        cmap_full_regmap, self._index = load_regmap(cmap_source, index)
+        self._cmap = cmap_full_regmap
+        # Register name -> True if the register is common to all namespaces
+        self._common_names: Dict[str, bool] = {}
 
         if 'minfs' not in tl_json_data:
             raise Exception("minfs section is not found in the config file")
@@ -67,16 +95,13 @@ class RegmapCfgMergeFile(object):
 
         # extract common registers from the config file
         common_regs = []
+        # Common registers grouped by name, in the order of common_regs
+        common_by_name: Dict[str, List[dict]] = {}
         for register in self._main_json_data['data']:
-            match = tahini.search(name=register['register'], cmap_type=tahini.CmapType.REGISTER, 
-                                  node=cmap_full_regmap)
-            if match is None:
-                raise Exception(f"Register {register['register']} not found")
-            if not match.result.namespace:
+            if self._is_common(register['register']):
                 common_regs.append(register)
-        for register in common_regs:
-            if register in self._main_json_data['data']:
-                self._main_json_data['data'].remove(register)
+                common_by_name.setdefault(register['register'], []).append(register)
+        self._main_json_data['data'] = remove_registers(self._main_json_data['data'], common_by_name)
 
         # Add the namespace to the first config file
         self._main_json_data['data'] = attach_namespace(self._main_json_data['data'], first_ns)
@@ -100,23 +125,15 @@ class RegmapCfgMergeFile(object):
                 # extract common registers and compare them to the common registers of the registers that are
                 # already in the common registers list.
                 for register in json_data['data']:
-                    match = tahini.search(name=register['register'], cmap_type=tahini.CmapType.REGISTER, 
-                                          node=cmap_full_regmap)
-                    if match is None:
-                        raise Exception(f"Register {register['register']} not found")
-                    if not match.result.namespace:
-                        register_found = 0
-                        for common_reg in common_regs:
-                            if register['register'] == common_reg['register']:
-                                if register['value'] != common_reg['value']:
-                                    raise Exception("Common register in config files contain different values")
-                                register_found = 1
-                                break
-                        if register_found == 0:
+                    if self._is_common(register['register']):
+                        if register['register'] in common_by_name:
+                            common_reg = common_by_name[register['register']][0]
+                            if register['value'] != common_reg['value']:
+                                raise Exception("Common register in config files contain different values")
+                        else:
                             common_regs.append(register)
-                for register in common_regs:
-                    if register in json_data['data']:
-                        json_data['data'].remove(register)
+                            common_by_name[register['register']] = [register]
+                json_data['data'] = remove_registers(json_data['data'], common_by_name)
 
                 # attach namespace to the registers
                 namespace = config_file['namespace']
@@ -125,6 +142,24 @@ class RegmapCfgMergeFile(object):
         # append the common registers to the end of the file
         self._main_json_data['data'].extend(common_regs)
 
+    def _is_common(self, register_name: str) -> bool:
+        """
+        Check if a register is common to all namespaces. The result is kept for each register name, since the same
+        registers are usually found in the config files of every namespace.
+
+        Args:
+            register_name (str): name of the register
+
+        Raises:
+            Exception: the register is not in the regmap
+        """
+        if register_name not in self._common_names:
+            match = self._index.search(name=register_name, cmap_type=tahini.CmapType.REGISTER, node=self._cmap)
+            if match is None:
+                raise Exception(f"Register {register_name} not found")
+            self._common_names[register_name] = not match.result.namespace
+        return self._common_names[register_name]
+
     @property
     def merged_json(self) -> dict:
         return self._main_json_data
\ No newline at end of file
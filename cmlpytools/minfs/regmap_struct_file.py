@@ -5,24 +5,27 @@ http://gitlab.cm.local/devops/tzatziki/-/blob/master/tzatziki/regmap_out/sslconf
 """
 from builtins import range
 import json
-from typing import List, Any
+from typing import List, Any, Union
 from cmlpytools import tahini
 from .file_types import FileTypes
-from .file_base import FileBase
+from .file_base import FileBase, load_regmap
 
 
 class RegmapStructFile(FileBase):
     """Class used to create and manipulate regmap struct files
     """
 
-    def __init__(self, files: List[str], cmap_file: str, struct_name: str, file_name: str = None):
+    def __init__(self, files: List[str], cmap_file: Union[str, tahini.CmapFullRegmap], struct_name: str,
+                 file_name: str = None, index: tahini.SearchIndex = None):
         """Create a handle that can be used to write a new regmap struct binary file.
 
         Args:
             files (List[str]): a list of paths to configuration files
-            regmap_file (str): specifies the path to the regmap file
+            cmap_file (Union[str, tahini.CmapFullRegmap]): specifies the path to the regmap file, or the regmap
+                already loaded
             struct_name (str): specifies the name of a structure to pack
             file_name (str): specifies the file name
+            index (tahini.SearchIndex, optional): search index of the regmap already loaded
         """
 
         self.file_type = FileTypes.STRUCT_BIN
@@ -39,10 +42,10 @@ class RegmapStructFile(FileBase):
                 init_files.append(json.loads(f_init.read()))
 
         # Parse regmap
-        cmap = tahini.CmapFullRegmap.load_json(cmap_file)
+        cmap, index = load_regmap(cmap_file, index)
 
         # Search for the requested struct
-        struct_match = tahini.search(name=struct_name, cmap_type=tahini.CmapType.STRUCT, node=cmap)
+        struct_match = index.search(name=struct_name, cmap_type=tahini.CmapType.STRUCT, node=cmap)
 
         # If the specified structure is found continue, otherwise an error that the structure
         # doesn't exist will be raised
@@ -54,7 +57,7 @@ class RegmapStructFile(FileBase):
         for config in init_files:
             configs.update(config['Reg'])
 
-        self.data = parse_config(struct_match.result, configs)
+        self.data = parse_config(struct_match.result, configs, index)
 
     @property
     def file_name(self) -> str:
@@ -81,13 +84,15 @@ class RegmapStructFile(FileBase):
         self._data = newdata
 
 
-def parse_config(struct: tahini.CmapRegisterOrStruct, configs: Any) -> bytearray:
+def parse_config(struct: tahini.CmapRegisterOrStruct, configs: Any, index: tahini.SearchIndex = None) -> bytearray:
     """This function parses the config files and packs the data according
     to the descriptions in the regmap file
 
     Args:
         struct (tahini.CmapRegisterOrStruct): Struct containing the registers to be filled
         configs (Any): Json data representing configuration of the registers inside the struct
+        index (tahini.SearchIndex, optional): Search index of the regmap containing the struct. Defaults to a full
+            search.
 
     Raises:
         Exception: Register was not found
@@ -97,8 +102,9 @@ def parse_config(struct: tahini.CmapRegisterOrStruct, configs: Any) -> bytearray
     """
     byte_array = bytearray(struct.size)
     starting_addr = struct.addr
+    search = index.search if index is not None else tahini.search
     for register_name in configs:
-        register_match = tahini.search(name=register_name, cmap_type=tahini.CmapType.REGISTER, node=struct)
+        register_match = search(name=register_name, cmap_type=tahini.CmapType.REGISTER, node=struct)
         if register_match is None:
             raise Exception(f"Register {register_name} not found")
 
@@ -2,9 +2,11 @@
 """
 from __future__ import print_function
 
-from typing import Union, Optional
+from typing import Iterable, Optional, Tuple, Union
 from builtins import bytes, str
+from functools import lru_cache
 import ctypes
+import hashlib
 from os import path
 import platform
 from .file_types import FileTypes
@@ -12,9 +14,10 @@ from .file_types import FileTypes
 # Load dll
 _FOLDER_PATH = path.dirname(path.realpath(__file__))
 
-_DLL = (ctypes.cdll.LoadLibrary(path.join(_FOLDER_PATH, r'lib_win_x64\minfs_win_x64.dll'))
-        if (platform.system() == "Windows") else
-        ctypes.cdll.LoadLibrary(path.join(_FOLDER_PATH, r'lib_linux_x64/minfs_linux_x64.so')))
+_LIBRARY_PATH = (path.join(_FOLDER_PATH, r'lib_win_x64\minfs_win_x64.dll')
+                 if (platform.system() == "Windows") else
+                 path.join(_FOLDER_PATH, r'lib_linux_x64/minfs_linux_x64.so'))
+_DLL = ctypes.cdll.LoadLibrary(_LIBRARY_PATH)
 
 # Error codes imported from minfs-retcodes.h
 MINFS_RET_OK = 0
@@ -29,6 +32,17 @@ MINFS_RET_DATA_FULL = 8
 MINFS_RET_FS_NOT_INIT = 9
 
 
+@lru_cache(maxsize=None)
+def library_digest() -> str:
+    """Get a digest of the minfs library. The library does not report its version, so its content identifies it.
+
+    Returns:
+        str: SHA-256 digest of the library, in hexadecimal
+    """
+    with open(_LIBRARY_PATH, "rb") as library_file:
+        return hashlib.sha256(library_file.read()).hexdigest()
+
+
 class MinFsError(Exception):
     """This class is used to convert error codes returned by the library into python exceptions.
     """
@@ -97,6 +111,93 @@ class MinFsError(Exception):
         return "The MinFS library failed with an unknown error code: " + str(code)
 
 
+def _bind(symbol: str, argtypes: list, restype=ctypes.c_int):
+    """Configure a function of the library. This is done once when the module is loaded, instead of on every call.
+
+    Args:
+        symbol (str): Name of the function in the library
+        argtypes (list): ctypes types of the arguments
+        restype (optional): ctypes type of the returned value. Defaults to ctypes.c_int.
+
+    Returns:
+        Function of the library
+    """
+    function = getattr(_DLL, symbol)
+    function.argtypes = argtypes
+    function.restype = restype
+    return function
+
+
+_CALMAP_WRITER_NEW = _bind("CalmapFileWriter_New", [ctypes.c_ubyte, ctypes.c_ubyte], ctypes.c_void_p)
+_CALMAP_WRITER_FREE = _bind("CalmapFileWriter_Free", [ctypes.c_void_p], None)
+_CALMAP_WRITER_ADD_ENTRY = _bind("CalmapFileWriter_AddEntry",
+                                 [ctypes.c_void_p, ctypes.c_ubyte,
+                                  ctypes.c_ushort, ctypes.c_ushort, ctypes.c_ushort, ctypes.c_ushort])
+_CALMAP_WRITER_GET_FILE = _bind("CalmapFileWriter_GetFile", [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p])
+
+_REGMAP_WRITER_NEW = _bind("RegmapFileWriter_New", [ctypes.c_ubyte, ctypes.c_ushort], ctypes.c_void_p)
+_REGMAP_WRITER_FREE = _bind("RegmapFileWriter_Free", [ctypes.c_void_p], None)
+_REGMAP_WRITER_ADD_ENTRY = _bind("RegmapFileWriter_AddEntry",
+                                 [ctypes.c_void_p, ctypes.c_ushort, ctypes.c_char_p, ctypes.c_ushort])
+_REGMAP_WRITER_SET_FW_VERSION = _bind("RegmapFileWriter_SetFwVersion",
+                                      [ctypes.c_void_p, ctypes.c_uint, ctypes.c_ubyte])
+_REGMAP_WRITER_GET_FILE = _bind("RegmapFileWriter_GetFile", [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p])
+
+_FS_WRITER_NEW = _bind("FileSystemWriter_New", [ctypes.c_ubyte, ctypes.c_ushort], ctypes.c_void_p)
+_FS_WRITER_FREE = _bind("FileSystemWriter_Free", [ctypes.c_void_p], None)
+_FS_WRITER_ADD_FILE = _bind("FileSystemWriter_AddFile",
+                            [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_ushort, ctypes.c_char_p, ctypes.c_ushort,
+                             ctypes.c_uint])
+_FS_WRITER_GET_FS = _bind("FileSystemWriter_GetFS", [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p])
+
+
+# Below this size, copying a buffer into a bytes object is cheaper than sharing its memory with a ctypes array
+_SHARED_BUFFER_MIN_SIZE = 1 << 15
+
+
+def _c_buffer(data) -> Union[bytes, ctypes.Array]:
+    """Get an object that can be passed to the library as a `char *`, without copying large buffers
+
+    Args:
+        data (bytes-like): Data to pass to the library, or an iterable of integers
+
+    Returns:
+        Union[bytes, ctypes.Array]: `data` itself, a ctypes array sharing its memory, or a copy
+    """
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, memoryview) and isinstance(data.obj, ctypes.Array) and \
+            data.nbytes == ctypes.sizeof(data.obj):
+        # Whole buffer returned by get_file() or get_fs()
+        return data.obj
+    if len(data) >= _SHARED_BUFFER_MIN_SIZE:
+        try:
+            return (ctypes.c_char * len(data)).from_buffer(data)
+        except TypeError:
+            # Read-only buffers
+            pass
+    return bytes(data)
+
+
+def _library_buffer(owner: object, location: ctypes.c_void_p, length: int) -> memoryview:
+    """Get a read-only view of a buffer owned by a library handle, without copying it. The view keeps the handle
+    alive, so that the buffer is not freed while it is in use.
+
+    Args:
+        owner (object): Python object that releases the buffer when it is deleted
+        location (ctypes.c_void_p): Address of the buffer
+        length (int): Length of the buffer in bytes
+
+    Returns:
+        memoryview: Read-only view of unsigned bytes
+    """
+    if length == 0 or not location.value:
+        return memoryview(b"")
+    buffer = (ctypes.c_char * length).from_address(location.value)
+    buffer._owner = owner  # pylint: disable=protected-access
+    return memoryview(buffer).cast("B").toreadonly()
+
+
 class CalmapFileWriter():
     """Class used to create and manipulate CalmapFileWriter handles from the library
     """
@@ -108,23 +209,15 @@ class CalmapFileWriter():
             map_version (int): The version of the map file used to generate the file
             max_entries (int): Number of calmap entries to allocate in the index.
         """
-        # Configure dll function
-        c_new_writer = _DLL.CalmapFileWriter_New
-        c_new_writer.argtypes = [ctypes.c_ubyte, ctypes.c_ubyte]
-        c_new_writer.restype = ctypes.c_void_p
-
-        self._hdl = c_new_writer(max_entries, map_version)
-        if self._hdl == 0:
-            raise MinFsError()
+        self._hdl = _CALMAP_WRITER_NEW(max_entries, map_version)
+        if not self._hdl:
+            raise MinFsError("Failed to allocate a CalmapFileWriter handle")
 
     def __del__(self):
         """Release a handle that was previously allocated with `CalmapFileWriter()`
         """
-        if self._hdl != 0:
-            # Configure the external function
-            c_free_writer = _DLL.CalmapFileWriter_Free
-            c_free_writer.argtypes = [ctypes.c_void_p]
-            c_free_writer(self._hdl)
+        if getattr(self, "_hdl", None):
+            _CALMAP_WRITER_FREE(self._hdl)
 
     def add_entry(self, entry_type: int, cal_buffer_offset: int, validity_flag_offset: int,
                   num_bytes: int, regmap_offset: int):
@@ -137,41 +230,47 @@ class CalmapFileWriter():
             cal_buffer_offset (int): Offset of this entry's data in the calibration buffer
             regmap_offset (int): Offset of storage for this entry's data in the regmap (not used for all types)
         """
-        # Configure dll function
-        c_add_entry = _DLL.CalmapFileWriter_AddEntry
-        c_add_entry.argtypes = [ctypes.c_void_p, ctypes.c_ubyte,
-                                ctypes.c_ushort, ctypes.c_ushort, ctypes.c_ushort, ctypes.c_ushort]
-
-        # Add entry
-        ret = c_add_entry(self._hdl, entry_type, cal_buffer_offset, validity_flag_offset, num_bytes, regmap_offset)
+        ret = _CALMAP_WRITER_ADD_ENTRY(self._hdl, entry_type, cal_buffer_offset, validity_flag_offset, num_bytes,
+                                       regmap_offset)
         if ret != MINFS_RET_OK:
             raise MinFsError(ret)
 
-    def get_file(self) -> bytearray:
-        """Get memory location of the buffer where the file is written.
+    def add_entries(self, entries: Iterable[Tuple[int, int, int, int, int]]):
+        """Add several entries to the file.
 
-        Returns:
-            bytearray: A buffer in the requested file
+        Args:
+            entries (Iterable[Tuple[int, int, int, int, int]]): Arguments of `add_entry()` for each entry
         """
-        # Configure dll function
-        c_get_file = _DLL.CalmapFileWriter_GetFile
-        c_get_file.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p]
+        add_entry = _CALMAP_WRITER_ADD_ENTRY
+        hdl = self._hdl
+        for entry in entries:
+            ret = add_entry(hdl, *entry)
+            if ret != MINFS_RET_OK:
+                raise MinFsError(ret)
 
+    def get_file(self) -> memoryview:
+        """Get the buffer where the file is written, without copying it.
+
+        Returns:
+            memoryview: Read-only view of the file, valid as long as the view exists. Use `copy_file()` to get a copy.
+        """
         # Create variables to receive the output of CalmapFileWriter_GetFile()
         file_loc = ctypes.c_void_p()
         file_len = ctypes.c_ushort()
 
         # Call dll function
-        ret = c_get_file(self._hdl, ctypes.byref(file_loc), ctypes.byref(file_len))
+        ret = _CALMAP_WRITER_GET_FILE(self._hdl, ctypes.byref(file_loc), ctypes.byref(file_len))
         if ret != MINFS_RET_OK:
             raise MinFsError(ret)
-        # Create a buffer to receive the content of the file
-        file_buffer = ctypes.c_char * file_len.value
-        buff = file_buffer()
+        return _library_buffer(self, file_loc, file_len.value)
+
+    def copy_file(self) -> bytearray:
+        """Get a copy of the file, independent from the handle.
 
-        # Copy content of the file
-        ctypes.memmove(buff, file_loc, file_len.value)
-        return bytearray(buff)
+        Returns:
+            bytearray: Copy of the file
+        """
+        return bytearray(self.get_file())
 
 
 class RegmapFileWriter():
@@ -185,23 +284,15 @@ class RegmapFileWriter():
             max_entries (int): Number of regmap entries to allocate in the index.
             max_data (int): Number of bytes to allocate for data section.
         """
-        # Configure dll function
-        c_new_writer = _DLL.RegmapFileWriter_New
-        c_new_writer.argtypes = [ctypes.c_ubyte, ctypes.c_ushort]
-        c_new_writer.restype = ctypes.c_void_p
-
-        self._hdl = c_new_writer(max_entries, max_data)
-        if self._hdl == 0:
-            raise MinFsError()
+        self._hdl = _REGMAP_WRITER_NEW(max_entries, max_data)
+        if not self._hdl:
+            raise MinFsError("Failed to allocate a RegmapFileWriter handle")
 
     def __del__(self):
         """Release a handle that was previously allocated with `RegmapFileReader_New()`
         """
-        # Configure the external function
-        c_free_writer = _DLL.RegmapFileWriter_Free
-        c_free_writer.argtypes = [ctypes.c_void_p]
-
-        c_free_writer(self._hdl)
+        if getattr(self, "_hdl", None):
+            _REGMAP_WRITER_FREE(self._hdl)
 
     def add_entry(self, addr, data):
         """Add a new entry to the file.
@@ -210,17 +301,23 @@ class RegmapFileWriter():
             addr (int): Regmap address of the entry.
             data (str): Byte string in the regmap format
         """
-        # Configure dll function
-        c_add_entry = _DLL.RegmapFileWriter_AddEntry
-        c_add_entry.argtypes = [ctypes.c_void_p, ctypes.c_ushort, ctypes.c_char_p, ctypes.c_ushort]
-        # This ensure data is provided as a bytearray
-        data = bytearray(data)
-
-        # Add entry
-        ret = c_add_entry(self._hdl, addr, bytes(data), len(data))
+        ret = _REGMAP_WRITER_ADD_ENTRY(self._hdl, addr, _c_buffer(data), len(data))
         if ret != MINFS_RET_OK:
             raise MinFsError(ret)
 
+    def add_entries(self, entries: Iterable[Tuple[int, bytes]]):
+        """Add several entries to the file. The data is passed to the library without being copied.
+
+        Args:
+            entries (Iterable[Tuple[int, bytes]]): Regmap address and data of each entry
+        """
+        add_entry = _REGMAP_WRITER_ADD_ENTRY
+        hdl = self._hdl
+        for addr, data in entries:
+            ret = add_entry(hdl, addr, _c_buffer(data), len(data))
+            if ret != MINFS_RET_OK:
+                raise MinFsError(ret)
+
     def set_fw_version(self, fw_uid: int, build_id: int):
         """Set Firmware version info for the file to be written.
 
@@ -228,38 +325,34 @@ class RegmapFileWriter():
             fw_uid (int): Unique ID of the Firmware
             build_id (int): ID of the build configuration
         """
-        set_fw_version = _DLL.RegmapFileWriter_SetFwVersion(self._hdl, fw_uid, build_id)
-        set_fw_version.argtypes = [ctypes.c_uint, ctypes.c_ubyte]
-
-        ret = set_fw_version(self._hdl, fw_uid, build_id)
+        ret = _REGMAP_WRITER_SET_FW_VERSION(self._hdl, fw_uid, build_id)
         if ret != MINFS_RET_OK:
             raise MinFsError(ret)
 
-    def get_file(self) -> bytearray:
-        """Get memory location of the buffer where the file is written.
+    def get_file(self) -> memoryview:
+        """Get the buffer where the file is written, without copying it.
 
         Returns:
-            bytearray: Copy of the file
+            memoryview: Read-only view of the file, valid as long as the view exists. Use `copy_file()` to get a copy.
         """
-        # Configure dll function
-        c_get_file = _DLL.RegmapFileWriter_GetFile
-        c_get_file.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p]
-
         # Create variables to receive the output of RegmapFileWriter_GetFile()
         file_loc = ctypes.c_void_p()
-        file_len = ctypes.c_short()
+        file_len = ctypes.c_ushort()
 
         # Call dll function
-        ret = c_get_file(self._hdl, ctypes.byref(
+        ret = _REGMAP_WRITER_GET_FILE(self._hdl, ctypes.byref(
             file_loc), ctypes.byref(file_len))
         if ret != MINFS_RET_OK:
             raise MinFsError(ret)
-        # Create a buffer to receive the content of the file
-        file_buffer = ctypes.c_char * file_len.value
-        buff = file_buffer()
-        # Copy content of the file
-        ctypes.memmove(buff, file_loc, file_len.value)
-        return bytearray(buff)
+        return _library_buffer(self, file_loc, file_len.value)
+
+    def copy_file(self) -> bytearray:
+        """Get a copy of the file, independent from the handle.
+
+        Returns:
+            bytearray: Copy of the file
+        """
+        return bytearray(self.get_file())
 
 
 class FileSystemWriter():
@@ -269,23 +362,15 @@ class FileSystemWriter():
     def __init__(self, max_files: int, max_data: int):
         """Create a handle that can be used to write a new file system.
         """
-        # Configure dll function
-        c_new_writer = _DLL.FileSystemWriter_New
-        c_new_writer.argtypes = [ctypes.c_ubyte, ctypes.c_ushort]
-        c_new_writer.restype = ctypes.c_void_p
-
-        self._hdl = c_new_writer(max_files, max_data)
-        if self._hdl == 0:
-            raise MinFsError()
+        self._hdl = _FS_WRITER_NEW(max_files, max_data)
+        if not self._hdl:
+            raise MinFsError("Failed to allocate a FileSystemWriter handle")
 
     def __del__(self):
         """Release a handle that was previously allocated with `FileSystemWriter_New()`
         """
-        # Configure the external function
-        c_free_writer = _DLL.FileSystemWriter_Free
-        c_free_writer.argtypes = [ctypes.c_void_p]
-
-        c_free_writer(self._hdl)
+        if getattr(self, "_hdl", None):
+            _FS_WRITER_FREE(self._hdl)
 
     def add_file(self, file_name: str, file_type: FileTypes, file: bytes, uid: int):
         """Add a file to the file system
@@ -296,40 +381,49 @@ class FileSystemWriter():
             file (bytes): Content of the file
             uid (int): Unique identifier
         """
-        c_add_file = _DLL.FileSystemWriter_AddFile
-        c_add_file.argtypes = [ctypes.c_void_p, ctypes.c_void_p,
-                               ctypes.c_ushort, ctypes.c_void_p, ctypes.c_ushort]
-
-        # This ensure data is provided as a bytearray
-        file = bytearray(file)
-
-        ret = c_add_file(self._hdl, bytes(file_name, encoding="utf-8"), int(file_type), bytes(file), len(file), uid)
+        ret = _FS_WRITER_ADD_FILE(self._hdl, bytes(file_name, encoding="utf-8"), int(file_type), _c_buffer(file),
+                                  len(file), uid)
 
         if ret != MINFS_RET_OK:
             print(ret)
             raise MinFsError(ret)
 
-    def get_fs(self):
-        """Get memory copy of the buffer where the file system is written.
+    def add_files(self, files: Iterable[Tuple[str, FileTypes, bytes, int]]):
+        """Add several files to the file system. The content of the files is passed to the library without being
+        copied.
 
-        Returns:
-            bytearray: a buffer with a copy of the requested file system
+        Args:
+            files (Iterable[Tuple[str, FileTypes, bytes, int]]): Name, type, content and unique identifier of each
+                file
         """
-        # Configure dll function
-        c_get_fs = _DLL.FileSystemWriter_GetFS
-        c_get_fs.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p]
+        add_file = _FS_WRITER_ADD_FILE
+        hdl = self._hdl
+        for file_name, file_type, file, uid in files:
+            ret = add_file(hdl, bytes(file_name, encoding="utf-8"), int(file_type), _c_buffer(file), len(file), uid)
+            if ret != MINFS_RET_OK:
+                raise MinFsError(ret)
 
+    def get_fs(self) -> memoryview:
+        """Get the buffer where the file system is written, without copying it.
+
+        Returns:
+            memoryview: Read-only view of the file system, valid as long as the view exists. Use `copy_fs()` to get
+                a copy.
+        """
         # Create variables to receive the output of FileSystemWriter_GetFS()
         fs_loc = ctypes.c_void_p()
-        fs_len = ctypes.c_short()
+        fs_len = ctypes.c_ushort()
 
         # Call dll function
-        ret = c_get_fs(self._hdl, ctypes.byref(fs_loc), ctypes.byref(fs_len))
+        ret = _FS_WRITER_GET_FS(self._hdl, ctypes.byref(fs_loc), ctypes.byref(fs_len))
         if ret != MINFS_RET_OK:
             raise MinFsError(ret)
-        # Create a buffer to receive the content of the file system
-        fs_buffer = ctypes.c_char * fs_len.value
-        buff = fs_buffer()
-        # Copy content of the file system
-        ctypes.memmove(buff, fs_loc, fs_len.value)
-        return bytearray(buff)
+        return _library_buffer(self, fs_loc, fs_len.value)
+
+    def copy_fs(self) -> bytearray:
+        """Get a copy of the file system, independent from the handle.
+
+        Returns:
+            bytearray: Copy of the file system
+        """
+        return bytearray(self.get_fs())
@@ -1,26 +1,161 @@
 """
 utilities.py: This module provides the mergebin function, which can be used to merge a firmware
 binary with a parameter file binary (i.e. file system).
+
+The firmware is copied by the kernel where possible (copy_file_range, then sendfile), and the parameter file is mapped
+in memory, so neither is read into Python objects.
 """
+import os
+from typing import BinaryIO, Iterable, Tuple
+from .image_reader import MappedImage
+
+_COPY_CHUNK_SIZE = 1 << 20
+
+
+def _kernel_copy_functions():
+    """List the functions copying bytes between two files in the kernel available on this platform, from the
+    preferred one. Each function takes the source and destination file descriptors and a number of bytes.
+    """
+    functions = []
+    if hasattr(os, "copy_file_range"):
+        functions.append(os.copy_file_range)
+    if hasattr(os, "sendfile"):
+        functions.append(lambda src_fd, dst_fd, count: os.sendfile(dst_fd, src_fd, None, count))
+    return functions
+
+
+def _write_all(dst_fd: int, data) -> None:
+    """Write all the bytes of a buffer to a file descriptor, as a single write may be partial
+    """
+    view = memoryview(data)
+    while view:
+        view = view[os.write(dst_fd, view):]
+
+
+def _copy_bytes(src_file: BinaryIO, dst_file: BinaryIO, count: int) -> int:
+    """Copy bytes from the current position of a file to the current position of another one
+
+    Args:
+        src_file (BinaryIO): Source file, opened unbuffered
+        dst_file (BinaryIO): Destination file, opened unbuffered
+        count (int): Maximum number of bytes to copy
+
+    Returns:
+        int: Number of bytes copied, less than count if the end of the source file is reached
+    """
+    src_fd, dst_fd = src_file.fileno(), dst_file.fileno()
+    copied = 0
+    for copy_function in _kernel_copy_functions():
+        try:
+            while copied < count:
+                length = copy_function(src_fd, dst_fd, count - copied)
+                if length == 0:
+                    return copied
+                copied += length
+            return copied
+        except OSError:
+            # Not supported between these files, e.g. across file systems: try the next function
+            continue
+
+    while copied < count:
+        chunk = os.read(src_fd, min(_COPY_CHUNK_SIZE, count - copied))
+        if not chunk:
+            break
+        _write_all(dst_fd, chunk)
+        copied += len(chunk)
+    return copied
+
+
+def _write_params(output_file: BinaryIO, params_bin: str, load_addr: int) -> None:
+    """Write a parameter file at its load address, and end the output file after it. The output file is padded with
+    zeros up to the load address if it is shorter.
+
+    Args:
+        output_file (BinaryIO): Output file, opened unbuffered
+        params_bin (str): specifies the path to the parameters binary file
+        load_addr (int): the offset of the file system
+    """
+    output_file.truncate(load_addr)
+    output_file.seek(load_addr)
+    with MappedImage(params_bin) as params_image:
+        _write_all(output_file.fileno(), params_image.view)
+    output_file.truncate()
 
 
 def merge_bin(fw_bin: str, params_bin: str, load_addr: int, output: str):
-    """Merge a firmware binary with a parameter file binary
+    """Merge a firmware binary with a parameter file binary. The firmware is truncated, or padded with zeros, up to the
+    load address.
 
     Args:
         fw_bin (str): specifies the path to the firmware binary file
         params_bin (str): specifies the path to the parameters binary file
         load_addr (int): the offset of the file system
         output (str): specifies the path to the output file
+
+    Raises:
+        ValueError: The output file is the parameters binary file
+    """
+    merge_bin_batch(fw_bin, [(params_bin, load_addr, output)])
+
+
+def _same_file(path1: str, path2: str) -> bool:
+    """Check whether two paths are the same existing file
+
+    Args:
+        path1 (str): First path
+        path2 (str): Second path
+
+    Returns:
+        bool: True if both paths exist and are the same file
+    """
+    return os.path.exists(path1) and os.path.exists(path2) and os.path.samefile(path1, path2)
+
+
+def merge_bin_batch(fw_bin: str, variants: Iterable[Tuple[str, int, str]]):
+    """Merge a firmware binary with several parameter file binaries, e.g. one per device variant. The firmware file is
+    opened once. An output that is the firmware file itself is patched in place, once the other variants are merged.
+
+    Args:
+        fw_bin (str): specifies the path to the firmware binary file
+        variants (Iterable[Tuple[str, int, str]]): path to the parameters binary file, offset of the file system and
+            path to the output file of each merged binary
+
+    Raises:
+        ValueError: An output file is the parameters binary file
     """
-    with open(fw_bin, 'rb') as firmware_file:
-        firmware_binary = firmware_file.read()
+    variants = list(variants)
+    for params_bin, _, output in variants:
+        if _same_file(output, params_bin):
+            raise ValueError(f"{os.path.basename(output)} is both a parameters binary and the output")
+
+    in_place = []
+    with open(fw_bin, 'rb', buffering=0) as firmware_file:
+        for params_bin, load_addr, output in variants:
+            if _same_file(output, fw_bin):
+                in_place.append((params_bin, load_addr, output))
+                continue
+            firmware_file.seek(0)
+            with open(output, 'wb+', buffering=0) as output_file:
+                _copy_bytes(firmware_file, output_file, load_addr)
+                _write_params(output_file, params_bin, load_addr)
+
+    for params_bin, load_addr, output in in_place:
+        patch_bin(params_bin, load_addr, output)
+
 
-    with open(params_bin, 'rb') as params_file:
-        params_binary = params_file.read()
+def patch_bin(params_bin: str, load_addr: int, output: str):
+    """Replace the parameter file of a merged binary in place, without writing the firmware part again. The result is
+    the same as merging the parameter file with the original firmware.
 
-    with open(output, 'wb+') as output_file:
-        output_file.write(firmware_binary)
-        output_file.truncate(load_addr)
-        output_file.seek(load_addr)
-        output_file.write(params_binary)
+    Args:
+        params_bin (str): specifies the path to the parameters binary file
+        load_addr (int): the offset of the file system
+        output (str): specifies the path to the merged binary to patch
+
+    Raises:
+        ValueError: The merged binary is the parameters binary file
+    """
+    if _same_file(output, params_bin):
+        raise ValueError(f"{os.path.basename(output)} is both a parameters binary and the output")
+    with open(output, 'r+b', buffering=0) as output_file:
+        _write_params(output_file, params_bin, load_addr)
@@ -17,6 +17,8 @@ from .input_json_schema import InputEnum, InputRegmap, InputJson
 from .input_json_schema import InputType
 from .input_json_schema import InputJsonParserError
 from .tahini_cmap import TahiniCmap
-from .search import search
+from .search import search, SearchIndex
+from .cmap_loader import load_indexed_cmap
 from .legacy_json_converter import legacy_json_to_input_regmap
 from .legacy_json_to_header import legacy_json_to_c_header
+from .tahini_transform import TahiniTransform
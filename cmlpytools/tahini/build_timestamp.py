@@ -0,0 +1,86 @@
+"""
+Date and time embedded in the generated files. Setting the SOURCE_DATE_EPOCH environment variable (see
+https://reproducible-builds.org/specs/source-date-epoch/) makes the outputs reproducible: byte-identical inputs then
+produce byte-identical outputs.
+"""
+import datetime
+import os
+
+SOURCE_DATE_EPOCH = "SOURCE_DATE_EPOCH"
+
+
+class InvalidTimestampError(Exception):
+    """Class used to handle invalid SOURCE_DATE_EPOCH values or --timestamp arguments
+    """
+    pass
+
+
+def _source_date_epoch() -> datetime.datetime:
+    """Get the date and time set by SOURCE_DATE_EPOCH
+
+    Raises:
+        InvalidTimestampError: SOURCE_DATE_EPOCH is not a number of seconds
+
+    Returns:
+        datetime.datetime: UTC date and time
+    """
+    value = os.environ[SOURCE_DATE_EPOCH]
+    try:
+        return datetime.datetime.fromtimestamp(int(value), tz=datetime.timezone.utc)
+    except (ValueError, OverflowError, OSError) as exc:
+        raise InvalidTimestampError(f"Invalid {SOURCE_DATE_EPOCH} value: '{value}'") from exc
+
+
+def is_reproducible() -> bool:
+    """Check if the generated files must be reproducible
+
+    Returns:
+        bool: True if SOURCE_DATE_EPOCH is set
+    """
+    return bool(os.environ.get(SOURCE_DATE_EPOCH))
+
+
+def build_datetime() -> datetime.datetime:
+    """Get the date and time to embed in the generated files
+
+    Returns:
+        datetime.datetime: UTC date and time from SOURCE_DATE_EPOCH, or the current time
+    """
+    if is_reproducible():
+        return _source_date_epoch()
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def build_date() -> datetime.date:
+    """Get the date to embed in the generated files (e.g. for the copyright year)
+
+    Returns:
+        datetime.date: UTC date from SOURCE_DATE_EPOCH, or the current local date
+    """
+    if is_reproducible():
+        return _source_date_epoch().date()
+    return datetime.date.today()
+
+
+def set_source_date_epoch(timestamp: str) -> None:
+    """Set SOURCE_DATE_EPOCH from a command line argument. It is set in the environment so that the worker
+    processes of the batch commands use it too.
+
+    Args:
+        timestamp (str): Number of seconds since 1970-01-01 UTC, or ISO 8601 date and time,
+            e.g. "2024-03-01T12:00:00+00:00" (UTC if no timezone is given)
+
+    Raises:
+        InvalidTimestampError: The timestamp cannot be parsed
+    """
+    if timestamp.isdigit():
+        os.environ[SOURCE_DATE_EPOCH] = timestamp
+        return
+
+    try:
+        date_time = datetime.datetime.fromisoformat(timestamp)
+    except ValueError as exc:
+        raise InvalidTimestampError(f"Invalid timestamp: '{timestamp}'") from exc
+    if date_time.tzinfo is None:
+        date_time = date_time.replace(tzinfo=datetime.timezone.utc)
+    os.environ[SOURCE_DATE_EPOCH] = str(int(date_time.timestamp()))
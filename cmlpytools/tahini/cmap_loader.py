@@ -0,0 +1,41 @@
+"""
+Load cmapsource files once per process: the regmap and its search index are kept in memory, and reused as long as
+the file is not modified.
+"""
+import os
+from typing import Dict, Tuple
+from .cmap_schema import FullRegmap
+from .search import SearchIndex
+
+# Real path of the file -> ((modification time, size), regmap, index)
+_CMAP_CACHE: Dict[str, Tuple[Tuple[int, int], FullRegmap, SearchIndex]] = {}
+
+
+def load_indexed_cmap(json_path: str) -> Tuple[FullRegmap, SearchIndex]:
+    """Load a cmapsource file and index it, or get it from the cache if the file has not changed since it was
+    loaded. The returned regmap is shared, it must not be modified.
+
+    Args:
+        json_path (str): Path to the cmapsource file
+
+    Returns:
+        Tuple[FullRegmap, SearchIndex]: Regmap and its search index
+    """
+    real_path = os.path.realpath(json_path)
+    stat = os.stat(real_path)
+    file_version = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _CMAP_CACHE.get(real_path)
+    if cached is not None and cached[0] == file_version:
+        return cached[1], cached[2]
+
+    cmap = FullRegmap.load_json(real_path)
+    index = SearchIndex(cmap)
+    _CMAP_CACHE[real_path] = (file_version, cmap, index)
+    return cmap, index
+
+
+def clear_cmap_cache() -> None:
+    """Forget all the cmapsource files loaded so far
+    """
+    _CMAP_CACHE.clear()
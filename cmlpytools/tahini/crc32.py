@@ -0,0 +1,232 @@
+"""
+CRC32 used to stamp the Griffin firmware images: reflected polynomial 0x1C9D204F5, initial value and final xor
+0xFFFFFFFF. The CRC is computed with precomputed slicing-by-8 tables, so that no C extension is needed. When crcmod
+is installed with its C extension, it is used to process the data faster.
+"""
+from typing import List
+import struct
+import crcmod
+
+CRC32_POLYNOMIAL = 0x1C9D204F5
+CRC32_INIT = 0xFFFFFFFF
+CRC32_XOR_OUT = 0xFFFFFFFF
+
+# The polynomial without its x^32 term, bit-reversed for the reflected algorithm
+_REFLECTED_POLYNOMIAL = int(f"{CRC32_POLYNOMIAL & 0xFFFFFFFF:032b}"[::-1], 2)
+
+
+def _make_tables() -> List[List[int]]:
+    """Build the slicing-by-8 tables. Table 0 is the usual byte-wise table, table k gives the CRC of a byte followed
+    by k zero bytes.
+
+    Returns:
+        List[List[int]]: 8 tables of 256 entries
+    """
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ _REFLECTED_POLYNOMIAL if crc & 1 else crc >> 1
+        table.append(crc)
+
+    tables = [table]
+    for _ in range(7):
+        previous = tables[-1]
+        tables.append([(crc >> 8) ^ table[crc & 0xFF] for crc in previous])
+    return tables
+
+
+_TABLES = _make_tables()
+
+# crcmod only processes the data in C when its extension is available, its pure Python version is slower than ours.
+# With xorOut=0, crcmod takes and returns the raw shift register, like crc32_update().
+try:
+    import crcmod._crcfunext  # pylint: disable=unused-import
+    _CRCMOD_UPDATE = crcmod.mkCrcFun(CRC32_POLYNOMIAL, initCrc=CRC32_INIT, rev=True, xorOut=0)
+except ImportError:
+    _CRCMOD_UPDATE = None
+
+
+def _crc32_update_tables(crc: int, data: memoryview) -> int:
+    """Update the CRC shift register with the slicing-by-8 tables
+
+    Args:
+        crc (int): Shift register
+        data (memoryview): Data to process, as unsigned bytes
+
+    Returns:
+        int: Updated shift register
+    """
+    table0, table1, table2, table3, table4, table5, table6, table7 = (_TABLES[0], _TABLES[1], _TABLES[2], _TABLES[3],
+                                                                      _TABLES[4], _TABLES[5], _TABLES[6], _TABLES[7])
+    words_length = len(data) & ~7
+    for low, high in struct.iter_unpack("<II", data[:words_length]):
+        low ^= crc
+        crc = table7[low & 0xFF] ^ table6[(low >> 8) & 0xFF] ^ table5[(low >> 16) & 0xFF] ^ table4[low >> 24] ^ \
+            table3[high & 0xFF] ^ table2[(high >> 8) & 0xFF] ^ table1[(high >> 16) & 0xFF] ^ table0[high >> 24]
+    for byte in data[words_length:]:
+        crc = (crc >> 8) ^ table0[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def crc32_update(crc: int, data) -> int:
+    """Update the CRC shift register with some data. Start with CRC32_INIT, and xor the final register with
+    CRC32_XOR_OUT to get the CRC.
+
+    Args:
+        crc (int): Shift register
+        data (bytes): Data to process, or any other bytes-like object
+
+    Returns:
+        int: Updated shift register
+    """
+    if _CRCMOD_UPDATE is not None:
+        return _CRCMOD_UPDATE(data, crc)
+    return _crc32_update_tables(crc, memoryview(data).cast("B"))
+
+
+def crc32(data) -> int:
+    """Compute the CRC of some data
+
+    Args:
+        data (bytes): Data to process, or any other bytes-like object
+
+    Returns:
+        int: CRC32
+    """
+    return crc32_update(CRC32_INIT, data) ^ CRC32_XOR_OUT
+
+
+def _multmodp(poly1: int, poly2: int) -> int:
+    """Multiply two polynomials modulo the CRC polynomial, in the reflected bit order (x^0 is the MSB)
+
+    Args:
+        poly1 (int): First polynomial
+        poly2 (int): Second polynomial
+
+    Returns:
+        int: poly1 * poly2 modulo the CRC polynomial
+    """
+    mask = 1 << 31
+    product = 0
+    while poly1:
+        if poly1 & mask:
+            product ^= poly2
+            poly1 ^= mask
+        mask >>= 1
+        poly2 = (poly2 >> 1) ^ _REFLECTED_POLYNOMIAL if poly2 & 1 else poly2 >> 1
+    return product
+
+
+def _make_x2n_table() -> List[int]:
+    """Build the table of x^(2^n) modulo the CRC polynomial, n = 0..31
+
+    Returns:
+        List[int]: 32 polynomials
+    """
+    table = [1 << 30]  # x^1
+    for _ in range(31):
+        table.append(_multmodp(table[-1], table[-1]))
+    return table
+
+
+_X2N_TABLE = _make_x2n_table()
+
+
+def _x8nmodp(length: int) -> int:
+    """Compute x^(8 * length) modulo the CRC polynomial, in O(log(length)) multiplications
+
+    Args:
+        length (int): Number of bytes
+
+    Returns:
+        int: Polynomial that shifts a CRC register through `length` zero bytes
+    """
+    product = 1 << 31  # x^0
+    k = 3
+    while length:
+        if length & 1:
+            product = _multmodp(_X2N_TABLE[k & 31], product)
+        length >>= 1
+        k += 1
+    return product
+
+
+def crc32_shift(register: int, length: int) -> int:
+    """Feed `length` zero bytes to a CRC shift register without an initial value or final xor
+
+    Args:
+        register (int): Shift register
+        length (int): Number of zero bytes
+
+    Returns:
+        int: Updated shift register
+    """
+    return _multmodp(_x8nmodp(length), register)
+
+
+def crc32_combine(crc1: int, crc2: int, length2: int) -> int:
+    """Compute the CRC of the concatenation of two blocks of data from their CRCs
+
+    Args:
+        crc1 (int): CRC32 of the first block
+        crc2 (int): CRC32 of the second block
+        length2 (int): Length of the second block in bytes
+
+    Returns:
+        int: CRC32 of the first block followed by the second block
+    """
+    return crc32_shift(crc1, length2) ^ crc2
+
+
+def crc32_patch(crc: int, length: int, offset: int, old_data, new_data) -> int:
+    """Compute the CRC of some data after replacing some of its bytes, without reading the rest of the data. The CRC
+    is affine: the change of CRC only depends on the xor of the old and new bytes, shifted through the bytes that
+    follow them. The cost is proportional to the patch size plus log(length).
+
+    Args:
+        crc (int): CRC32 of the original data
+        length (int): Length of the data in bytes
+        offset (int): Offset of the patched bytes
+        old_data (bytes): Original bytes at offset, or any other bytes-like object
+        new_data (bytes): New bytes at offset, of the same length
+
+    Raises:
+        ValueError: The patch does not fit in the data, or the old and new bytes have different lengths
+
+    Returns:
+        int: CRC32 of the patched data
+    """
+    if len(old_data) != len(new_data):
+        raise ValueError("The old and new bytes of a CRC patch must have the same length")
+    if offset < 0 or offset + len(new_data) > length:
+        raise ValueError(f"CRC patch at offset {offset} of {len(new_data)} bytes is outside {length} bytes of data")
+
+    difference = (int.from_bytes(old_data, "little") ^ int.from_bytes(new_data, "little")).to_bytes(
+        len(new_data), "little")
+    register = crc32_update(0, difference)
+    return crc ^ crc32_shift(register, length - offset - len(new_data))
+
+
+class Crc32():
+    """Incremental CRC32 computation, for data processed in chunks
+    """
+
+    def __init__(self):
+        self._register = CRC32_INIT
+        self.length = 0
+
+    def update(self, data) -> None:
+        """Add some data to the CRC
+
+        Args:
+            data (bytes): Data to process, or any other bytes-like object
+        """
+        self._register = crc32_update(self._register, data)
+        self.length += len(data)
+
+    @property
+    def value(self) -> int:
+        """CRC32 of all the data processed so far
+        """
+        return self._register ^ CRC32_XOR_OUT
@@ -0,0 +1,146 @@
+"""Stamp the size and CRC of many Griffin binary images in parallel, listed in a manifest
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import json
+import os
+import stat
+import tempfile
+from typing import List, Optional, Tuple
+from .tahini_crc import TahiniCrc
+
+
+class InvalidCrcManifestError(Exception):
+    """Class used to handle invalid `tahini crc --batch` manifests
+    """
+    pass
+
+
+@dataclass
+class CrcResult:
+    """Image stamped by `tahini crc --batch`
+    """
+    input_path: str
+    output_path: str
+    size: int
+    crc: int
+
+
+def load_crc_manifest(manifest_path: str) -> List[Tuple[str, str]]:
+    """Load the list of images to stamp from a json file, e.g.
+    [{"input": "build/fw_cm824.bin", "output": "release/fw_cm824.bin"}, ...]
+
+    Relative paths are relative to the directory of the manifest.
+
+    Args:
+        manifest_path (str): Path to the json file
+
+    Raises:
+        InvalidCrcManifestError: The manifest is missing or is not a list of images, an image is missing a field, or
+            its input file does not exist
+
+    Returns:
+        List[Tuple[str, str]]: Input and output paths of the images
+    """
+    try:
+        with open(manifest_path, "r", encoding="UTF-8") as manifest_file:
+            manifest_data = json.load(manifest_file)
+    except FileNotFoundError as exc:
+        raise InvalidCrcManifestError(f"Manifest not found: {manifest_path}") from exc
+    except json.JSONDecodeError as exc:
+        raise InvalidCrcManifestError(f"Invalid json in the manifest: {exc}") from exc
+    if not isinstance(manifest_data, list):
+        raise InvalidCrcManifestError("The manifest is not a list of images")
+
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+    images = []
+    for image_data in manifest_data:
+        try:
+            images.append((os.path.join(manifest_dir, image_data["input"]),
+                           os.path.join(manifest_dir, image_data["output"])))
+        except (KeyError, TypeError) as exc:
+            raise InvalidCrcManifestError(f"Missing field {exc} in image {image_data}") from exc
+        if not os.path.isfile(images[-1][0]):
+            raise InvalidCrcManifestError(f"Input file not found: {images[-1][0]}")
+    return images
+
+
+def _output_mode(output_path: str) -> int:
+    """Permissions of an output file: those of the file it replaces, or the default ones of a new file, which
+    mkstemp does not use
+
+    Args:
+        output_path (str): Path to the output file
+
+    Returns:
+        int: Permission bits
+    """
+    try:
+        return stat.S_IMODE(os.stat(output_path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _stamp_image(job: Tuple[str, str]) -> CrcResult:
+    """Stamp a single image. The output is written to a temporary file that replaces the output file once complete,
+    so that an interrupted batch never leaves a truncated image. This function runs in the worker processes.
+
+    Args:
+        job (Tuple[str, str]): Input and output paths of the image
+
+    Returns:
+        CrcResult: Stamped image
+    """
+    input_path, output_path = job
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+
+    file_descriptor, temp_path = tempfile.mkstemp(dir=output_dir, prefix=f".{os.path.basename(output_path)}.",
+                                                  suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "wb") as output:
+            crc = TahiniCrc.stamp(input_path, output, quiet=True)
+        os.chmod(temp_path, _output_mode(output_path))
+        os.replace(temp_path, output_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    return CrcResult(input_path=input_path, output_path=output_path, size=os.path.getsize(input_path), crc=crc)
+
+
+def crc_batch_stamp(images: List[Tuple[str, str]], jobs: Optional[int] = None) -> List[CrcResult]:
+    """Stamp several images using a pool of processes. The CRC tables are built once per process, when the module is
+    imported.
+
+    Args:
+        images (List[Tuple[str, str]]): Input and output paths of the images
+        jobs (Optional[int], optional): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        List[CrcResult]: Stamped images, in the order of the manifest
+    """
+    if jobs == 1 or len(images) <= 1:
+        return [_stamp_image(job) for job in images]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(_stamp_image, images))
+
+
+def format_crc_summary(results: List[CrcResult]) -> str:
+    """Format the size and CRC of the stamped images as a table
+
+    Args:
+        results (List[CrcResult]): Stamped images
+
+    Returns:
+        str: Summary table
+    """
+    # The size is the one stamped in the image, i.e. the size of the input, without the CRC
+    lines = [f"{'Input size':>12}  {'CRC':<10}  Output"]
+    for result in results:
+        lines.append(f"{result.size:>12}  0x{result.crc:08x}  {result.output_path}")
+    lines.append(f"{len(results)} image(s) stamped")
+    return "\n".join(lines)
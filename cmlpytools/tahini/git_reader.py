@@ -0,0 +1,898 @@
+"""
+Read version information (HEAD sha, remote url, last tag) straight from the .git directory of a repository, without
+spawning git. Anything that is not supported raises GitReaderError internally, and `GitReader.run_command()` then
+returns None so that the caller falls back to the git command line.
+"""
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import glob
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import zlib
+
+# Environment variables changing how git finds or reads a repository, GitReader does not try to emulate them
+_UNSUPPORTED_ENVIRONMENT = ("GIT_DIR", "GIT_WORK_TREE", "GIT_COMMON_DIR", "GIT_OBJECT_DIRECTORY",
+                            "GIT_ALTERNATE_OBJECT_DIRECTORIES", "GIT_CONFIG", "GIT_NAMESPACE", "GIT_REPLACE_REF_BASE",
+                            "GIT_NO_REPLACE_OBJECTS", "GIT_CEILING_DIRECTORIES", "GIT_DEFAULT_HASH")
+# Environment variables changing which config files are read, which GitReader honours like git
+_SUPPORTED_ENVIRONMENT = ("GIT_CONFIG_NOSYSTEM", "GIT_CONFIG_SYSTEM", "GIT_CONFIG_GLOBAL")
+
+# Directories of the git executable in a Git for Windows installation, relative to the installation directory
+_WINDOWS_GIT_DIRECTORIES = ("cmd", "bin", os.path.join("mingw64", "bin"), os.path.join("mingw32", "bin"),
+                            os.path.join("clangarm64", "bin"))
+
+# Files of the common git directory that change the commit graph, or where the objects are stored
+_UNSUPPORTED_FILES = ("shallow", "info/grafts", "objects/info/alternates", "objects/info/http-alternates")
+
+_SHA_REGEX = re.compile(r"^[0-9a-f]{40}$")
+_CONFIG_SECTION_REGEX = re.compile(r'^\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\](.*)$')
+
+_PACK_OBJECT_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+_PACK_OFS_DELTA = 6
+_PACK_REF_DELTA = 7
+_PACK_INDEX_HEADER = b"\377tOc" + struct.pack(">I", 2)
+
+# Length of the abbreviated sha used by git for small repositories
+_FALLBACK_DEFAULT_ABBREV = 7
+
+# Priority of the tags in `git describe`: annotated tags are preferred to lightweight tags
+_LIGHTWEIGHT_TAG = 1
+_ANNOTATED_TAG = 2
+
+
+class GitReaderError(Exception):
+    """Class used to handle the repositories or objects that GitReader cannot read
+    """
+    pass
+
+
+def _parse_config_value(raw_value: str) -> str:
+    """Parse the value of a git config entry: quotes, escape sequences and comments
+
+    Args:
+        raw_value (str): Text after the '=' sign
+
+    Raises:
+        GitReaderError: The value is continued on the next line, or has an invalid escape sequence
+
+    Returns:
+        str: Value of the entry
+    """
+    escapes = {"n": "\n", "t": "\t", "b": "\b", "\\": "\\", "\"": "\""}
+    value = []
+    # Number of characters that must be kept when removing the trailing spaces (quoted or escaped characters)
+    kept_length = 0
+    in_quotes = False
+    characters = iter(raw_value.strip())
+    for character in characters:
+        if character == "\\":
+            escaped = next(characters, None)
+            if escaped not in escapes:
+                raise GitReaderError("Unsupported escape sequence in git config")
+            value.append(escapes[escaped])
+            kept_length = len(value)
+        elif character == "\"":
+            in_quotes = not in_quotes
+            kept_length = len(value)
+        elif character in "#;" and not in_quotes:
+            break
+        else:
+            value.append(character)
+            if in_quotes:
+                kept_length = len(value)
+
+    while len(value) > kept_length and value[-1] in " \t":
+        value.pop()
+    return "".join(value)
+
+
+def _environment_bool(name: str) -> bool:
+    """Read a boolean environment variable, as git does
+
+    Args:
+        name (str): Name of the variable
+
+    Raises:
+        GitReaderError: The value is not a boolean
+
+    Returns:
+        bool: Value of the variable, False if it is not set
+    """
+    value = os.environ.get(name, "").strip().lower()
+    if value in {"", "false", "no", "off"}:
+        return False
+    if value in {"true", "yes", "on"}:
+        return True
+    try:
+        return int(value, 0) != 0
+    except ValueError as error:
+        raise GitReaderError(f"Invalid boolean in {name}") from error
+
+
+def _system_config_paths() -> List[str]:
+    """Find the system git config, which is relative to the installation directory of git
+
+    Raises:
+        GitReaderError: The system config of the installed git cannot be located
+
+    Returns:
+        List[str]: Path to the system config, or no path if it is disabled
+    """
+    if _environment_bool("GIT_CONFIG_NOSYSTEM"):
+        return []
+    if "GIT_CONFIG_SYSTEM" in os.environ:
+        return [os.environ["GIT_CONFIG_SYSTEM"]]
+
+    git_path = shutil.which("git")
+    if git_path is None:
+        raise GitReaderError("git is not installed")
+    git_directory = os.path.dirname(os.path.realpath(git_path))
+    if os.name == "nt":
+        # Git for Windows reads %PROGRAMDATA%/Git/config, then <installation directory>/etc/gitconfig
+        for directory in _WINDOWS_GIT_DIRECTORIES:
+            if os.path.normcase(git_directory).endswith(os.sep + os.path.normcase(directory)):
+                config_path = os.path.join(git_directory[:-len(directory)], "etc", "gitconfig")
+                if os.path.isfile(config_path):
+                    program_data = os.environ.get("PROGRAMDATA")
+                    return ([os.path.join(program_data, "Git", "config")] if program_data else []) + [config_path]
+    elif sys.platform != "darwin" and git_directory in {"/usr/bin", "/bin"}:
+        # git installed by the distribution
+        return [os.path.join("/", "etc", "gitconfig")]
+    raise GitReaderError("Unknown location of the system git config")
+
+
+def _parse_config(text: str) -> Dict[str, List[str]]:
+    """Parse a git config file
+
+    Args:
+        text (str): Content of the config file
+
+    Raises:
+        GitReaderError: The file cannot be parsed
+
+    Returns:
+        Dict[str, List[str]]: Values of each entry, by name like "remote.origin.url". Section and key names are
+            lower case, subsection names are case sensitive.
+    """
+    values: Dict[str, List[str]] = {}
+    section = None
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("["):
+            match = _CONFIG_SECTION_REGEX.match(line)
+            if match is None:
+                raise GitReaderError(f"Invalid git config section: '{line}'")
+            section = match.group(1).lower()
+            if match.group(2) is not None:
+                section += "." + re.sub(r"\\(.)", r"\1", match.group(2))
+            line = match.group(3).strip()
+
+        if not line or line[0] in "#;":
+            continue
+        if section is None:
+            raise GitReaderError("git config entry outside of a section")
+
+        key, separator, raw_value = line.partition("=")
+        value = _parse_config_value(raw_value) if separator else "true"
+        values.setdefault(section + "." + key.strip().lower(), []).append(value)
+
+    return values
+
+
+def _common_hex_prefix(sha: str, other_sha: str) -> int:
+    """Get the number of leading hex characters shared by two sha
+
+    Args:
+        sha (str): First sha
+        other_sha (str): Second sha
+
+    Returns:
+        int: Length of the common prefix
+    """
+    length = 0
+    for character, other_character in zip(sha, other_sha):
+        if character != other_character:
+            break
+        length += 1
+    return length
+
+
+def _delta_header_size(delta: bytes, position: int) -> Tuple[int, int]:
+    """Read a size from the header of a delta
+
+    Args:
+        delta (bytes): Delta data
+        position (int): Position of the size in the delta
+
+    Returns:
+        Tuple[int, int]: Size, and position following the size
+    """
+    size = 0
+    shift = 0
+    while True:
+        byte = delta[position]
+        position += 1
+        size |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return size, position
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Rebuild an object from its base and a pack delta
+
+    Args:
+        base (bytes): Data of the base object
+        delta (bytes): Delta data
+
+    Raises:
+        GitReaderError: The delta is corrupted
+
+    Returns:
+        bytes: Data of the object
+    """
+    base_size, position = _delta_header_size(delta, 0)
+    result_size, position = _delta_header_size(delta, position)
+    if base_size != len(base):
+        raise GitReaderError("Delta base size mismatch")
+
+    result = bytearray()
+    while position < len(delta):
+        opcode = delta[position]
+        position += 1
+        if opcode & 0x80:
+            # Copy from the base object: offset and size are only stored for their non-zero bytes
+            copy_offset = 0
+            for byte_index in range(4):
+                if opcode & (1 << byte_index):
+                    copy_offset |= delta[position] << (8 * byte_index)
+                    position += 1
+            copy_size = 0
+            for byte_index in range(3):
+                if opcode & (0x10 << byte_index):
+                    copy_size |= delta[position] << (8 * byte_index)
+                    position += 1
+            result += base[copy_offset:copy_offset + (copy_size or 0x10000)]
+        elif opcode:
+            # Insert data from the delta
+            result += delta[position:position + opcode]
+            position += opcode
+        else:
+            raise GitReaderError("Invalid delta opcode")
+
+    if len(result) != result_size:
+        raise GitReaderError("Delta result size mismatch")
+    return bytes(result)
+
+
+class _PackFile:
+    """A pack file and its version 2 index
+    """
+
+    def __init__(self, index_path: str):
+        """Open a pack file
+
+        Args:
+            index_path (str): Path to the .idx file, the .pack file is next to it
+        """
+        with open(index_path, "rb") as index_file:
+            self._index = index_file.read()
+        if self._index[:8] != _PACK_INDEX_HEADER:
+            raise GitReaderError(f"Unsupported pack index version: {index_path}")
+
+        self._fanout = struct.unpack_from(">256I", self._index, 8)
+        self.count = self._fanout[255]
+        self._sha_start = 8 + 256 * 4
+        self._offset_start = self._sha_start + 24 * self.count
+        self._large_offset_start = self._offset_start + 4 * self.count
+
+        with open(index_path[:-len(".idx")] + ".pack", "rb") as pack_file:
+            self._pack = mmap.mmap(pack_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        """Unmap the pack file
+        """
+        self._pack.close()
+
+    def _sha(self, position: int) -> bytes:
+        """Get the sha of an object of the index
+
+        Args:
+            position (int): Position of the object in the index
+
+        Returns:
+            bytes: Binary sha
+        """
+        start = self._sha_start + 20 * position
+        return self._index[start:start + 20]
+
+    def _search(self, binsha: bytes) -> Tuple[int, bool]:
+        """Binary search of an object in the index
+
+        Args:
+            binsha (bytes): Binary sha of the object
+
+        Returns:
+            Tuple[int, bool]: Position of the object, or where it would be inserted, and whether it was found
+        """
+        low = self._fanout[binsha[0] - 1] if binsha[0] else 0
+        high = self._fanout[binsha[0]]
+        while low < high:
+            middle = (low + high) // 2
+            middle_sha = self._sha(middle)
+            if middle_sha == binsha:
+                return middle, True
+            if middle_sha < binsha:
+                low = middle + 1
+            else:
+                high = middle
+        return low, False
+
+    def find_offset(self, binsha: bytes) -> Optional[int]:
+        """Find an object in the pack
+
+        Args:
+            binsha (bytes): Binary sha of the object
+
+        Returns:
+            Optional[int]: Offset of the object in the pack file, or None if it is not in this pack
+        """
+        position, found = self._search(binsha)
+        if not found:
+            return None
+        offset, = struct.unpack_from(">I", self._index, self._offset_start + 4 * position)
+        if offset & 0x80000000:
+            offset, = struct.unpack_from(">Q", self._index, self._large_offset_start + 8 * (offset & 0x7fffffff))
+        return offset
+
+    def neighbours(self, binsha: bytes) -> Iterator[bytes]:
+        """Get the objects of the pack sorted right before and after a sha, other than the sha itself
+
+        Args:
+            binsha (bytes): Binary sha
+
+        Yields:
+            Iterator[bytes]: Binary sha of the neighbours
+        """
+        position, found = self._search(binsha)
+        if position > 0:
+            yield self._sha(position - 1)
+        next_position = position + 1 if found else position
+        if next_position < self.count:
+            yield self._sha(next_position)
+
+    def _inflate(self, position: int, size: int) -> bytes:
+        """Decompress the data of a pack entry
+
+        Args:
+            position (int): Position of the compressed data in the pack file
+            size (int): Size of the decompressed data
+
+        Returns:
+            bytes: Decompressed data
+        """
+        decompressor = zlib.decompressobj()
+        chunks = []
+        while not decompressor.eof:
+            compressed = self._pack[position:position + 65536]
+            if not compressed:
+                raise GitReaderError("Truncated pack file")
+            chunks.append(decompressor.decompress(compressed))
+            position += len(compressed)
+        data = b"".join(chunks)
+        if len(data) != size:
+            raise GitReaderError("Pack entry size mismatch")
+        return data
+
+    def read(self, offset: int, read_object: Callable[[bytes], Tuple[str, bytes]]) -> Tuple[str, bytes]:
+        """Read an object from the pack, applying the deltas
+
+        Args:
+            offset (int): Offset of the object in the pack file
+            read_object (Callable[[bytes], Tuple[str, bytes]]): Function reading a delta base which is not in
+                this pack, from its binary sha
+
+        Returns:
+            Tuple[str, bytes]: Type and data of the object
+        """
+        deltas = []
+        while True:
+            byte = self._pack[offset]
+            position = offset + 1
+            entry_type = (byte >> 4) & 7
+            size = byte & 0x0f
+            shift = 4
+            while byte & 0x80:
+                byte = self._pack[position]
+                position += 1
+                size |= (byte & 0x7f) << shift
+                shift += 7
+
+            if entry_type == _PACK_OFS_DELTA:
+                byte = self._pack[position]
+                position += 1
+                base_distance = byte & 0x7f
+                while byte & 0x80:
+                    byte = self._pack[position]
+                    position += 1
+                    base_distance = ((base_distance + 1) << 7) | (byte & 0x7f)
+                deltas.append(self._inflate(position, size))
+                offset -= base_distance
+            elif entry_type == _PACK_REF_DELTA:
+                base_binsha = self._pack[position:position + 20]
+                deltas.append(self._inflate(position + 20, size))
+                base_offset = self.find_offset(base_binsha)
+                if base_offset is None:
+                    object_type, data = read_object(base_binsha)
+                    break
+                offset = base_offset
+            elif entry_type in _PACK_OBJECT_TYPES:
+                object_type = _PACK_OBJECT_TYPES[entry_type]
+                data = self._inflate(position, size)
+                break
+            else:
+                raise GitReaderError(f"Invalid pack entry type {entry_type}")
+
+        for delta in reversed(deltas):
+            data = _apply_delta(data, delta)
+        return object_type, data
+
+
+class GitReader:
+    """Answer a few git commands used to generate the version information by reading the .git directory.
+
+    Supported commands are listed in `COMMANDS`; they give the same output as the git command line.
+    """
+
+    COMMANDS = {
+        "git rev-parse HEAD": "_rev_parse_head",
+        "git remote get-url origin": "_remote_get_url",
+        "git describe --tags --first-parent --always --abbrev=0": "_describe_abbrev_0",
+        "git describe --tags --first-parent --always --long": "_describe_long",
+    }
+
+    def __init__(self, project_path: str):
+        """Create a reader for the repository containing a directory. Nothing is read until a command is run.
+
+        Args:
+            project_path (str): Path to the repository, or to any directory inside it
+        """
+        self.project_path = project_path
+        self._git_dir: Optional[str] = None
+        self._common_dir: Optional[str] = None
+        self._config: Optional[Dict[str, List[str]]] = None
+        self._packed_refs: Optional[Dict[str, Tuple[str, Optional[str]]]] = None
+        self._packs: Optional[List[_PackFile]] = None
+        self._objects: Dict[str, Tuple[str, bytes]] = {}
+        self._sub_readers: Dict[str, "GitReader"] = {}
+
+    def run_command(self, command: str) -> Optional[str]:
+        """Run a git command without spawning git
+
+        Args:
+            command (str): Git command, as run by `Repository`. It can start with `git -C <path>` to run the command
+                in a sub-directory, e.g. a submodule.
+
+        Returns:
+            Optional[str]: Output of the command, or None if the command or the repository is not supported
+        """
+        if command.startswith("git -C "):
+            path, _, sub_command = command[len("git -C "):].partition(" ")
+            if path not in self._sub_readers:
+                self._sub_readers[path] = GitReader(os.path.join(self.project_path, path))
+            return self._sub_readers[path].run_command("git " + sub_command)
+
+        method_name = self.COMMANDS.get(command)
+        if method_name is None:
+            return None
+        try:
+            return getattr(self, method_name)()
+        except (GitReaderError, OSError, ValueError, IndexError, struct.error, zlib.error):
+            return None
+
+    def close(self) -> None:
+        """Release the pack files
+        """
+        for pack in self._packs or []:
+            pack.close()
+        self._packs = None
+        for sub_reader in self._sub_readers.values():
+            sub_reader.close()
+
+    def __enter__(self) -> "GitReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __discover(self) -> None:
+        """Find the git directory of the repository, as git does, by looking for .git in the parent directories
+
+        Raises:
+            GitReaderError: No supported repository found
+        """
+        if self._git_dir is not None:
+            return
+        if any(name.startswith(_UNSUPPORTED_ENVIRONMENT) and name not in _SUPPORTED_ENVIRONMENT
+               for name in os.environ):
+            raise GitReaderError("git environment variables are set")
+
+        directory = os.path.abspath(self.project_path)
+        while True:
+            dot_git = os.path.join(directory, ".git")
+            if os.path.isdir(dot_git):
+                git_dir = dot_git
+                break
+            if os.path.isfile(dot_git):
+                # Submodules and worktrees: the .git file points to the git directory
+                with open(dot_git, "r", encoding="utf-8") as git_file:
+                    content = git_file.read().strip()
+                if not content.startswith("gitdir: "):
+                    raise GitReaderError(f"Invalid .git file: {dot_git}")
+                git_dir = os.path.join(directory, content[len("gitdir: "):])
+                break
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                raise GitReaderError("Not a git repository")
+            directory = parent
+
+        # git refuses to work in repositories owned by someone else unless they are marked safe
+        if hasattr(os, "getuid") and os.stat(directory).st_uid != os.getuid():
+            raise GitReaderError("Repository owned by another user")
+
+        common_dir = git_dir
+        if os.path.isfile(os.path.join(git_dir, "commondir")):
+            with open(os.path.join(git_dir, "commondir"), "r", encoding="utf-8") as common_dir_file:
+                common_dir = os.path.join(git_dir, common_dir_file.read().strip())
+
+        for unsupported_file in _UNSUPPORTED_FILES:
+            if os.path.exists(os.path.join(common_dir, unsupported_file)):
+                raise GitReaderError(f"Unsupported repository feature: {unsupported_file}")
+        if os.path.isdir(os.path.join(common_dir, "refs", "replace")) and \
+                os.listdir(os.path.join(common_dir, "refs", "replace")):
+            raise GitReaderError("Unsupported repository feature: replace refs")
+
+        self._git_dir = os.path.normpath(git_dir)
+        self._common_dir = os.path.normpath(common_dir)
+
+    def __config(self) -> Dict[str, List[str]]:
+        """Load the system, global and repository git config
+
+        Raises:
+            GitReaderError: The config uses features that are not supported
+
+        Returns:
+            Dict[str, List[str]]: Values of each entry, from the system config to the repository config
+        """
+        if self._config is not None:
+            return self._config
+        self.__discover()
+
+        config_paths = _system_config_paths()
+        if "GIT_CONFIG_GLOBAL" in os.environ:
+            config_paths.append(os.environ["GIT_CONFIG_GLOBAL"])
+        else:
+            home = os.path.expanduser("~")
+            xdg_config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.join(home, ".config")
+            config_paths += [os.path.join(xdg_config_home, "git", "config"), os.path.join(home, ".gitconfig")]
+        config_paths.append(os.path.join(self._common_dir, "config"))
+
+        config: Dict[str, List[str]] = {}
+        for config_path in config_paths:
+            if not os.path.isfile(config_path):
+                continue
+            with open(config_path, "r", encoding="utf-8") as config_file:
+                for name, values in _parse_config(config_file.read()).items():
+                    config.setdefault(name, []).extend(values)
+
+        if any(name.startswith(("include.", "includeif.")) for name in config):
+            raise GitReaderError("git config includes are not supported")
+        if "extensions.worktreeconfig" in config:
+            raise GitReaderError("Per worktree config is not supported")
+        if config.get("extensions.objectformat", ["sha1"])[-1].lower() != "sha1":
+            raise GitReaderError("Only sha1 repositories are supported")
+        if config.get("extensions.refstorage", ["files"])[-1].lower() != "files":
+            raise GitReaderError("Only the files ref storage is supported")
+
+        self._config = config
+        return config
+
+    def __read_packed_refs(self) -> Dict[str, Tuple[str, Optional[str]]]:
+        """Load the packed-refs file
+
+        Returns:
+            Dict[str, Tuple[str, Optional[str]]]: sha of each ref, and sha of the peeled object for annotated tags
+                when known
+        """
+        if self._packed_refs is not None:
+            return self._packed_refs
+
+        packed_refs: Dict[str, Tuple[str, Optional[str]]] = {}
+        packed_refs_path = os.path.join(self._common_dir, "packed-refs")
+        if os.path.isfile(packed_refs_path):
+            with open(packed_refs_path, "r", encoding="utf-8") as packed_refs_file:
+                ref_name = None
+                for line in packed_refs_file:
+                    line = line.rstrip("\n")
+                    if not line or line.startswith("#"):
+                        continue
+                    if line.startswith("^"):
+                        if ref_name is None:
+                            raise GitReaderError("Invalid packed-refs file")
+                        packed_refs[ref_name] = (packed_refs[ref_name][0], line[1:])
+                        continue
+                    sha, _, ref_name = line.partition(" ")
+                    packed_refs[ref_name] = (sha, None)
+
+        if any(ref_name.startswith("refs/replace/") for ref_name in packed_refs):
+            raise GitReaderError("Unsupported repository feature: replace refs")
+
+        self._packed_refs = packed_refs
+        return packed_refs
+
+    def __resolve_ref(self, ref_name: str) -> str:
+        """Get the sha a ref points to, following symbolic refs
+
+        Args:
+            ref_name (str): "HEAD" or full name of the ref, e.g. "refs/heads/master"
+
+        Raises:
+            GitReaderError: The ref does not exist
+
+        Returns:
+            str: sha of the object
+        """
+        self.__discover()
+        for _ in range(5):
+            base_dir = self._git_dir if ref_name == "HEAD" else self._common_dir
+            ref_path = os.path.join(base_dir, *ref_name.split("/"))
+            if os.path.isfile(ref_path):
+                with open(ref_path, "r", encoding="utf-8") as ref_file:
+                    content = ref_file.read().strip()
+            elif ref_name in self.__read_packed_refs():
+                content = self.__read_packed_refs()[ref_name][0]
+            else:
+                raise GitReaderError(f"Unknown ref {ref_name}")
+
+            if not content.startswith("ref: "):
+                if _SHA_REGEX.match(content) is None:
+                    raise GitReaderError(f"Invalid ref {ref_name}")
+                return content
+            ref_name = content[len("ref: "):]
+
+        raise GitReaderError("Too many levels of symbolic refs")
+
+    def __tag_refs(self) -> List[Tuple[str, str, Optional[str]]]:
+        """List the tags of the repository, loose tags taking precedence over the packed ones
+
+        Returns:
+            List[Tuple[str, str, Optional[str]]]: Name, sha, and peeled sha if known, of each tag sorted by name
+        """
+        tags = {ref_name[len("refs/tags/"):]: ref
+                for ref_name, ref in self.__read_packed_refs().items() if ref_name.startswith("refs/tags/")}
+
+        tags_dir = os.path.join(self._common_dir, "refs", "tags")
+        for directory, _, file_names in os.walk(tags_dir):
+            for file_name in file_names:
+                tag_name = os.path.relpath(os.path.join(directory, file_name), tags_dir).replace(os.sep, "/")
+                tags[tag_name] = (self.__resolve_ref("refs/tags/" + tag_name), None)
+
+        return [(tag_name, sha, peeled) for tag_name, (sha, peeled) in sorted(tags.items())]
+
+    def __read_packs(self) -> List[_PackFile]:
+        """Open the pack files of the repository
+
+        Returns:
+            List[_PackFile]: Pack files
+        """
+        if self._packs is None:
+            self._packs = [_PackFile(index_path) for index_path in
+                           sorted(glob.glob(os.path.join(self._common_dir, "objects", "pack", "*.idx")))]
+        return self._packs
+
+    def __read_object(self, sha: str) -> Tuple[str, bytes]:
+        """Read an object from the loose objects or the pack files
+
+        Args:
+            sha (str): sha of the object
+
+        Raises:
+            GitReaderError: The object does not exist
+
+        Returns:
+            Tuple[str, bytes]: Type and data of the object
+        """
+        if sha in self._objects:
+            return self._objects[sha]
+        self.__discover()
+
+        loose_path = os.path.join(self._common_dir, "objects", sha[:2], sha[2:])
+        if os.path.isfile(loose_path):
+            with open(loose_path, "rb") as loose_file:
+                raw_object = zlib.decompress(loose_file.read())
+            header, _, data = raw_object.partition(b"\0")
+            object_type, _, size = header.decode("ascii").partition(" ")
+            if int(size) != len(data):
+                raise GitReaderError(f"Corrupted object {sha}")
+            git_object = (object_type, data)
+        else:
+            binsha = bytes.fromhex(sha)
+            for pack in self.__read_packs():
+                offset = pack.find_offset(binsha)
+                if offset is not None:
+                    git_object = pack.read(offset, lambda base: self.__read_object(base.hex()))
+                    break
+            else:
+                raise GitReaderError(f"Object {sha} not found")
+
+        self._objects[sha] = git_object
+        return git_object
+
+    def __object_headers(self, sha: str, expected_type: str) -> Dict[str, str]:
+        """Read the headers of a commit or tag object
+
+        Args:
+            sha (str): sha of the object
+            expected_type (str): "commit" or "tag"
+
+        Raises:
+            GitReaderError: The object is not of the expected type
+
+        Returns:
+            Dict[str, str]: First value of each header, e.g. "parent" is the first parent of a commit
+        """
+        object_type, data = self.__read_object(sha)
+        if object_type != expected_type:
+            raise GitReaderError(f"Object {sha} is a {object_type}, not a {expected_type}")
+
+        headers: Dict[str, str] = {}
+        for line in data.split(b"\n\n", 1)[0].split(b"\n"):
+            name, _, value = line.decode("utf-8", errors="replace").partition(" ")
+            if name:
+                headers.setdefault(name, value)
+        return headers
+
+    def __peel_tag(self, sha: str) -> str:
+        """Peel an annotated tag, and tags of tags, down to the tagged object
+
+        Args:
+            sha (str): sha of the tag object
+
+        Returns:
+            str: sha of the tagged object
+        """
+        while self.__read_object(sha)[0] == "tag":
+            sha = self.__object_headers(sha, "tag")["object"]
+        return sha
+
+    def __tag_date(self, sha: str) -> int:
+        """Get the date of an annotated tag
+
+        Args:
+            sha (str): sha of the tag object
+
+        Returns:
+            int: Tagger timestamp, 0 if the tag has no tagger
+        """
+        tagger = self.__object_headers(sha, "tag").get("tagger")
+        if tagger is None:
+            return 0
+        return int(tagger.rsplit(" ", 2)[1])
+
+    def __describe(self) -> Tuple[str, int, str]:
+        """Find the last tag on the first-parent chain of HEAD, like `git describe --tags --first-parent`
+
+        Raises:
+            GitReaderError: No tag found on the first-parent chain
+
+        Returns:
+            Tuple[str, int, str]: Tag name, number of commits since the tag, and sha of HEAD
+        """
+        # Best tag of each commit, as chosen by git: annotated tags first, then the most recent annotated tag, or
+        # the first lightweight tag by name
+        commit_tags: Dict[str, Tuple[int, str, str]] = {}
+        for tag_name, sha, peeled in self.__tag_refs():
+            if peeled is None and self.__read_object(sha)[0] == "tag":
+                peeled = self.__peel_tag(sha)
+            priority = _LIGHTWEIGHT_TAG if peeled is None or peeled == sha else _ANNOTATED_TAG
+            commit = sha if peeled is None else peeled
+
+            existing = commit_tags.get(commit)
+            if existing is None or existing[0] < priority or \
+                    (existing[0] == priority == _ANNOTATED_TAG and
+                     self.__tag_date(existing[2]) < self.__tag_date(sha)):
+                commit_tags[commit] = (priority, tag_name, sha)
+
+        head = self.__resolve_ref("HEAD")
+        commit = head
+        depth = 0
+        while commit is not None:
+            if commit in commit_tags:
+                return commit_tags[commit][1], depth, head
+            commit = self.__object_headers(commit, "commit").get("parent")
+            depth += 1
+
+        raise GitReaderError("No tag found")
+
+    def __abbreviate(self, sha: str) -> str:
+        """Get the shortest unique abbreviation of a sha, with the default length chosen by git
+
+        Args:
+            sha (str): sha to abbreviate
+
+        Raises:
+            GitReaderError: The abbreviation length is configured, or a multi-pack-index is used
+
+        Returns:
+            str: Abbreviated sha
+        """
+        if "core.abbrev" in self.__config():
+            raise GitReaderError("core.abbrev is not supported")
+        if os.path.exists(os.path.join(self._common_dir, "objects", "pack", "multi-pack-index")):
+            raise GitReaderError("multi-pack-index is not supported")
+
+        # The length grows with the number of packed objects, the loose objects are not counted
+        packed_count = sum(pack.count for pack in self.__read_packs())
+        length = max(_FALLBACK_DEFAULT_ABBREV, (packed_count.bit_length() + 1) // 2)
+
+        binsha = bytes.fromhex(sha)
+        for pack in self.__read_packs():
+            for other_binsha in pack.neighbours(binsha):
+                length = max(length, _common_hex_prefix(sha, other_binsha.hex()) + 1)
+
+        loose_dir = os.path.join(self._common_dir, "objects", sha[:2])
+        if os.path.isdir(loose_dir):
+            for file_name in os.listdir(loose_dir):
+                other_sha = sha[:2] + file_name
+                if other_sha != sha:
+                    length = max(length, _common_hex_prefix(sha, other_sha) + 1)
+
+        return sha[:length]
+
+    def _rev_parse_head(self) -> str:
+        """`git rev-parse HEAD`
+
+        Returns:
+            str: Command output
+        """
+        self.__config()
+        return self.__resolve_ref("HEAD") + "\n"
+
+    def _remote_get_url(self) -> str:
+        """`git remote get-url origin`
+
+        Raises:
+            GitReaderError: The url would be rewritten by git, or is not in the config
+
+        Returns:
+            str: Command output
+        """
+        config = self.__config()
+        if any(name.endswith(".insteadof") for name in config):
+            raise GitReaderError("url rewriting is not supported")
+        if "remote.origin.url" not in config:
+            raise GitReaderError("No url for remote origin")
+        return config["remote.origin.url"][0] + "\n"
+
+    def _describe_abbrev_0(self) -> str:
+        """`git describe --tags --first-parent --always --abbrev=0`
+
+        Returns:
+            str: Command output
+        """
+        self.__config()
+        tag_name, _, _ = self.__describe()
+        return tag_name + "\n"
+
+    def _describe_long(self) -> str:
+        """`git describe --tags --first-parent --always --long`
+
+        Returns:
+            str: Command output
+        """
+        self.__config()
+        tag_name, depth, head = self.__describe()
+        return f"{tag_name}-{depth}-g{self.__abbreviate(head)}\n"
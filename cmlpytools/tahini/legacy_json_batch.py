@@ -0,0 +1,86 @@
+"""Convert a whole directory of legacy json files (e.g. CAEF modules) in parallel
+"""
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import json
+import os
+from typing import List, Optional, Tuple
+from .legacy_json_converter import legacy_to_input_json
+from .legacy_json_to_header import legacy_json_save_c_header
+
+DEFAULT_LEGACY_PATTERN = "*.caef.json"
+
+
+def _legacy_output_path(legacy_path: str, output_dir: str, extension: str) -> str:
+    """Get the path of the file generated from a legacy json file: the output directory, followed by the
+    name of the legacy file up to the first '.' (e.g. `bias_model.caef.json` -> `bias_model.h`)
+
+    Args:
+        legacy_path (str): Path to the legacy json file
+        output_dir (str): Directory where the output is written
+        extension (str): Extension of the output file
+
+    Returns:
+        str: Path of the output file
+    """
+    filename = os.path.basename(legacy_path)
+    return os.path.join(output_dir, filename[:filename.index('.')] + extension)
+
+
+def _convert_legacy_file(job: Tuple[str, str, bool]) -> str:
+    """Convert a single legacy json file. This function runs in the worker processes.
+
+    Args:
+        job (Tuple[str, str, bool]): Path to the legacy json file, output directory, and whether to generate
+            a C header instead of an input json file
+
+    Returns:
+        str: Path of the generated file
+    """
+    legacy_path, output_dir, c_header = job
+
+    if c_header:
+        output_path = _legacy_output_path(legacy_path, output_dir, ".h")
+        legacy_json_save_c_header(legacy_path, output_path)
+        return output_path
+
+    with open(legacy_path, "r", encoding="utf-8") as file_in:
+        json_data = json.load(file_in)
+
+    output_path = _legacy_output_path(legacy_path, output_dir, ".json")
+    with open(output_path, "w", encoding="utf-8") as output:
+        output.write(legacy_to_input_json(json_data).to_json())
+
+    return output_path
+
+
+def legacy_json_batch_convert(legacy_dir: str,
+                              output_dir: str,
+                              c_header: bool = False,
+                              pattern: str = DEFAULT_LEGACY_PATTERN,
+                              jobs: Optional[int] = None
+                              ) -> List[str]:
+    """Convert all the legacy json files of a directory using a pool of processes
+
+    Args:
+        legacy_dir (str): Directory containing the legacy json files
+        output_dir (str): Directory where the converted files are written, created if needed
+        c_header (bool, optional): Generate C headers instead of input json files. Defaults to False.
+        pattern (str, optional): Pattern of the legacy json file names. Defaults to "*.caef.json".
+        jobs (Optional[int], optional): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        List[str]: Paths of the generated files, in the order of the sorted legacy json file names
+    """
+    if not os.path.isdir(legacy_dir):
+        raise NotADirectoryError(f"The path {legacy_dir} is not a directory")
+
+    legacy_paths = sorted(glob.glob(os.path.join(legacy_dir, pattern)))
+    os.makedirs(output_dir, exist_ok=True)
+    job_list = [(legacy_path, output_dir, c_header) for legacy_path in legacy_paths]
+
+    if jobs == 1 or len(job_list) <= 1:
+        return [_convert_legacy_file(job) for job in job_list]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(_convert_legacy_file, job_list))
@@ -1,9 +1,9 @@
 """Implement functions used to import files from the legacy json format
 """
+from collections import ChainMap
 from dataclasses import dataclass
 import json
-from copy import deepcopy
-from typing import Any, Optional, Dict, List, Tuple
+from typing import Any, Optional, Dict, List, Set, Tuple
 from .input_json_schema import InputEnum, InputJson, InputRegmap, InputType, VisibilityOptions
 
 
@@ -16,17 +16,19 @@ def _to_camelcase(name: str) -> str:
 class _ControlContext:
     """This class is used to manage and store the local contexts for control spaces and
     indexes as we recursively traverse the json nodes.
+
+    Each level of the context only stores the definitions made by its own node, and looks up the
+    definitions of the parent nodes through a `ChainMap`, so entering a struct does not copy anything.
     """
 
     def __init__(self):
-        self._spaces_stack = []
-        self._indexes_stack = []
         self._prefix_stack = []
-        self.spaces: Dict[str, List[str]] = {}
-        self.indexes: Dict[str, int] = {}
+        self.spaces: ChainMap[str, List[str]] = ChainMap()
+        self.indexes: ChainMap[str, int] = ChainMap()
         self.register_prefix: str = ""
         self.enums_by_local_name: Dict[str, InputEnum] = {}
-        self.all_enums = []
+        self.all_enums: List[InputEnum] = []
+        self._all_enum_names: Set[str] = set()
 
     def add_enum(self, local_name: str, enum: InputEnum) -> None:
         """Add a new enum to be included in the input json
@@ -35,13 +37,9 @@ class _ControlContext:
             local_name (str): Local name of the enum in the current json context
             enum (InputEnum): Enum to be created
         """
-        add = True
         self.enums_by_local_name[local_name] = enum
-        for existing_enum in self.all_enums:
-            if enum.name == existing_enum.name:
-                add = False
-                break
-        if add:
+        if enum.name not in self._all_enum_names:
+            self._all_enum_names.add(enum.name)
             self.all_enums.append(enum)
 
     def read_control_indexes_and_spaces(self, node: Any, node_name: str) -> None:
@@ -113,16 +111,16 @@ class _ControlContext:
         """Save the current state of control indexes and spaces
         """
 
-        self._spaces_stack.append(deepcopy(self.spaces))
-        self._indexes_stack.append(deepcopy(self.indexes))
-        self._prefix_stack.append(deepcopy(self.register_prefix))
+        self.spaces = self.spaces.new_child()
+        self.indexes = self.indexes.new_child()
+        self._prefix_stack.append(self.register_prefix)
 
     def pop(self) -> None:
         """Restore state from the last push
         """
 
-        self.spaces = self._spaces_stack.pop()
-        self.indexes = self._indexes_stack.pop()
+        self.spaces = self.spaces.parents
+        self.indexes = self.indexes.parents
         self.register_prefix = self._prefix_stack.pop()
 
 
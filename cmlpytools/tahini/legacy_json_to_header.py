@@ -4,10 +4,11 @@ from string import Template
 from re import sub
 import json
 import os
-import datetime
-from typing import Any, Dict, List
-from .legacy_json_converter import legacy_json_to_input_regmap
+from typing import Any, Dict, List, TextIO
+from .legacy_json_converter import legacy_to_input_json
 from .input_json_schema import InputJson, InputRegmap, InputEnum
+from .text_emitter import TextEmitter
+from .build_timestamp import build_date
 
 C_HEADER_BOILERPLATE = \
 """/***************************************************************************************************
@@ -74,19 +75,15 @@ def _snake_case(text: str) -> str:
     return sub(r'(?<!^)(?=[A-Z])', '_', text).lower()
 
 
-def _extract_constants(const_value: Dict, description: str, const_type: str = None) -> str:
+def _extract_constants(emitter: TextEmitter, const_value: Dict, description: str, const_type: str = None) -> None:
     """Extract constant values and convert to C header text 
 
     Args:
+        emitter (TextEmitter): Emitter receiving the C header text
         const_value (Dict): A dictionary that describes the constant values
         description (str): A text description of the CAEF component, to be used when appending to certain #defs
         const_type (str): A string to decribe the type of constant
-
-    Returns:
-        str: C header text
     """
-    header_text: str = ""
-
     num_items = len(const_value.items())
     mykeys = list(const_value.keys())
     myvalues = list(const_value.values())
@@ -104,25 +101,20 @@ def _extract_constants(const_value: Dict, description: str, const_type: str = No
             # else case sets to empty string to satisfy the linter
             value = prefix = ""
 
-        header_text += "#define " + prefix + mykeys[i].upper() + " " + value + "\n"
+        emitter.write("#define " + prefix + mykeys[i].upper() + " " + value + "\n")
 
-    return header_text
 
-
-def _json_actuator_to_cheader(json_data: Any, description: str, header_contents: str) -> str:
+def _json_actuator_to_cheader(emitter: TextEmitter, json_data: Any, description: str) -> None:
     """Convert legacy json file containing a CAEF 'Actuator' into C header text
 
     Args:
+        emitter (TextEmitter): Emitter receiving the C header text
         json_data (Any): Json data to be converted
         description (str): A text description of the CAEF component, to be used when appending to certain #defs
-        header_contents (str): C header text
-
-    Returns:
-        str: C integer type
     """
 
-    header_contents += "#include \"caef_module.h\"\n"
-    header_contents += "#include \"caef_chain.h\"\n"
+    emitter.write("#include \"caef_module.h\"\n")
+    emitter.write("#include \"caef_chain.h\"\n")
 
     # Find the top of the JSON for this actuator
     caef_actuator = json_data["Actuator"]
@@ -134,13 +126,13 @@ def _json_actuator_to_cheader(json_data: Any, description: str, header_contents:
     actuator_struct_list: List = []
     for child in caef_actuator["children"]:
         if child[0] == "Chain":
-            header_contents += "#include \"" + child[1].lower().replace(" ", "_") + ".h\"\n"
+            emitter.write("#include \"" + child[1].lower().replace(" ", "_") + ".h\"\n")
         elif child[0] == "Module":
-            header_contents += "#include \"" + child[1].lower().replace(" ", "_") + ".h\"\n"
+            emitter.write("#include \"" + child[1].lower().replace(" ", "_") + ".h\"\n")
         elif child[0] == "Struct":
             actuator_struct_list.append(child[1])
 
-    header_contents += CONSTANTS_TYPES_TITLE
+    emitter.write(CONSTANTS_TYPES_TITLE)
 
     # Parse the top level public and private regmap structures after recursively parsing their member structures
     # pylint: disable=too-many-nested-blocks
@@ -149,7 +141,7 @@ def _json_actuator_to_cheader(json_data: Any, description: str, header_contents:
 
         for child in caef_actuator_structs["children"]:
             struct_name = _camel_case(child[1])
-            header_contents += "struct " + struct_name + " {\n"
+            emitter.write("struct " + struct_name + " {\n")
             struct_contents = json_data["Struct"][child[1]]["children"]
             for inner_struct_member in struct_contents:
                 if inner_struct_member[0] == "Struct":
@@ -162,42 +154,37 @@ def _json_actuator_to_cheader(json_data: Any, description: str, header_contents:
                             inner_struct_ctype = json_data["Struct"][inner_struct_member[1]]["ctype"]
                         if "cname" in json_data["Struct"][inner_struct_member[1]]:
                             inner_struct_cname = json_data["Struct"][inner_struct_member[1]]["cname"]
-                    header_contents += "    struct " + inner_struct_ctype + " " + inner_struct_cname + ";\n"
-            header_contents += "};\ntypedef struct " + struct_name + " " + struct_name + ";\n\n"
+                    emitter.write("    struct " + inner_struct_ctype + " " + inner_struct_cname + ";\n")
+            emitter.write("};\ntypedef struct " + struct_name + " " + struct_name + ";\n\n")
 
         top_struct_name = _camel_case(actuator_struct_id)
-        header_contents += "struct " + top_struct_name + " {\n"
+        emitter.write("struct " + top_struct_name + " {\n")
         top_struct_contents = json_data["Struct"][actuator_struct_id]["children"]
         for top_struct_member in top_struct_contents:
-            header_contents += "    struct " +  _camel_case(top_struct_member[1]) + " "
-            header_contents += json_data["Struct"][top_struct_member[1]]["cname"] + ";\n"
-        header_contents += "};\ntypedef struct " + top_struct_name + " " + top_struct_name + ";\n\n"
+            emitter.write("    struct " +  _camel_case(top_struct_member[1]) + " ")
+            emitter.write(json_data["Struct"][top_struct_member[1]]["cname"] + ";\n")
+        emitter.write("};\ntypedef struct " + top_struct_name + " " + top_struct_name + ";\n\n")
 
 
     if "controlindexes" in caef_actuator:
-        header_contents += _extract_constants(caef_actuator["controlindexes"], description, const_type="controlindexes")
+        _extract_constants(emitter, caef_actuator["controlindexes"], description, const_type="controlindexes")
 
     if "controlspaces" in caef_actuator:
-        header_contents += _extract_constants(caef_actuator["controlspaces"], description, const_type="controlspaces")
-
-    return header_contents
+        _extract_constants(emitter, caef_actuator["controlspaces"], description, const_type="controlspaces")
 
 
-def _json_chain_to_cheader(json_data: Any, description: str, header_contents: str) -> str:
+def _json_chain_to_cheader(emitter: TextEmitter, json_data: Any, description: str) -> None:
     """Convert legacy json file containing a CAEF 'Chain' into C header text
 
     Args:
+        emitter (TextEmitter): Emitter receiving the C header text
         json_data (Any): Json data to be converted
         description (str): A text description of the CAEF component, to be used when appending to certain #defs
-        header_contents (str): C header text
-
-    Returns:
-        str: C header text
     """
 
     # Add additional includes for CAEF chain JSONs
-    header_contents += "#include \"caef_module.h\"\n"
-    header_contents += "#include \"caef_chain.h\"\n"
+    emitter.write("#include \"caef_module.h\"\n")
+    emitter.write("#include \"caef_chain.h\"\n")
 
     # Find the top of the JSON for this chain
     caef_chain = json_data["Chain"]
@@ -206,14 +193,12 @@ def _json_chain_to_cheader(json_data: Any, description: str, header_contents: st
     # Iterate throught the child nodes, adding the required #includes
     for child in caef_chain["children"]:
         if child[0] == "Module":
-            header_contents += "#include \"" + child[1].lower().replace(" ", "_") + ".h\"\n"
+            emitter.write("#include \"" + child[1].lower().replace(" ", "_") + ".h\"\n")
 
-    header_contents += CONSTANTS_TYPES_TITLE
+    emitter.write(CONSTANTS_TYPES_TITLE)
 
     if "controlindexes" in caef_chain:
-        header_contents += _extract_constants(caef_chain["controlindexes"], description, const_type="controlindexes")
-
-    return header_contents
+        _extract_constants(emitter, caef_chain["controlindexes"], description, const_type="controlindexes")
 
 
 def _convert_integer_type(int_type: str) -> str:
@@ -241,123 +226,106 @@ def _convert_integer_type(int_type: str) -> str:
     return int_type
 
 
-def _process_input_enum(input_enum: InputEnum) -> str:
+def _process_input_enum(emitter: TextEmitter, input_enum: InputEnum) -> None:
     """Convert InputEnum into C header syntax
 
     Args:
+        emitter (TextEmitter): Emitter receiving the C header text
         input_enum (InputEnum): The input enum
-
-    Returns:
-        str: C header text
     """
-    header_text: str = ""
-
-    header_text += "enum " + input_enum.name + " {\n"
+    emitter.write("enum " + input_enum.name + " {\n")
 
     num_members = len(input_enum.enumerators)
     for i in range(0, num_members):
         member_fullname = input_enum.name + "_" + input_enum.enumerators[i].name
-        header_text += "    " + member_fullname.upper() + " = " + str(input_enum.enumerators[i].value)
+        emitter.write("    " + member_fullname.upper() + " = " + str(input_enum.enumerators[i].value))
         if i < num_members-1:
-            header_text += ","
-        header_text += "\n"
+            emitter.write(",")
+        emitter.write("\n")
 
-    header_text += "};\n"
+    emitter.write("};\n")
     if "Flags" not in input_enum.name:
-        header_text += "ADD_ENUM_TO_REGMAP(" + input_enum.name + ");\n"
-    header_text += "\n"
+        emitter.write("ADD_ENUM_TO_REGMAP(" + input_enum.name + ");\n")
+    emitter.write("\n")
 
-    return header_text
 
-
-def _process_input_regmap(input_regmap: InputRegmap) -> str:
+def _process_input_regmap(emitter: TextEmitter, input_regmap: InputRegmap) -> None:
     """Convert InputRegmap into C header syntax
 
     Args:
+        emitter (TextEmitter): Emitter receiving the C header text
         input_regmap (InputRegmap): The input regmap
-
-    Returns:
-        str: C header text
     """
-    header_text: str = ""
-
     num_members = len(input_regmap.members)
     for i in range(0, num_members):
         if input_regmap.members[i].brief is not None:
-            header_text += "    // @regmap brief: \"" + input_regmap.members[i].brief + "\"\n"
+            emitter.write("    // @regmap brief: \"" + input_regmap.members[i].brief + "\"\n")
         if "pad" in input_regmap.members[i].name.lower() or "reserved" in input_regmap.members[i].name.lower():
-            header_text += "    // @regmap access: \"none\"\n"
+            emitter.write("    // @regmap access: \"none\"\n")
         elif input_regmap.members[i].access is not None:
-            header_text += "    // @regmap access: \"" + input_regmap.members[i].access + "\"\n"
+            emitter.write("    // @regmap access: \"" + input_regmap.members[i].access + "\"\n")
         if input_regmap.members[i].format is not None:
-            header_text += "    // @regmap format: \"" + input_regmap.members[i].format + "\"\n"
+            emitter.write("    // @regmap format: \"" + input_regmap.members[i].format + "\"\n")
         if input_regmap.members[i].min is not None:
-            header_text += "    // @regmap min: \"" + input_regmap.members[i].min + "\"\n"
+            emitter.write("    // @regmap min: \"" + input_regmap.members[i].min + "\"\n")
         if input_regmap.members[i].max is not None:
-            header_text += "    // @regmap max: \"" + input_regmap.members[i].max + "\"\n"
+            emitter.write("    // @regmap max: \"" + input_regmap.members[i].max + "\"\n")
         if input_regmap.members[i].units is not None:
-            header_text += "    // @regmap units: \"" + input_regmap.members[i].units + "\"\n"
+            emitter.write("    // @regmap units: \"" + input_regmap.members[i].units + "\"\n")
         if input_regmap.members[i].array_enum is not None:
-            header_text += "    // @regmap array_enum: \"" + input_regmap.members[i].array_enum + "\"\n"
+            emitter.write("    // @regmap array_enum: \"" + input_regmap.members[i].array_enum + "\"\n")
         if input_regmap.members[i].mask_enum is not None:
-            header_text += "    // @regmap mask_enum: \"" + input_regmap.members[i].mask_enum + "\"\n"
+            emitter.write("    // @regmap mask_enum: \"" + input_regmap.members[i].mask_enum + "\"\n")
         if input_regmap.members[i].value_enum is not None:
-            header_text += "    // @regmap value_enum: \"" + input_regmap.members[i].value_enum + "\"\n"
+            emitter.write("    // @regmap value_enum: \"" + input_regmap.members[i].value_enum + "\"\n")
         if input_regmap.members[i].hif_access is not None:
-            header_text += "    // @regmap hif_access: \"" + str(input_regmap.members[i].hif_access) + "\"\n"
+            emitter.write("    // @regmap hif_access: \"" + str(input_regmap.members[i].hif_access) + "\"\n")
 
-        header_text += "    " + _convert_integer_type(input_regmap.members[i].type)
-        header_text += " " + input_regmap.members[i].name
+        emitter.write("    " + _convert_integer_type(input_regmap.members[i].type))
+        emitter.write(" " + input_regmap.members[i].name)
         if input_regmap.members[i].type == "struct":
-            header_text += " " + _snake_case(input_regmap.members[i].name)
+            emitter.write(" " + _snake_case(input_regmap.members[i].name))
         if input_regmap.members[i].array_count is not None and input_regmap.members[i].array_count > 1:
-            header_text += "[" + str(input_regmap.members[i].array_count) + "]"
-        header_text += ";\n"
-
-    return header_text
+            emitter.write("[" + str(input_regmap.members[i].array_count) + "]")
+        emitter.write(";\n")
 
 
-def _json_module_to_c_header(legacy_input_json: InputJson,
+def _json_module_to_c_header(emitter: TextEmitter,
+                             legacy_input_json: InputJson,
                              legacy_json_data: Any,
-                             description: str,
-                             header_contents: str) -> str:
+                             description: str) -> None:
     """Convert InputJson describing a CAEF 'Module' into C header syntax
 
     Args:
+        emitter (TextEmitter): Emitter receiving the C header text
         legacy_input_json (InputJson): Path to the file containing the legacy json data
         legacy_json_data (Any): Json data corresponding to the legacy Json file
         description (str): A text description of the CAEF component, to be used when appending to certain #defs
-        header_contents (str): C header text
-
-    Returns:
-        str: C header text
     """
 
     # Add addtional includes for CAEF module JSONs
-    header_contents += "#include \"caef_module.h\"\n"
+    emitter.write("#include \"caef_module.h\"\n")
 
-    header_contents += CONSTANTS_TYPES_TITLE
+    emitter.write(CONSTANTS_TYPES_TITLE)
 
     num_enums = len(legacy_input_json.enums)
     for i in range(0, num_enums):
-        header_contents += _process_input_enum(legacy_input_json.enums[i])
+        _process_input_enum(emitter, legacy_input_json.enums[i])
 
     num_regmaps = len(legacy_input_json.regmap)
     for j in range(0, num_regmaps):
-        header_contents += "struct " + legacy_input_json.regmap[j].name + " {\n"
-        header_contents += _process_input_regmap(legacy_input_json.regmap[j])
-        header_contents += "};\n"
-        header_contents += "typedef struct " + legacy_input_json.regmap[j].name
-        header_contents += " " + legacy_input_json.regmap[j].name + ";\n\n"
+        emitter.write("struct " + legacy_input_json.regmap[j].name + " {\n")
+        _process_input_regmap(emitter, legacy_input_json.regmap[j])
+        emitter.write("};\n")
+        emitter.write("typedef struct " + legacy_input_json.regmap[j].name)
+        emitter.write(" " + legacy_input_json.regmap[j].name + ";\n\n")
 
     # Find the top of the JSON for this module
     caef_module = legacy_json_data["Module"]
     caef_module = caef_module[next(iter(caef_module.keys()))]
     # Add init constants if they exist for this CAEF module
     if "initvalues" in caef_module:
-        header_contents += _extract_constants(caef_module["initvalues"], description, const_type="initvalues")
-
-    return header_contents
+        _extract_constants(emitter, caef_module["initvalues"], description, const_type="initvalues")
 
 
 def legacy_json_to_c_header(legacy_path: str) -> str:
@@ -370,42 +338,102 @@ def legacy_json_to_c_header(legacy_path: str) -> str:
         str: C header text
     """
 
-    # Determine the unique file name and derive some text that will go in the output
-    filename = os.path.basename(legacy_path)
-    caefname = filename[:filename.index('.')].upper()
+    # Open the input file
+    with open(legacy_path, "r", encoding="utf-8") as file_in:
+        json_data = json.load(file_in)
 
-    header_contents: str = ""
+    return legacy_data_to_c_header(json_data, legacy_path)
+
+
+def legacy_json_write_c_header(legacy_path: str, output: TextIO) -> None:
+    """Import a legacy json file and write the C header straight into a stream
+
+    Args:
+        legacy_path (str): Path to the file containing the legacy json data
+        output (TextIO): Stream receiving the C header text
+    """
 
     # Open the input file
     with open(legacy_path, "r", encoding="utf-8") as file_in:
         json_data = json.load(file_in)
 
+    with TextEmitter(output) as emitter:
+        _write_c_header(emitter, json_data, legacy_path)
+
+
+def legacy_json_save_c_header(legacy_path: str, output_path: str) -> None:
+    """Import a legacy json file and write the C header into a file. The header is written to a temporary file that
+    replaces the output file once complete, so that the output file is left untouched if the conversion fails.
+
+    Args:
+        legacy_path (str): Path to the file containing the legacy json data
+        output_path (str): Path to the C header file
+    """
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as output:
+            legacy_json_write_c_header(legacy_path, output)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def legacy_data_to_c_header(json_data: Any, legacy_path: str) -> str:
+    """Convert already parsed legacy json data into a C header
+
+    Args:
+        json_data (Any): Json data loaded from the legacy json file
+        legacy_path (str): Path to the legacy json file, used to derive the name of the header
+
+    Returns:
+        str: C header text
+    """
+    emitter = TextEmitter()
+    _write_c_header(emitter, json_data, legacy_path)
+    return emitter.getvalue()
+
+
+def _write_c_header(emitter: TextEmitter, json_data: Any, legacy_path: str) -> None:
+    """Convert already parsed legacy json data into a C header
+
+    Args:
+        emitter (TextEmitter): Emitter receiving the C header text
+        json_data (Any): Json data loaded from the legacy json file
+        legacy_path (str): Path to the legacy json file, used to derive the name of the header
+    """
+
+    # Determine the unique file name and derive some text that will go in the output
+    filename = os.path.basename(legacy_path)
+    caefname = filename[:filename.index('.')].upper()
+
     # Start the output by putting the top boilerplate text
     boilerplate_top = Template(C_HEADER_BOILERPLATE).substitute({
-        'year' : str(datetime.date.today().year),
+        'year' : str(build_date().year),
         'unique_header_name' : caefname,
     })
-    header_contents += boilerplate_top
+    emitter.write(boilerplate_top)
 
-    header_contents += CPP_IFDEF
+    emitter.write(CPP_IFDEF)
 
-    header_contents += INCLUDES_TITLE
+    emitter.write(INCLUDES_TITLE)
 
+    # The same data is converted into an input json at most once
+    input_json = None
     if "Regmap" in json_data:
-        input_json = legacy_json_to_input_regmap(legacy_path)
-        header_contents = _json_module_to_c_header(input_json, json_data, caefname, header_contents)
+        input_json = legacy_to_input_json(json_data)
+        _json_module_to_c_header(emitter, input_json, json_data, caefname)
     if "Module" in json_data:
-        input_json = legacy_json_to_input_regmap(legacy_path)
-        header_contents = _json_module_to_c_header(input_json, json_data, caefname, header_contents)
+        input_json = input_json or legacy_to_input_json(json_data)
+        _json_module_to_c_header(emitter, input_json, json_data, caefname)
     if "Chain" in json_data:
-        header_contents = _json_chain_to_cheader(json_data, caefname, header_contents)
+        _json_chain_to_cheader(emitter, json_data, caefname)
     if "Actuator" in json_data:
-        header_contents = _json_actuator_to_cheader(json_data, caefname, header_contents)
+        _json_actuator_to_cheader(emitter, json_data, caefname)
 
     # End the output by putting the final boilerplate text
     boilerplate_end = Template(C_HEADER_ENDIF).substitute({
         'unique_header_name' : caefname,
     })
-    header_contents += boilerplate_end
-
-    return header_contents
+    emitter.write(boilerplate_end)
@@ -1,7 +1,8 @@
 """Implement the search algorithms to find elements in a regmap
 """
 
-from typing import Union, Optional
+from bisect import bisect_left
+from typing import Dict, List, Tuple, Union, Optional
 from dataclasses import dataclass
 from .cmap_schema import Type as CMapType
 from .cmap_schema import FullRegmap as CMapFullRegmap
@@ -165,3 +166,98 @@ def search(name: str,
         return _search_struct_members(name, cmap_type, node, namespace)
 
     return None
+
+
+class SearchIndex:
+    """Name index built once over a full regmap, so that looking up many elements does not walk the whole regmap
+    every time. The results are the same as `search()`: the first match of a depth-first search.
+
+    An element matches a name if its own name is a prefix of it (the rest being array indexes or aliases), so the
+    candidates of a look-up are the elements named after one of the prefixes of the name.
+    """
+
+    def __init__(self, cmap: CMapFullRegmap):
+        """Index all the registers and structs of a regmap
+
+        Args:
+            cmap (CMapFullRegmap): Regmap to index
+        """
+        self._cmap = cmap
+        # Depth-first position of each node, and end of the positions of its members
+        self._bounds: Dict[int, Tuple[int, int]] = {}
+        # Nodes and their positions for each lower case name, in depth-first order
+        self._nodes: Dict[str, List[CMapRegisterOrStruct]] = {}
+        self._positions: Dict[str, List[int]] = {}
+
+        position = 0
+        stack = [(node, False) for node in reversed(cmap.regmap.children)]
+        while stack:
+            node, members_indexed = stack.pop()
+            if members_indexed:
+                self._bounds[id(node)] = (self._bounds[id(node)][0], position)
+                continue
+            self._bounds[id(node)] = (position, position + 1)
+            # Names are matched case-insensitively, like in `search()`
+            self._nodes.setdefault(node.name.lower(), []).append(node)
+            self._positions.setdefault(node.name.lower(), []).append(position)
+            position += 1
+            if node.type == CMapType.STRUCT:
+                stack.append((node, True))
+                stack.extend((member, False) for member in reversed(node.struct.children))
+
+        self._size = position
+        self._name_lengths = sorted({len(name) for name in self._nodes})
+
+    @property
+    def cmap(self) -> CMapFullRegmap:
+        """Indexed regmap
+        """
+        return self._cmap
+
+    def search(self,
+               name: str,
+               cmap_type: CMapType,
+               node: Union[CMapFullRegmap, CMapRegisterOrStruct, None] = None,
+               namespace: str = None,
+               ) -> Optional[SearchMatch]:
+        """Search for a register or struct using its name in the indexed regmap or one of its nodes.
+
+        Args:
+            name (str): Name of the register or struct to be looked-up
+            cmap_type (CMapType): Type of the node to be looked up (register or struct)
+            node (Union[CMapFullRegmap, CMapRegisterOrStruct, None], optional): The node to look into.
+                Defaults to the whole regmap.
+            namespace (str): Namespace of the element
+
+        Returns:
+            Optional[SearchMatch]: Match result if found, None otherwise.
+        """
+        if node is None or node is self._cmap or node is self._cmap.regmap:
+            first, end = 0, self._size
+        elif id(node) in self._bounds:
+            first, end = self._bounds[id(node)]
+        else:
+            # The node is not part of the indexed regmap
+            return search(name, cmap_type, node, namespace)
+
+        lower_name = name.lower()
+        best_match = None
+        best_position = end
+        for length in self._name_lengths:
+            if length > len(lower_name):
+                break
+            prefix = lower_name[:length]
+            positions = self._positions.get(prefix)
+            if positions is None:
+                continue
+            nodes = self._nodes[prefix]
+            candidate = bisect_left(positions, first)
+            while candidate < len(positions) and positions[candidate] < best_position:
+                match = _shallow_search(name, cmap_type, nodes[candidate], namespace)
+                if match:
+                    best_match = match
+                    best_position = positions[candidate]
+                    break
+                candidate += 1
+
+        return best_match
@@ -6,16 +6,20 @@ import textwrap
 import sys
 from .tahini_cmap import TahiniCmap
 from .tahini_crc import TahiniCrc
+from .crc_batch import InvalidCrcManifestError, load_crc_manifest, crc_batch_stamp, format_crc_summary
 from .tahini_gimli import TahiniGimli
 from .tahini_version import TahiniVersion
-from .legacy_json_to_header import legacy_json_to_c_header
+from .legacy_json_to_header import legacy_json_to_c_header, legacy_json_save_c_header
 from .legacy_json_converter import legacy_json_to_input_regmap
+from .legacy_json_batch import legacy_json_batch_convert, DEFAULT_LEGACY_PATTERN
 from .tahini_generate_flat_txt import GenerateFlatTxt
 from .tahini_generate_appnote_csv import GenerateAppnoteCSV
 from .tahini_generate_txt import GenerateTxt
 from .tahini_generate_api_cheader import GenerateApiCheader
 from .tahini_add_json_info import TahiniAddJsonInfo
 from .tahini_remove_param_prefix import TahiniRemoveParamPrefix
+from .tahini_transform import TahiniTransform, InvalidTransformError
+from .build_timestamp import set_source_date_epoch, InvalidTimestampError, SOURCE_DATE_EPOCH
 
 class Tahini():
     """Class for Tahini Command Line implementation
@@ -33,23 +37,36 @@ class Tahini():
                                 Usage: tahini removeparamprefix <json-path.json> --output <json-path.json>
             addjsoninfo       Combine gimli generated JSON input file with additional one with extra information when needed (e.g. Rumba S10)
                                 Usage: tahini addjsoninfo <json-path.json> <additional-json-path.json> --output <json-path.json>
+            transform         Apply several transforms (removeparamprefix, addjsoninfo=<additional-json-path.json>) in one pass
+                                Usage: tahini transform <json-path.json> <transform> [<transform> ...] --output <json-path.json>
             version           Generate version json file
                                 Usage: tahini version <device-type> <project-path> <build-config-name> <build-config-id> --output <version.info.json>
+            versionbatch      Generate the version json file and extended version json file of several build configurations
+                                Usage: tahini versionbatch <project-path> <build-configs.json> --output <output-dir>
             cmap              Generate cmap source file. This file is a source for other interpretations of the regmap (txt, csv, etc...)
                                 Usage: tahini cmap <project-path> <version-info-file> <input-json-path> outputs a Cmapsource File to stdout
+                                       tahini cmap <input-json-path> --extended_version_info_path <extended.version.info.json>
             crc               Create a CRC-appended ARM Cortex-M firmware binary
                                 Usage: tahini crc <firmware-file.bin> --output <firmware-file.bin>
+                                       tahini crc --batch <manifest.json>
+                                       tahini crc <firmware-file.bin> --verify
             flattxt           Generate flat txt regmap. 
                                 Usage: tahini flattxt <cmap-json-path> --output <flat-txt-path.txt>
             csv               Generate csv regmap file (usually for appnotes).
                                 Usage: tahini csv <cmap-json-path> --output <csv-file.csv>
             txt               Generate human-readable regmap txt file
                                 Usage: tahini txt <cmap-json-path> --output <txt-path.txt>
+            legacy            Generate an input json file from a legacy json file
+                                Usage: tahini legacy <legacy-json-path> --output <input-json-path.json>
+                                       tahini legacy --batch <legacy-json-dir> --output <output-dir>
             legacycheader     Generate old-style json header for compatipiliti with Tzatziki
                                 Usage: tahini legacycheader <legacy-json-path> --output <legacy-header.json>
+                                       tahini legacycheader --batch <legacy-json-dir> --output <output-dir>
             apicheader        Generate API c header for the API code
                                 Usage: tahini apicheader <cmap-json-path> --output <c-header.h>
         All these commands can output the result to stdout if `--output` is not set.
+        The date embedded by version, versionbatch, legacycheader and apicheader is taken from the SOURCE_DATE_EPOCH
+        environment variable or from `--timestamp` when set, so that identical inputs give identical outputs.
         For more detailed help, type "tahini <command> -h" '''))
 
         parser.add_argument('command', help='tahini subcommand', nargs=1)
@@ -167,6 +184,33 @@ class Tahini():
         sys.stdout = stdout
         # pylint: enable=consider-using-with
 
+    def transform(self):
+        """
+        Apply a list of transforms to an input json file, loading and writing it only once
+        """
+        parser = argparse.ArgumentParser(
+            description="Apply a list of transforms, in order, to a gimli generated JSON input file",
+            usage=
+                "tahini transform <json-path.json> <transform> [<transform> ...] --output <json-path.json>")
+        parser.add_argument('command', help=argparse.SUPPRESS)
+        parser.add_argument("input_json_path", help="Path to gimli generated input json file. Example: path/to/stmh")
+        parser.add_argument("transforms", nargs='+',
+            help="Transforms to apply, in order: `removeparamprefix` or `addjsoninfo=<additional-json-path.json>`")
+        parser.add_argument("--output", required=False,
+            help="Write the result into the file specified instead of overwriting the input json file.")
+        args = parser.parse_args()
+
+        try:
+            transforms = [TahiniTransform.transform_from_description(description)
+                          for description in args.transforms]
+        except InvalidTransformError as exc:
+            parser.error(str(exc))
+        json_output = TahiniTransform.transform_input_json_path(args.input_json_path, transforms)
+
+        output_path = args.output if args.output is not None else args.input_json_path
+        with open(output_path, "w", encoding="UTF-8") as output:
+            output.write(json_output.to_json(indent=4))
+
     def version(self):
         """
         Write version.info.json file
@@ -187,7 +231,9 @@ class Tahini():
             help="Write the result into the file specified instead of the standard output.")
         parser.add_argument("--device_display_name", required=False,
             help="Device name that should be displayed in customer facing files")
+        self._add_timestamp_argument(parser)
         args = parser.parse_args()
+        self._apply_timestamp(parser, args)
 
         if args.fw_uid == "" or args.fw_uid is None:
             fw_uid = "0x0"
@@ -219,6 +265,37 @@ class Tahini():
         sys.stdout = stdout
         # pylint: enable=consider-using-with
 
+    def versionbatch(self):
+        """
+        Write the version.info.json and extended version info files of several build configurations
+        """
+
+        parser = argparse.ArgumentParser(
+            description="Generate basic and extended version info of several build configurations with one git scan",
+            usage="tahini versionbatch <project-path> <build-configs-json> --output=<output-dir> "
+                  "[--merges_since_last_tag]")
+        parser.add_argument('command', help=argparse.SUPPRESS)
+        parser.add_argument("project_path", help="Firmware Project Path. Example: path/to/stmh")
+        parser.add_argument("configs_path",
+                            help="json file with the list of build configurations. Example: "
+                                 '[{"device_type": "cm824_4ws", "config_name": "fw_cm8x4_4ws", "config_id": 9, '
+                                 '"device_display_name": "CM824", "fw_uid": "0x1234"}]')
+        parser.add_argument("--output", required=True,
+                            help="Directory where a sub-directory is created for each build configuration.")
+        parser.add_argument("--merges_since_last_tag", action="store_true",
+                            help="Only list the branches merged since the last tag of each repository, instead of "
+                                 "scanning the whole git history.")
+        self._add_timestamp_argument(parser)
+        args = parser.parse_args()
+        self._apply_timestamp(parser, args)
+
+        configs = TahiniVersion.load_version_configs(args.configs_path)
+        output_paths = TahiniVersion.create_config_version_infos(args.project_path, configs, args.output,
+                                                                 args.merges_since_last_tag)
+        for version_info_path, extended_version_info_path in output_paths:
+            print(version_info_path)
+            print(extended_version_info_path)
+
     def cmap(self):
         """
         Generate cmap source file
@@ -226,18 +303,31 @@ class Tahini():
 
         parser = argparse.ArgumentParser(
             description="Combine version info with an Input JSON file to form a Cmapsource file",
-            usage="tahini cmap <project-path> <version-info-path> <input-json-path> [--output=<file-path>]")
+            usage="tahini cmap [<project-path> <version-info-path>] <input-json-path> [--output=<file-path>] "
+                  "[--merges_since_last_tag] [--extended_version_info_path=<file-path>]")
         parser.add_argument('command', help=argparse.SUPPRESS)
-        parser.add_argument("project_path", help="Path to the git repository")
-        parser.add_argument("version_info_path", help="Path to Version info file")
+        parser.add_argument("project_path", nargs="?", help="Path to the git repository")
+        parser.add_argument("version_info_path", nargs="?", help="Path to Version info file")
         parser.add_argument("input_json_path", help="Path to Input JSON file")
         parser.add_argument("--output", required=False,
                             help="Write the result into the file specified instead of the standard output.")
+        parser.add_argument("--merges_since_last_tag", action="store_true",
+                            help="Only list the branches merged since the last tag of each repository, instead of "
+                                 "scanning the whole git history.")
+        parser.add_argument("--extended_version_info_path", required=False,
+                            help="Use an extended version info file (see `tahini versionbatch`) instead of "
+                                 "collecting the git information from <project-path> and <version-info-path>.")
         args = parser.parse_args()
 
-        cmap = TahiniCmap.cmap_fullregmap_from_input_json_path(project_path=args.project_path,
-                                                               version_info_path=args.version_info_path,
-                                                               input_json_path=args.input_json_path)
+        if args.extended_version_info_path is None and args.version_info_path is None:
+            parser.error("<project-path> and <version-info-path> are required without --extended_version_info_path")
+
+        cmap = TahiniCmap.cmap_fullregmap_from_input_json_path(
+            project_path=args.project_path,
+            version_info_path=args.version_info_path,
+            input_json_path=args.input_json_path,
+            extended_version_info_path=args.extended_version_info_path,
+            merges_since_last_tag=args.merges_since_last_tag)
 
         # pylint: disable=consider-using-with
         stdout = sys.stdout
@@ -258,14 +348,43 @@ class Tahini():
 
         parser = argparse.ArgumentParser(
             description="Create a CRC-appended ARM Cortex-M firmware binary",
-            usage="tahini crc <input-binary-file> [-v] [--output=<file-path>]")
+            usage="tahini crc <input-binary-file> [-v] [--output=<file-path>]\n"
+                  "       tahini crc --batch <manifest.json> [--jobs=<n>]\n"
+                  "       tahini crc <stamped-binary-file> --verify")
         parser.add_argument('command', help=argparse.SUPPRESS)
-        parser.add_argument("input_file", help="Input binary file")
+        parser.add_argument("input_file", help="Input binary file, or manifest in batch mode")
         parser.add_argument('-v', '--verbose', action="store_true", help="Activate verbose output")
         parser.add_argument("--output", required=False,
             help="Write the result into the file specified instead of the standard output.")
+        parser.add_argument("--batch", action="store_true",
+            help="Stamp all the images listed in the json manifest <input-binary-file>, e.g. "
+                 "[{\"input\": \"fw.bin\", \"output\": \"fw_crc.bin\"}, ...], and print their size and CRC")
+        parser.add_argument("--jobs", type=int, default=None,
+            help="Number of processes used in batch mode. Default: number of CPUs")
+        parser.add_argument("--verify", action="store_true",
+            help="Check the size and CRC of an already stamped image. Exits with status 1 if they are wrong")
         args = parser.parse_args()
 
+        if args.verify:
+            if args.output is not None or args.batch:
+                parser.error("--output and --batch cannot be used with --verify")
+            if not TahiniCrc.verify(args.input_file):
+                sys.exit(1)
+            print(f"{args.input_file}: size and CRC OK")
+            return
+
+        if args.batch:
+            if args.output is not None or args.verbose:
+                parser.error("--output and --verbose cannot be used in batch mode")
+            try:
+                results = crc_batch_stamp(load_crc_manifest(args.input_file), jobs=args.jobs)
+            except (InvalidCrcManifestError, OSError, AssertionError) as exc:
+                # AssertionError: an input image is too small or already stamped
+                sys.stderr.write(f"{exc}\n")
+                sys.exit(1)
+            print(format_crc_summary(results))
+            return
+
         # pylint: disable=consider-using-with
         stdout = sys.stdout
         if args.output is not None:
@@ -286,13 +405,19 @@ class Tahini():
         """
         parser = argparse.ArgumentParser(
             description="Combine version info with an Input JSON file to form a Cmapsource file",
-            usage="tahini legacy <legacy-json-path> [--output=<input-json-path>]")
+            usage="tahini legacy <legacy-json-path> [--output=<input-json-path>]\n"
+                  "       tahini legacy --batch <legacy-json-dir> --output=<output-dir> [--jobs=<n>]")
         parser.add_argument('command', help=argparse.SUPPRESS)
         parser.add_argument("legacy_json_path", help="Path to the Legacy json file")
         parser.add_argument("--output", required=False,
             help="Write the result into the file specified instead of the standard output.")
+        self._add_legacy_batch_arguments(parser)
         args = parser.parse_args()
 
+        if args.batch:
+            self._legacy_batch(parser, args, c_header=False)
+            return
+
         input_json = legacy_json_to_input_regmap(args.legacy_json_path).to_json()
 
         if args.output is not None:
@@ -307,20 +432,70 @@ class Tahini():
         """
         parser = argparse.ArgumentParser(
             description="Generate a C header file from a legacy json file",
-            usage="tahini legacycheader <legacy-json-path> [--output=<input-json-path>]")
+            usage="tahini legacycheader <legacy-json-path> [--output=<input-json-path>]\n"
+                  "       tahini legacycheader --batch <legacy-json-dir> --output=<output-dir> [--jobs=<n>]")
         parser.add_argument('command', help=argparse.SUPPRESS)
         parser.add_argument("legacy_json_path", help="Path to the Legacy json file")
         parser.add_argument("--output", required=False,
             help="Write the result into the file specified instead of the standard output.")
+        self._add_legacy_batch_arguments(parser)
+        self._add_timestamp_argument(parser)
         args = parser.parse_args()
+        self._apply_timestamp(parser, args)
 
-        header_file = legacy_json_to_c_header(args.legacy_json_path)
+        if args.batch:
+            self._legacy_batch(parser, args, c_header=True)
+            return
 
         if args.output is not None:
-            with open(args.output, "w", encoding="utf-8") as output:
-                output.write(header_file)
+            legacy_json_save_c_header(args.legacy_json_path, args.output)
         else:
-            print(header_file)
+            print(legacy_json_to_c_header(args.legacy_json_path))
+
+    @staticmethod
+    def _add_timestamp_argument(parser: argparse.ArgumentParser) -> None:
+        """
+        Add the argument setting the date embedded in the generated files
+        """
+        parser.add_argument("--timestamp", required=False,
+            help="Date embedded in the generated files, as seconds since 1970-01-01 UTC or ISO 8601 date. "
+                 f"Overrides the {SOURCE_DATE_EPOCH} environment variable. Default: current date")
+
+    @staticmethod
+    def _apply_timestamp(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+        """
+        Set the date embedded in the generated files from the --timestamp argument
+        """
+        if args.timestamp is not None:
+            try:
+                set_source_date_epoch(args.timestamp)
+            except InvalidTimestampError as exc:
+                parser.error(str(exc))
+
+    @staticmethod
+    def _add_legacy_batch_arguments(parser: argparse.ArgumentParser) -> None:
+        """
+        Add the arguments used to convert a directory of legacy json files
+        """
+        parser.add_argument("--batch", action="store_true",
+            help="Convert all the legacy json files of the directory <legacy-json-path> into the directory "
+                 "specified by --output. Each file is named after the legacy file, up to the first '.'")
+        parser.add_argument("--pattern", default=DEFAULT_LEGACY_PATTERN,
+            help=f"Pattern of the legacy json file names converted in batch mode. Default: {DEFAULT_LEGACY_PATTERN}")
+        parser.add_argument("--jobs", type=int, default=None,
+            help="Number of processes used in batch mode. Default: number of CPUs")
+
+    @staticmethod
+    def _legacy_batch(parser: argparse.ArgumentParser, args: argparse.Namespace, c_header: bool) -> None:
+        """
+        Convert a directory of legacy json files
+        """
+        if args.output is None:
+            parser.error("--output must specify the output directory in batch mode")
+
+        output_paths = legacy_json_batch_convert(args.legacy_json_path, args.output, c_header=c_header,
+                                                 pattern=args.pattern, jobs=args.jobs)
+        print(f"{len(output_paths)} legacy json file(s) converted into {args.output}")
 
     def flattxt(self):
         """
@@ -380,8 +555,10 @@ class Tahini():
             help="Write the result into the file specified.")
         parser.add_argument("--cml_owned_regs", required=False, type=str, nargs='+',
             help="parent block names of registers that CML control. Not required if all registers controlled by CML")
+        self._add_timestamp_argument(parser)
 
         args = parser.parse_args()
+        self._apply_timestamp(parser, args)
         GenerateApiCheader.from_cmapsource_path(args.cmap_path, args.output, args.cml_owned_regs)
 
 
@@ -3,7 +3,9 @@ This file contains methods to add json information, such as Cref, briefs... to t
 input json file from the compiled code
 """
 
-from typing import Union, Optional
+from dataclasses import fields
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple, Union, Optional
 import warnings
 from .input_json_schema import InputJson, InputRegmap, InputEnum
 
@@ -18,6 +20,124 @@ def object_not_found_warning(name):
     warnings.warn(f"Object with name {name} specified in the additional "
                         "json file was not found in the input json regmap")
 
+@lru_cache(maxsize=None)
+def _field_names(obj_type: type) -> Tuple[str, ...]:
+    """Get the names of the fields of an input json dataclass, in declaration order
+
+    Args:
+        obj_type (type): InputRegmap, InputEnum or InputEnum.InputEnumChild
+
+    Returns:
+        Tuple[str, ...]: Names of the fields
+    """
+    return tuple(obj_field.name for obj_field in fields(obj_type))
+
+
+class _NameIndex:
+    """Name lookup tables built once over a tree of input json objects (regmap or enums).
+
+    For every list of siblings in the tree, the index records the position of the first object with a
+    given name, and the positions of the containers holding that name somewhere in their children.
+    A lookup therefore only descends into the branches where the name can be found.
+    """
+
+    def __init__(self, nodes: list, is_leaf: Callable[[Any], bool], get_children: Callable[[Any], list]):
+        """Build the index over a list of objects
+
+        Args:
+            nodes (list): Top level list of objects to index
+            is_leaf (Callable[[Any], bool]): Returns False for the objects whose children must be searched
+            get_children (Callable[[Any], list]): Returns the list of children of a container object
+        """
+        self._is_leaf = is_leaf
+        self._get_children = get_children
+        self._first_any: Dict[int, Dict[str, int]] = {}
+        self._first_leaf: Dict[int, Dict[str, int]] = {}
+        self._containers: Dict[int, Dict[str, List[int]]] = {}
+        self._index_level(nodes)
+
+    def _index_level(self, nodes: list) -> set:
+        """Index a list of siblings and, recursively, the children of its containers
+
+        Args:
+            nodes (list): List of siblings
+
+        Returns:
+            set: All the names found in the list and below
+        """
+        first_any = {}
+        first_leaf = {}
+        containers = {}
+        names = set()
+        for position, node in enumerate(nodes):
+            first_any.setdefault(node.name, position)
+            names.add(node.name)
+            if self._is_leaf(node):
+                first_leaf.setdefault(node.name, position)
+            else:
+                children_names = self._index_level(self._get_children(node))
+                for name in children_names:
+                    containers.setdefault(name, []).append(position)
+                names |= children_names
+
+        self._first_any[id(nodes)] = first_any
+        self._first_leaf[id(nodes)] = first_leaf
+        self._containers[id(nodes)] = containers
+        return names
+
+    def lookup(self, nodes: list, name: str, leaf_only: bool) -> list:
+        """Find the objects that a recursive search for `name` in `nodes` would stop at.
+
+        The siblings are visited in order: containers are searched recursively until the first object
+        matching the name is found at the current level, which ends the search of that level.
+
+        Args:
+            nodes (list): List of siblings to search, which must be part of the indexed tree
+            name (str): Name of the objects to find
+            leaf_only (bool): Only match leaf objects; containers with the same name are searched instead
+
+        Returns:
+            list: Matching objects, in the order of a depth-first search
+        """
+        if id(nodes) not in self._first_any:
+            self._index_level(nodes)
+
+        first = (self._first_leaf if leaf_only else self._first_any)[id(nodes)].get(name)
+
+        matches = []
+        for position in self._containers[id(nodes)].get(name, []):
+            if first is not None and position >= first:
+                break
+            matches.extend(self.lookup(self._get_children(nodes[position]), name, leaf_only))
+        if first is not None:
+            matches.append(nodes[first])
+        return matches
+
+    @staticmethod
+    def for_regmap(input_json_regmap: List[InputRegmap]) -> "_NameIndex":
+        """Index a regmap, searching inside the members of the structs
+
+        Args:
+            input_json_regmap (List[InputRegmap]): Regmap to index
+
+        Returns:
+            _NameIndex: Index of the regmap
+        """
+        return _NameIndex(input_json_regmap, lambda obj: obj.type != "struct", lambda obj: obj.members)
+
+    @staticmethod
+    def for_enums(input_json_enums: List[InputEnum]) -> "_NameIndex":
+        """Index a list of enums, searching inside their enumerators
+
+        Args:
+            input_json_enums (List[InputEnum]): Enums to index
+
+        Returns:
+            _NameIndex: Index of the enums
+        """
+        return _NameIndex(input_json_enums, lambda obj: isinstance(obj, InputEnum.InputEnumChild),
+                          lambda obj: obj.enumerators)
+
 class TahiniAddJsonInfo:
     """Class contains the necessary definitions to combine 2 input json files
     """
@@ -38,103 +158,102 @@ class TahiniAddJsonInfo:
 
         input_json_obj = InputJson.load_json(input_json_path)
         additional_json_obj = InputJson.load_json(additional_json_path)
+        TahiniAddJsonInfo.combine_input_json(input_json_obj, additional_json_obj)
+
+        return input_json_obj
+
+    @staticmethod
+    def combine_input_json(input_json_obj: InputJson, additional_json_obj: InputJson) -> None:
+        """Combine an already loaded input json object with additional information
 
+        Args:
+            input_json_obj (InputJson): gimli generated input json, modified in place
+            additional_json_obj (InputJson): additional information (brief, cmap_name...)
+        """
         if additional_json_obj.regmap[0].name != "None": # Nothing to add
+            regmap_index = _NameIndex.for_regmap(input_json_obj.regmap)
             for additional_regmap_obj in additional_json_obj.regmap:
-                object_found = TahiniAddJsonInfo.combine_regmap(input_json_obj.regmap, additional_regmap_obj)
+                object_found = TahiniAddJsonInfo.combine_regmap(input_json_obj.regmap, additional_regmap_obj,
+                                                                regmap_index)
                 if object_found is False:
                     object_not_found_warning(additional_regmap_obj.name)
 
         if additional_json_obj.enums[0].name != "None": # Nothing to add
+            enums_index = _NameIndex.for_enums(input_json_obj.enums)
             for additional_enum in additional_json_obj.enums:
-                object_found = TahiniAddJsonInfo.combine_enums(input_json_obj.enums, additional_enum)
+                object_found = TahiniAddJsonInfo.combine_enums(input_json_obj.enums, additional_enum, enums_index)
                 if object_found is False:
                     object_not_found_warning(additional_enum.name)
 
-        return input_json_obj
-
 
     @staticmethod
-    def combine_regmap(input_json_regmap: list[InputRegmap], additional_regmap_obj: InputRegmap) -> bool:
+    def combine_regmap(input_json_regmap: list[InputRegmap], additional_regmap_obj: InputRegmap,
+                       index: Optional[_NameIndex] = None) -> bool:
         """ Adds additonal information from extra json regmap entries to input json file 
 
         Args:
             input_json_regmap (list[InputRegmap]): list of InputRegmap objects to replace information from
             additional_regmap_obj (InputRegmap): InputRegmap object from which information is to be added
+            index (_NameIndex, optional): Index of the input json regmap containing `input_json_regmap`.
+                Built from `input_json_regmap` if not provided.
 
         Returns:
             bool: indicates whether the additional InputRegmap object has been found in the input json file
         """
-        object_found = False
+        if index is None:
+            index = _NameIndex.for_regmap(input_json_regmap)
+
         if additional_regmap_obj.type != "struct":
-            for obj in input_json_regmap:
-                if obj.type != "struct":
-                    if obj.name == additional_regmap_obj.name:
-                        object_found = True
-                        # Replace fields in object with ones from additional json object
-                        TahiniAddJsonInfo.replace_fields(obj, additional_regmap_obj, None)
-                        break
-                # Search for json object inside struct
-                elif TahiniAddJsonInfo.combine_regmap(obj.members, additional_regmap_obj) is True:
-                    object_found = True
+            matches = index.lookup(input_json_regmap, additional_regmap_obj.name, leaf_only=True)
+            for obj in matches:
+                # Replace fields in object with ones from additional json object
+                TahiniAddJsonInfo.replace_fields(obj, additional_regmap_obj, None)
         else:
-            for input_json_obj in input_json_regmap:
-                if input_json_obj.name == additional_regmap_obj.name:
-                    # Add additional fields in struct except members
-                    TahiniAddJsonInfo.replace_fields(input_json_obj, additional_regmap_obj, "members")
-                    object_found = True
-                    # Add information from members inside struct
-                    for sub_additional_regmap in additional_regmap_obj.members:
-                        if sub_additional_regmap.name != "None" and not\
-                            TahiniAddJsonInfo.combine_regmap(input_json_obj.members, sub_additional_regmap):
-                            object_not_found_warning(sub_additional_regmap.name)
-                    break
-                if input_json_obj.type == "struct":
-                    # Look for struct inside struct to replace variables and members
-                    if TahiniAddJsonInfo.combine_regmap(input_json_obj.members, additional_regmap_obj):
-                        object_found = True
-        return object_found
+            matches = index.lookup(input_json_regmap, additional_regmap_obj.name, leaf_only=False)
+            for input_json_obj in matches:
+                # Add additional fields in struct except members
+                TahiniAddJsonInfo.replace_fields(input_json_obj, additional_regmap_obj, "members")
+                # Add information from members inside struct
+                for sub_additional_regmap in additional_regmap_obj.members:
+                    if sub_additional_regmap.name != "None" and not\
+                        TahiniAddJsonInfo.combine_regmap(input_json_obj.members, sub_additional_regmap, index):
+                        object_not_found_warning(sub_additional_regmap.name)
+        return len(matches) > 0
 
     @staticmethod
-    def combine_enums(input_json_enums: list[InputEnum], additional_enum: InputEnum) -> bool:
+    def combine_enums(input_json_enums: list[InputEnum], additional_enum: InputEnum,
+                      index: Optional[_NameIndex] = None) -> bool:
         """ Adds additonal information from extra json enum entries to input json file 
 
          Args:
             input_json_enums (list[InputEnum]): list of InputEnum objects to replace information from
             additional_enum (InputEnum): InputEnum object from which information is to be added
+            index (_NameIndex, optional): Index of the input json enums containing `input_json_enums`.
+                Built from `input_json_enums` if not provided.
 
         Returns:
             bool: indicates whether the additional InputEnum object has been found in the input json file
         """
-        object_found = False
+        if index is None:
+            index = _NameIndex.for_enums(input_json_enums)
+
         if isinstance(additional_enum, InputEnum.InputEnumChild):
-            for obj in input_json_enums:
-                if isinstance(obj, InputEnum.InputEnumChild):
-                    if obj.name == additional_enum.name:
-                        object_found = True
-                        # Replace fields in object with ones from additional json object
-                        TahiniAddJsonInfo.replace_fields(obj, additional_enum, None)
-                        break
-                elif TahiniAddJsonInfo.combine_enums(obj.enumerators, additional_enum):
-                    object_found = True
+            matches = index.lookup(input_json_enums, additional_enum.name, leaf_only=True)
+            for obj in matches:
+                # Replace fields in object with ones from additional json object
+                TahiniAddJsonInfo.replace_fields(obj, additional_enum, None)
         else:
             # If not enumChild, replace fields and then add information of enumerators within
-            for input_json_enum in input_json_enums:
-                if input_json_enum.name == additional_enum.name:
-                    # Replace fields
-                    TahiniAddJsonInfo.replace_fields(input_json_enum, additional_enum, "enumerators")
-                    object_found = True
-                    # Add information from enumerators inside enum
-                    for sub_additional_enum in additional_enum.enumerators:
-                        if sub_additional_enum != "None" and not\
-                            TahiniAddJsonInfo.combine_enums(input_json_enum.enumerators, sub_additional_enum):
-                            object_not_found_warning(sub_additional_enum.name)
-                    break
-                if isinstance(input_json_enum, InputEnum.InputEnumChild) is False:
-                    # Look inside enumerator to replace variables
-                    if TahiniAddJsonInfo.combine_enums(input_json_enum.enumerators, additional_enum):
-                        object_found = True
-        return object_found
+            matches = index.lookup(input_json_enums, additional_enum.name, leaf_only=False)
+            for input_json_enum in matches:
+                # Replace fields
+                TahiniAddJsonInfo.replace_fields(input_json_enum, additional_enum, "enumerators")
+                # Add information from enumerators inside enum
+                for sub_additional_enum in additional_enum.enumerators:
+                    if sub_additional_enum != "None" and not\
+                        TahiniAddJsonInfo.combine_enums(input_json_enum.enumerators, sub_additional_enum, index):
+                        object_not_found_warning(sub_additional_enum.name)
+        return len(matches) > 0
 
     @staticmethod
     def replace_fields(input_json_obj: Union[InputRegmap, InputEnum],
@@ -146,7 +265,7 @@ class TahiniAddJsonInfo:
             additional_obj (Union[InputRegmap, InputEnum.InputEnumChild]): object with information to add/replace
             not_to_replace (Optional[str]): which field should be ignored when replacing
         """
-        for variable in vars(additional_obj):
+        for variable in _field_names(type(additional_obj)):
             additional_obj_attr = getattr(additional_obj, variable)
             input_json_obj_attr = getattr(input_json_obj, variable)
             if additional_obj_attr is not None and variable != not_to_replace:
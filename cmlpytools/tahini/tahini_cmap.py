@@ -557,7 +557,8 @@ class TahiniCmap():
     def cmap_fullregmap_from_input_json_path(input_json_path: str,
                                              version_info_path: (Optional[str]) = None,
                                              project_path: Optional[str] = None,
-                                             extended_version_info_path: Optional[str] = None
+                                             extended_version_info_path: Optional[str] = None,
+                                             merges_since_last_tag: bool = False
                                              ) -> CmapFullRegmap:
         """Create a 'Cmap FullRegmap' object from an 'Input JSON' file
 
@@ -566,6 +567,8 @@ class TahiniCmap():
             version_info_path (str, optional): Specify version info file.
             project_path (str, optional): Path of the git repository. Only required if version_info_path is used.
             extended_version_info_path (str, optional): Use an extended version info file.
+            merges_since_last_tag (bool, optional): Only look for the branches merged since the last tag of each
+                repository. Defaults to False.
 
         Returns:
             CmapFullRegmap: Full cmap regmap
@@ -574,13 +577,15 @@ class TahiniCmap():
             input_json=InputJson.load_json(input_json_path),
             version_info_path=version_info_path,
             project_path=project_path,
-            extended_version_info_path=extended_version_info_path)
+            extended_version_info_path=extended_version_info_path,
+            merges_since_last_tag=merges_since_last_tag)
 
     @ staticmethod
     def cmap_fullregmap_from_input_json(input_json: InputJson,
                                         version_info_path: (Optional[str]) = None,
                                         project_path: Optional[str] = None,
-                                        extended_version_info_path: Optional[str] = None
+                                        extended_version_info_path: Optional[str] = None,
+                                        merges_since_last_tag: bool = False
                                         ) -> CmapFullRegmap:
         """Create a 'Cmap FullRegmap' object from an 'Input JSON' file
 
@@ -589,6 +594,8 @@ class TahiniCmap():
             version_info_path (str, optional): Specify version info file.
             project_path (str, optional): Path of the git repository. Only required if version_info_path is used.
             extended_version_info_path (str, optional): Use an extended version info file.
+            merges_since_last_tag (bool, optional): Only look for the branches merged since the last tag of each
+                repository. Defaults to False.
 
         Returns:
             CmapFullRegmap: Full cmap regmap
@@ -606,7 +613,8 @@ class TahiniCmap():
             )
         else:
             assert project_path is not None, "Error: version_info_path was specified but not project_path"
-            version_info = TahiniVersion.create_extended_version_info(project_path, version_info_path)
+            version_info = TahiniVersion.create_extended_version_info(project_path, version_info_path,
+                                                                      merges_since_last_tag)
             support_hif_access = version_info.device_type in {"cm8x4", "cm824"}
             cmap = CmapFullRegmap(
                 scheme=CmapScheme(2, 0),
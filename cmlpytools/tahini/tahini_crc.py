@@ -3,7 +3,24 @@ Repository class to generate a binary file with filesize and CRC metadata
 """
 import sys
 import os
-import crcmod
+from typing import BinaryIO, TextIO
+from .crc32 import Crc32, crc32_patch
+
+# Griffin requires a minimum 48-position vector table, and the image size is inserted in a reserved position
+# after the table
+SIZE_FIELD_OFFSET = 0xC0
+SIZE_FIELD_END = 0xC4
+
+# The image is processed in chunks of this size, so that it is never fully loaded in memory
+CHUNK_SIZE = 1 << 20
+
+CRC_SIZE = 4
+
+
+class InvalidImageError(Exception):
+    """Class used to handle binary images that are not stamped with their size and CRC
+    """
+    pass
 
 
 class TahiniCrc():
@@ -11,63 +28,214 @@ class TahiniCrc():
     """
 
     @staticmethod
-    def main(input_file_path: str, verbose: bool) -> None:
-        """Generate CRC-appended Griffin binary image and send to stdout
+    def _hex_dump(infile: BinaryIO, log: TextIO) -> None:
+        """Write the hex dump of a whole file, one chunk at a time
 
         Args:
-            input_file_path (str): FW Binary file path to be processed
-            verbose (bool): If True, also write process logs to `stderr`
+            infile (BinaryIO): File to dump, read from its current position
+            log (TextIO): Text stream where the dump is written
         """
+        separator = ""
+        for chunk in iter(lambda: infile.read(CHUNK_SIZE), b""):
+            log.write(separator + " ".join(f"{b:02x}" for b in chunk))
+            separator = " "
+        log.write("\n")
 
-        if not os.path.exists(input_file_path):
-            sys.stderr.write("File '" + input_file_path + "' does not exist\n")
-        else:
-            # Step 1: Get the file input
+    @staticmethod
+    def _copy_file(infile: BinaryIO, output: BinaryIO, offset: int, count: int) -> None:
+        """Copy part of a file to the output, in the kernel when both are real files
+
+        Args:
+            infile (BinaryIO): Input file
+            output (BinaryIO): Output stream
+            offset (int): Offset of the first byte to copy in the input file
+            count (int): Number of bytes to copy
+        """
+        try:
+            output_fd = output.fileno()
+        except (AttributeError, OSError):
+            output_fd = None
+
+        if output_fd is not None:
+            output.flush()
             try:
-                with open(input_file_path, 'rb') as infile:
-                    file_contents = infile.read()
-                    infile.close()
-            except IOError:
-                sys.stderr.write("Error while opening input file\n")
-
-            # Step 2: Produce output data by manipulating the input data
-            file_contents_bytes = bytearray(file_contents)
+                while count > 0:
+                    sent = os.sendfile(output_fd, infile.fileno(), offset, count)
+                    if sent == 0:
+                        break
+                    offset += sent
+                    count -= sent
+            except (AttributeError, OSError):
+                # sendfile() is not available, or not supported by these files
+                pass
+
+        infile.seek(offset)
+        while count > 0:
+            chunk = infile.read(min(count, CHUNK_SIZE))
+            if not chunk:
+                break
+            output.write(chunk)
+            count -= len(chunk)
+
+    @staticmethod
+    def stamp(input_file_path: str, output: BinaryIO, verbose: bool = False, quiet: bool = False) -> int:
+        """Write the Griffin binary image with its size inserted at offset 0xC0 and its CRC appended. The image is
+        streamed: only one chunk is held in memory, and the copy is done by the kernel when possible.
+
+        Args:
+            input_file_path (str): FW Binary file path to be processed
+            output (BinaryIO): Binary stream where the image is written
+            verbose (bool, optional): If True, also write process logs to `stderr`. Defaults to False.
+            quiet (bool, optional): If True, do not write the file size and CRC to `stderr`. Defaults to False.
+
+        Returns:
+            int: CRC32 of the image containing its size
+        """
+        with open(input_file_path, 'rb') as infile:
             if verbose:
                 sys.stderr.write("Input .bin image dump\n")
-                sys.stderr.write(" ".join(f"{b:02x}" for b in file_contents_bytes) + "\n")
-
-            # Step 2.1: Insert the image size at offset 0xC0. Griffin requires a minimum 48-position
-            # vector table, and the image size is inserted in a reserved position after the table.
-            # First do a couple of sanity checks
-            file_size = os.path.getsize(input_file_path)
-            assert file_size >= 0xC4, "Error: Input file too small"
-            size_field = int.from_bytes(file_contents_bytes[0xC0:0xC4], byteorder='little')
+                TahiniCrc._hex_dump(infile, sys.stderr)
+                infile.seek(0)
+
+            # Insert the image size at offset 0xC0. First do a couple of sanity checks
+            file_size = os.fstat(infile.fileno()).st_size
+            assert file_size >= SIZE_FIELD_END, "Error: Input file too small"
+            header = bytearray(infile.read(min(file_size, CHUNK_SIZE)))
+            size_field = int.from_bytes(header[SIZE_FIELD_OFFSET:SIZE_FIELD_END], byteorder='little')
             assert size_field == 0, "Error: Input file contains non-zero size placeholder"
 
-            # Now update the dataset
-            sys.stderr.write(f"File size {file_size} bytes (0x{file_size:08x})\n")
+            if not quiet:
+                sys.stderr.write(f"File size {file_size} bytes (0x{file_size:08x})\n")
             file_size_bytes = file_size.to_bytes(4, byteorder='little')
             if verbose:
                 sys.stderr.write("Size LE\n")
                 sys.stderr.write(" ".join(f"{b:02x}" for b in file_size_bytes) + "\n")
-            file_contents_bytes[0xC0] = file_size_bytes[0]
-            file_contents_bytes[0xC1] = file_size_bytes[1]
-            file_contents_bytes[0xC2] = file_size_bytes[2]
-            file_contents_bytes[0xC3] = file_size_bytes[3]
-
-            # Step 2.2: Calculate CRC over the entire image that now contains its own size
-            # CRCmod seems to to something unexpected with the final xor (xorOut),
-            # so this final step is done externally instead to produce the expected CRC32
-            crc32_func = crcmod.mkCrcFun(0x1C9D204F5, initCrc=0xFFFFFFFF, rev=True, xorOut=0)
-            crc32 = crc32_func(file_contents_bytes) ^ 0xFFFFFFFF
-            sys.stderr.write(f"CRC value is 0x{crc32:08x}\n")
-
-            # Step 2.3: Insert the CRC at the end of the file, little endian
-            crc32_bytes = crc32.to_bytes(4, byteorder='little')
+            header[SIZE_FIELD_OFFSET:SIZE_FIELD_END] = file_size_bytes
+
+            # Calculate CRC over the entire image that now contains its own size
+            crc = Crc32()
+            crc.update(header)
+            buffer = bytearray(CHUNK_SIZE)
+            view = memoryview(buffer)
+            while True:
+                length = infile.readinto(buffer)
+                if not length:
+                    break
+                crc.update(view[:length])
+            if not quiet:
+                sys.stderr.write(f"CRC value is 0x{crc.value:08x}\n")
+
+            # Insert the CRC at the end of the file, little endian
+            crc32_bytes = crc.value.to_bytes(CRC_SIZE, byteorder='little')
             if verbose:
                 sys.stderr.write("CRC LE\n")
                 sys.stderr.write(" ".join(f"{b:02x}" for b in crc32_bytes) + "\n")
-            file_contents_bytes = file_contents_bytes + crc32_bytes
 
-            # Step 3: Produce the output, send to stdout
-            sys.stdout.write(file_contents_bytes)
+            output.write(header)
+            TahiniCrc._copy_file(infile, output, len(header), file_size - len(header))
+            output.write(crc32_bytes)
+
+        return crc.value
+
+    @staticmethod
+    def verify(image_path: str) -> bool:
+        """Check the size and CRC of an image stamped by `tahini crc`
+
+        Args:
+            image_path (str): Path to the stamped image
+
+        Returns:
+            bool: True if the size field matches the image size and the CRC matches the image content
+        """
+        with open(image_path, 'rb') as infile:
+            file_size = os.fstat(infile.fileno()).st_size - CRC_SIZE
+            if file_size < SIZE_FIELD_END:
+                sys.stderr.write(f"Image too small: {file_size + CRC_SIZE} bytes\n")
+                return False
+
+            crc = Crc32()
+            buffer = bytearray(CHUNK_SIZE)
+            view = memoryview(buffer)
+            size_field = None
+            while crc.length < file_size:
+                length = infile.readinto(view[:min(CHUNK_SIZE, file_size - crc.length)])
+                if size_field is None:
+                    size_field = int.from_bytes(buffer[SIZE_FIELD_OFFSET:SIZE_FIELD_END], byteorder='little')
+                crc.update(view[:length])
+            crc_field = int.from_bytes(infile.read(CRC_SIZE), byteorder='little')
+
+        valid = True
+        if size_field != file_size:
+            sys.stderr.write(f"Size field is {size_field} bytes (0x{size_field:08x}), "
+                             f"expected {file_size} bytes (0x{file_size:08x})\n")
+            valid = False
+        if crc_field != crc.value:
+            sys.stderr.write(f"CRC field is 0x{crc_field:08x}, expected 0x{crc.value:08x}\n")
+            valid = False
+        return valid
+
+    @staticmethod
+    def patch(image_path: str, offset: int, data: bytes) -> int:
+        """Overwrite some bytes of an image stamped by `tahini crc`, and update its CRC without reading the rest of
+        the image. The cost is proportional to the patch size plus log(image size), e.g. to stamp per-unit
+        parameter variants of one firmware.
+
+        Args:
+            image_path (str): Path to the stamped image, updated in place
+            offset (int): Offset of the patched bytes
+            data (bytes): New bytes
+
+        Raises:
+            InvalidImageError: The image is not stamped, or the patch overlaps the size field or the CRC
+
+        Returns:
+            int: New CRC32 of the image
+        """
+        with open(image_path, 'r+b') as image:
+            file_size = os.fstat(image.fileno()).st_size - CRC_SIZE
+            if file_size < SIZE_FIELD_END:
+                raise InvalidImageError(f"The image {image_path} is too small to be stamped")
+            image.seek(SIZE_FIELD_OFFSET)
+            size_field = int.from_bytes(image.read(SIZE_FIELD_END - SIZE_FIELD_OFFSET), byteorder='little')
+            if size_field != file_size:
+                raise InvalidImageError(f"The image {image_path} is not stamped with its size")
+            if offset < 0 or offset + len(data) > file_size:
+                raise InvalidImageError(f"The patch at offset 0x{offset:x} of {len(data)} bytes overlaps the CRC")
+            if offset < SIZE_FIELD_END and offset + len(data) > SIZE_FIELD_OFFSET:
+                raise InvalidImageError(f"The patch at offset 0x{offset:x} of {len(data)} bytes overlaps the size "
+                                        "field")
+
+            image.seek(file_size)
+            crc = int.from_bytes(image.read(CRC_SIZE), byteorder='little')
+            image.seek(offset)
+            old_data = image.read(len(data))
+            crc = crc32_patch(crc, file_size, offset, old_data, data)
+
+            image.seek(offset)
+            image.write(data)
+            image.seek(file_size)
+            image.write(crc.to_bytes(CRC_SIZE, byteorder='little'))
+        return crc
+
+    @staticmethod
+    def main(input_file_path: str, verbose: bool) -> None:
+        """Generate CRC-appended Griffin binary image and send to stdout
+
+        Args:
+            input_file_path (str): FW Binary file path to be processed
+            verbose (bool): If True, also write process logs to `stderr`
+        """
+
+        if not os.path.exists(input_file_path):
+            sys.stderr.write("File '" + input_file_path + "' does not exist\n")
+            return
+
+        try:
+            with open(input_file_path, 'rb'):
+                pass
+        except IOError:
+            sys.stderr.write("Error while opening input file\n")
+            return
+
+        # Errors while writing the output are raised, the output would be truncated
+        TahiniCrc.stamp(input_file_path, sys.stdout, verbose)
@@ -1,7 +1,6 @@
 """Generate C header files used in customer api code
 """
 from io import TextIOWrapper
-import datetime
 import os
 from .cmap_schema import FullRegmap as CmapFullRegmap
 from .cmap_schema import Regmap as CmapRegmap
@@ -9,6 +8,7 @@ from .cmap_schema import Type as CmapType
 from .cmap_schema import RegisterOrStruct as CmapRegisterOrStruct
 from .cmap_schema import VisibilityOptions as CmapVisibilityOptions
 from .version_schema import ExtendedVersionInfo
+from .build_timestamp import build_date
 
 
 HEADER_TEMPLATE = \
@@ -232,7 +232,7 @@ class GenerateApiCheader():
             version (ExtendedVersionInfo): firmware git tag and commit version information
             cml_owned_regs: list of register map blocks/structs that are defined by CML
         """
-        year = datetime.date.today().year
+        year = build_date().year
         header_guard = filename.replace(".", "_").replace("-", "_").upper()
         header = HEADER_TEMPLATE.replace("%%CHIP_NAME%%", version.device_display_name).replace("%%YEAR%%", str(year))
         header = header.replace("%%HEADER_GUARD%%", header_guard)
@@ -22,13 +22,21 @@ class TahiniRemoveParamPrefix:
         assert input_json_path is not None, "Error: input_json_path must be specified"
 
         input_json_obj = InputJson.load_json(input_json_path)
+        TahiniRemoveParamPrefix.remove_input_json_param_prefix(input_json_obj)
 
+        return input_json_obj
+
+    @staticmethod
+    def remove_input_json_param_prefix(input_json_obj: InputJson) -> None:
+        """Remove Param prefix from the registers of an already loaded input json object
+
+        Args:
+            input_json_obj (InputJson): InputJson object to modify in place
+        """
         if input_json_obj.regmap[0].name != "None": # Nothing to add
             for input_json_reg in input_json_obj.regmap:
                 TahiniRemoveParamPrefix.remove_reg_param_prefix(input_json_reg)
 
-        return input_json_obj
-
 
     @staticmethod
     def remove_reg_param_prefix(input_json_reg: InputRegmap):
@@ -37,12 +45,17 @@ class TahiniRemoveParamPrefix:
         Args:
             input_json_reg (InputRegmap): InputRegmap object to remove Param prefix from
         """
-        if input_json_reg.type != "struct":
-            if re.match("Param",input_json_reg.name) is not None:
-                input_json_reg.name = input_json_reg.name[5:]
-
-        else:
-            if re.match("Param",input_json_reg.name) is not None:
-                input_json_reg.name = input_json_reg.name[5:]
+        TahiniRemoveParamPrefix.remove_name_param_prefix(input_json_reg)
+        if input_json_reg.type == "struct":
             for reg in input_json_reg.members:
                 TahiniRemoveParamPrefix.remove_reg_param_prefix(reg)
+
+    @staticmethod
+    def remove_name_param_prefix(input_json_reg: InputRegmap):
+        """ Removes Param prefix from the name of a single register or struct, ignoring its members
+
+        Args:
+            input_json_reg (InputRegmap): InputRegmap object to remove Param prefix from
+        """
+        if re.match("Param",input_json_reg.name) is not None:
+            input_json_reg.name = input_json_reg.name[5:]
@@ -0,0 +1,173 @@
+"""
+This file implements a pipeline applying several transformations to a gimli generated input json file,
+loading and writing the file only once (e.g. removeparamprefix followed by addjsoninfo for Rumba S10)
+"""
+import abc
+from typing import Callable, Dict, List, Optional, Type
+from .input_json_schema import InputJson, InputRegmap
+from .tahini_add_json_info import TahiniAddJsonInfo
+from .tahini_remove_param_prefix import TahiniRemoveParamPrefix
+
+
+class InvalidTransformError(Exception):
+    """Class used to handle errors in the description of a transform
+    """
+    pass
+
+
+class InputJsonTransform(abc.ABC):
+    """Base class of a transformation applied to an input json object.
+
+    A transform that only needs to look at each regmap node independently returns a visitor from
+    `node_visitor()`, so that it can share a single traversal of the regmap with the neighbouring transforms.
+    Every transform implements `apply()`, used when there is no visitor, to process the whole input json at once.
+    """
+
+    # Name used to select the transform from the command line
+    name: str = None
+
+    def node_visitor(self, input_json: InputJson) -> Optional[Callable[[InputRegmap], None]]:
+        """Get a function to be called on every node of the regmap, structs members included. By default there is
+        none, and the transform is applied with `apply()`.
+
+        Args:
+            input_json (InputJson): Input json about to be transformed
+        """
+        del input_json  # Only used by the transforms that have a visitor
+
+    @abc.abstractmethod
+    def apply(self, input_json: InputJson) -> None:
+        """Transform the whole input json object in place
+
+        Args:
+            input_json (InputJson): Input json to be transformed
+        """
+
+
+class RemoveParamPrefixTransform(InputJsonTransform):
+    """Remove the Param prefix from s10 registers, see `TahiniRemoveParamPrefix`
+    """
+    name = "removeparamprefix"
+
+    def node_visitor(self, input_json: InputJson) -> Optional[Callable[[InputRegmap], None]]:
+        if input_json.regmap[0].name == "None": # Nothing to remove, apply() will return straight away
+            return None
+        return TahiniRemoveParamPrefix.remove_name_param_prefix
+
+    def apply(self, input_json: InputJson) -> None:
+        TahiniRemoveParamPrefix.remove_input_json_param_prefix(input_json)
+
+
+class AddJsonInfoTransform(InputJsonTransform):
+    """Combine the input json with an additional json file, see `TahiniAddJsonInfo`
+    """
+    name = "addjsoninfo"
+
+    def __init__(self, additional_json_path: str):
+        """Create the transform
+
+        Args:
+            additional_json_path (str): json file with additional information (brief, cmap_name...)
+        """
+        assert additional_json_path is not None, "Error: additional_json_path must be specified"
+        self.additional_json_path = additional_json_path
+
+    def apply(self, input_json: InputJson) -> None:
+        TahiniAddJsonInfo.combine_input_json(input_json, InputJson.load_json(self.additional_json_path))
+
+
+TRANSFORMS: Dict[str, Type[InputJsonTransform]] = {
+    RemoveParamPrefixTransform.name: RemoveParamPrefixTransform,
+    AddJsonInfoTransform.name: AddJsonInfoTransform,
+}
+
+
+class TahiniTransform:
+    """Implements the `tahini transform ...` sub-command
+    """
+
+    @staticmethod
+    def transform_from_description(description: str) -> InputJsonTransform:
+        """Create a transform from its command line description: `<name>` or `<name>=<argument>`
+
+        Example: "removeparamprefix", "addjsoninfo=path/to/additional.json"
+
+        Args:
+            description (str): Description of the transform
+
+        Raises:
+            InvalidTransformError: Unknown transform or invalid argument
+
+        Returns:
+            InputJsonTransform: Transform object
+        """
+        name, separator, argument = description.partition("=")
+        if name not in TRANSFORMS:
+            raise InvalidTransformError(f"Unknown transform '{name}'. Available transforms: "
+                                        + ", ".join(TRANSFORMS))
+        try:
+            if separator:
+                return TRANSFORMS[name](argument)
+            return TRANSFORMS[name]()
+        except TypeError as exc:
+            raise InvalidTransformError(f"Invalid argument for transform '{description}'") from exc
+
+    @staticmethod
+    def _visit_regmap(input_regmap: List[InputRegmap], visitors: List[Callable[[InputRegmap], None]]) -> None:
+        """Call all the visitors on every node of the regmap, in a single traversal
+
+        Args:
+            input_regmap (List[InputRegmap]): List of registers or structs to visit
+            visitors (List[Callable[[InputRegmap], None]]): Functions to call on each node, in order
+        """
+        for node in input_regmap:
+            for visitor in visitors:
+                visitor(node)
+            if node.type == "struct":
+                TahiniTransform._visit_regmap(node.members, visitors)
+
+    @staticmethod
+    def transform_input_json(input_json: InputJson, transforms: List[InputJsonTransform]) -> InputJson:
+        """Apply a list of transforms, in order, to an input json object.
+
+        Consecutive transforms that provide a node visitor are applied in a single traversal of the regmap.
+        The result can be passed straight to `TahiniCmap.cmap_fullregmap_from_input_json()`.
+
+        Args:
+            input_json (InputJson): Input json object, modified in place
+            transforms (List[InputJsonTransform]): Transforms to apply
+
+        Returns:
+            InputJson: The transformed input json object
+        """
+        visitors = []
+        for transform in transforms:
+            visitor = transform.node_visitor(input_json)
+            if visitor is not None:
+                visitors.append(visitor)
+                continue
+
+            if visitors:
+                TahiniTransform._visit_regmap(input_json.regmap, visitors)
+                visitors = []
+            transform.apply(input_json)
+
+        if visitors:
+            TahiniTransform._visit_regmap(input_json.regmap, visitors)
+
+        return input_json
+
+    @staticmethod
+    def transform_input_json_path(input_json_path: str, transforms: List[InputJsonTransform]) -> InputJson:
+        """Load an input json file and apply a list of transforms to it
+
+        Args:
+            input_json_path (str): gimli generated input json
+            transforms (List[InputJsonTransform]): Transforms to apply
+
+        Returns:
+            InputJson: The transformed input json object
+        """
+        assert input_json_path is not None, "Error: input_json_path must be specified"
+
+        return TahiniTransform.transform_input_json(InputJson.load_json(input_json_path), transforms)
@@ -1,12 +1,17 @@
 """
 Repository class to generate version information of a FW project
 """
-from typing import List, Optional
-import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+import copy
 import json
 import os
 import re
+import shlex
 import subprocess
+from .build_timestamp import build_datetime
+from .git_reader import GitReader
 from .version_schema import LastTag, GitVersion, VersionInfo, ExtendedVersionInfo
 
 VERSION_TAG_REGEX_G = r"((?P<major>[0-9]+)(\.)(?P<minor>[0-9]+)(\.)(?P<patch>[0-9]+))"
@@ -30,6 +35,17 @@ class InvalidProjectPathError(Exception):
     pass
 
 
+@dataclass
+class VersionConfig():
+    """Build configuration for which version information is generated
+    """
+    device_type: str
+    device_display_name: str
+    config_name: str
+    config_id: int
+    uid: str
+
+
 class Repository():
     """Abstract class to generate basic and extended version information
     """
@@ -72,12 +88,97 @@ class Repository():
     # S10 has a different versioning scheme to most other products, so needs it's own regex
     S10_VERSION_REGEX = r"rev(?P<major>[0-9]+)(\.)(?P<minor>[0-9]+)"
 
-    def __init__(self, project_path, device_type, device_display_name, config_name, config_id):
+    # Maximum number of git commands run in parallel when collecting the submodules information
+    MAX_GIT_JOBS = 8
+
+    def __init__(self, project_path, device_type, device_display_name, config_name, config_id, *,
+                 merges_since_last_tag=False):
         self.project_path = project_path
         self.device_type = device_type
         self.device_display_name = device_display_name
         self.config_name = config_name
         self.config_id = config_id
+        # Only look for the merged branches since the last tag of each repository, instead of the whole history
+        self.merges_since_last_tag = merges_since_last_tag
+        # Output of the git commands already run, and version of the topcode, so that they are collected once
+        self._command_outputs: Dict[str, str] = {}
+        # Branch ids found in the merge commits, by (submodule path, git log command)
+        self._merge_branch_ids: Dict[Tuple[str, str], List[str]] = {}
+        self._top_level_version: Optional[GitVersion] = None
+
+    def run_cached_command(self, command: str) -> str:
+        """Run a git command through `run_command()`, only once per Repository object. The repository is not
+        expected to change while the version information is generated.
+
+        Args:
+            command (str): Command to run
+
+        Returns:
+            (str): Git command output
+        """
+        if command not in self._command_outputs:
+            self._command_outputs[command] = self.run_command(command)
+        return self._command_outputs[command]
+
+    def __describe_head(self) -> str:
+        """Get the description of HEAD from its first-parent tag, e.g. "1.2.3-4567.8-9-gABCDEF"
+
+        Returns:
+            (str): Output of `git describe --long`, without the trailing new line
+        """
+        return self.run_cached_command('git describe --tags --first-parent --always --long').rstrip()
+
+    @staticmethod
+    def __tag_from_description(description: str) -> Optional[str]:
+        """Get the tag from the output of `git describe --always --long`
+
+        Args:
+            description (str): Output of git describe, e.g. "1.2.3-4567.8-9-gABCDEF"
+
+        Returns:
+            (Optional[str]): Tag, or None if there is no tag
+        """
+        # The long format is always "<tag>-<number of commits>-g<sha>", without tag it is only the sha, which cannot be
+        # told apart from a tag made of hexadecimal digits in the `--abbrev=0` output
+        tag, separator, sha = description.rpartition('-')
+        tag, separator, commits = tag.rpartition('-')
+        if separator and commits.isdigit() and sha.startswith('g'):
+            return tag
+        return None
+
+    def __find_last_tag(self) -> Optional[str]:
+        """Get the first-parent tag of HEAD, e.g. "1.2.3-4567.8", derived from the long description to save a git
+        command.
+
+        Returns:
+            (Optional[str]): Last tag, or None if there is no tag
+        """
+        return self.__tag_from_description(self.__describe_head())
+
+    def __describe_last_tag(self) -> str:
+        """Get the first-parent tag of HEAD, e.g. "1.2.3-4567.8". This is the output of
+        `git describe --abbrev=0`.
+
+        Returns:
+            (str): Last tag, or the sha of HEAD if there is no tag
+        """
+        last_tag = self.__find_last_tag()
+        return last_tag if last_tag is not None else self.__describe_head()
+
+    @staticmethod
+    def __merge_log_range(log_command: str, last_tag: Optional[str]) -> str:
+        """Restrict a git log command to the commits since the last tag
+
+        Args:
+            log_command (str): Git command to get the list of merge commits
+            last_tag (Optional[str]): Last tag of the repository, None to keep the whole history
+
+        Returns:
+            str: Git log command
+        """
+        if last_tag is None:
+            return log_command
+        return log_command + ' ' + shlex.quote(last_tag + '..HEAD')
 
     def __find_top_level(self) -> GitVersion:
         """Find version information for Topcode
@@ -88,8 +189,11 @@ class Repository():
         Returns:
             (GitVersion): Topcode version info
         """
+        if self._top_level_version is not None:
+            return self._top_level_version
+
         get_url_cmd = 'git remote get-url origin'
-        git_project_url = self.run_command(get_url_cmd)
+        git_project_url = self.run_cached_command(get_url_cmd)
         search_git_project = re.search(self.ORIGIN_REGEX, git_project_url)
         if search_git_project is None:
             raise Exception('No git repository found')
@@ -104,48 +208,99 @@ class Repository():
             origin_tag_regex = self.VERSION_TAG_REGEX + self.BRANCH_COMMIT_TAG_REGEX
             self.is_s10 = False
 
-        get_version_cmd = 'git describe --tags --first-parent --always --abbrev=0'
-        topcode_tag = self.run_command(get_version_cmd)
+        topcode_tag = self.__describe_last_tag()
 
         get_log_cmd = 'git log --merges --pretty=%s'
+        if self.merges_since_last_tag:
+            get_log_cmd = self.__merge_log_range(get_log_cmd, self.__find_last_tag())
         get_branch_cmd = 'git branch -a --contains HEAD'
 
         merge_string = self.__git_find_merge_list(get_log_cmd, get_branch_cmd,
                                                   self.GITLAB_MERGE_REGEX, self.GIT_BRANCH_REGEX)
 
-        return self.__find_version(origin_tag_regex, topcode_tag, merge_string, project_name)
+        self._top_level_version = self.__find_version(origin_tag_regex, topcode_tag, merge_string, project_name)
+        return self._top_level_version
+
+    def __find_submodule_merge_list(self, submodule_path: str, last_tag: Optional[str] = None) -> List[str]:
+        """Find the list of branches of a submodule
+
+        Args:
+            submodule_path (str): Local path of the submodule, as printed by `git submodule foreach`
+            last_tag (Optional[str], optional): Only look for the branches merged since this tag. Defaults to None.
+
+        Returns:
+            list[str]: List of merged branches
+        """
+        get_submodule_log_cmd = self.__merge_log_range('git -C ' + submodule_path + ' log --merges', last_tag)
+        get_submodule_branch_cmd = 'git -C ' + \
+            submodule_path + ' branch -a --contains HEAD'
+        return self.__git_find_merge_list(
+            get_submodule_log_cmd, get_submodule_branch_cmd, self.GITLAB_MERGE_REGEX, self.GIT_BRANCH_REGEX,
+            submodule_path)
+
+    @staticmethod
+    def __submodule_last_tags(submodule_descriptions: List[str]) -> Dict[str, str]:
+        """Get the last tag of each submodule from the output of `git submodule foreach git describe --long`
+
+        Args:
+            submodule_descriptions (List[str]): Lines of the command output
+
+        Returns:
+            Dict[str, str]: Last tag by submodule path. The submodules without tag are not included.
+        """
+        last_tags = {}
+        submodule_path = None
+        for line in submodule_descriptions:
+            if line.startswith('Entering'):
+                submodule_path = line[10: -1]
+            elif submodule_path is not None:
+                last_tag = Repository.__tag_from_description(line)
+                if last_tag is not None:
+                    last_tags[submodule_path] = last_tag
+        return last_tags
 
     def __find_submodules(self) -> List[GitVersion]:
         """Find version information for submodule
 
+        The submodules are listed once, then their tags and merged branches are collected in parallel. The
+        output keeps the order of `git submodule foreach`.
+
         Returns:
             (list[GitVersion]): Submodule version info
         """
         get_sub_urls_cmd = 'git submodule foreach --recursive git remote get-url origin'
-        git_submodule_urls = self.run_command(
+        git_submodule_urls = self.run_cached_command(
             get_sub_urls_cmd)
-        git_submodule_urls.strip()
         git_submodule_urls = git_submodule_urls.splitlines()
+
+        # The git command used here has 2 lines per command, the first being "Entering <local_path>"
+        # which is needed for finding the branch list, and the second is the url of the project
+        # which can be used for getting the last tag info
+        submodule_paths = [origin[10: -1] for origin in git_submodule_urls if origin.startswith('Entering')]
+
         get_submodule_versions_cmd = \
             'git submodule foreach --recursive git describe --tags --first-parent --always --abbrev=0'
-        submodule_tags = self.run_command(
-            get_submodule_versions_cmd)
-        submodule_tags = submodule_tags.splitlines()
+        with ThreadPoolExecutor(max_workers=self.MAX_GIT_JOBS) as executor:
+            submodule_tags_future = executor.submit(self.run_cached_command, get_submodule_versions_cmd)
+            if self.merges_since_last_tag:
+                get_submodule_descriptions_cmd = \
+                    'git submodule foreach --recursive git describe --tags --first-parent --always --long'
+                last_tags = self.__submodule_last_tags(
+                    self.run_cached_command(get_submodule_descriptions_cmd).splitlines())
+            else:
+                last_tags = {}
+            submodule_branch_ids = executor.map(
+                lambda submodule_path: self.__find_submodule_merge_list(submodule_path, last_tags.get(submodule_path)),
+                submodule_paths)
+            submodule_tags = submodule_tags_future.result().splitlines()
+            submodule_branch_ids = iter(list(submodule_branch_ids))
 
         submodule_tag_index = 0
         version_list = []
         branch_ids = None
         for origin in git_submodule_urls:
-            # The git command used here has 2 lines per command, the first being "Entering <local_path>"
-            # which is needed for finding the branch list, and the second is the url of the project
-            # which can be used for getting the last tag info
             if origin.startswith('Entering'):
-                submodule_path = origin[10: -1]
-                get_submodule_log_cmd = 'git -C ' + submodule_path + ' log --merges'
-                get_submodule_branch_cmd = 'git -C ' + \
-                    submodule_path + ' branch -a --contains HEAD'
-                branch_ids = self.__git_find_merge_list(
-                    get_submodule_log_cmd, get_submodule_branch_cmd, self.GITLAB_MERGE_REGEX, self.GIT_BRANCH_REGEX)
+                branch_ids = next(submodule_branch_ids)
 
             elif re.search(self.SUBMODULE_TAG_REGEX, submodule_tags[submodule_tag_index]) is not None:
                 assert branch_ids is not None  # Avoid pylance error "branch_ids can be None" later on
@@ -158,11 +313,36 @@ class Repository():
 
         return version_list
 
+    def __git_find_merged_branch_ids(self, log_command: str, merge_regex: str, submodule_path: str) -> List[str]:
+        """Find the branch ids in the merge commits. The output of git log is scanned line by line as it is
+        produced, and the result is reused by the other build configs of this Repository object.
+
+        Args:
+            log_command (str): Git command to get the list of merge commits
+            merge_regex (str): Regex searching pattern like "Merge branch 'FW-1234-"
+            submodule_path (str): Path of the submodule, empty for the topcode
+
+        Returns:
+            list[str]: Branch ids, in the order of the merge commits
+        """
+        cache_key = (submodule_path, log_command)
+        if cache_key not in self._merge_branch_ids:
+            branch_ids = []
+            for line in self.run_command_lines(log_command):
+                for item in re.findall(merge_regex, line):
+                    # As the `findall` regex will ping up multiplies of the regex we're looking for (this is due to in
+                    # the merge messages there are often multiple reference to the `FW-XXXX` number, so we only look
+                    # for the first hit ie element 0 of the list of results
+                    branch_ids.append(str(item[0]))
+            self._merge_branch_ids[cache_key] = branch_ids
+        return list(self._merge_branch_ids[cache_key])
+
     def __git_find_merge_list(self,
                               log_command: str,
                               branch_command: str,
                               merge_regex: str,
-                              branch_regex: str
+                              branch_regex: str,
+                              submodule_path: str = ""
                               ) -> List[str]:
         """Find the list of branches of a project
 
@@ -171,21 +351,15 @@ class Repository():
             branch_command (str): Git command to get the current branch
             merge_regex (str): Regex searching pattern like "Merge branch 'FW-1234-"
             branch_regex (str): Regex searching for pattern like "FW-123"
+            submodule_path (str, optional): Path of the submodule, empty for the topcode. Defaults to "".
 
         Returns:
             list[str]: List of merged branches
         """
-        branch_ids = []
         unique_id = []
-        git_merge_log = self.run_command(log_command)
-        git_merge_list = re.findall(merge_regex, git_merge_log)
-        for item in git_merge_list:
-            # As the `findall` regex will ping up multiplies of the regex we're looking for (this is due to in the merge
-            # messages there are often multiple reference to the `FW-XXXX` number, so we only look for the first hit
-            # ie element 0 of the list of results
-            branch_ids.append(str(item[0]))
+        branch_ids = self.__git_find_merged_branch_ids(log_command, merge_regex, submodule_path)
 
-        git_branch_log = self.run_command(branch_command)
+        git_branch_log = self.run_cached_command(branch_command)
 
         if (('master' in git_branch_log or 'main' in git_branch_log or 'stable' in git_branch_log)
                 and 'cherry' not in git_branch_log):
@@ -292,6 +466,18 @@ class Repository():
         """
         raise NotImplementedError("Not implemented in Subclass")
 
+    def run_command_lines(self, command: str) -> Iterator[str]:
+        """Run Git Command and iterate over the lines of its output. Subclasses can stream the output instead of
+        waiting for the whole command to finish.
+
+        Args:
+            command (str): Command to run
+
+        Returns:
+            (Iterator[str]): Lines of the git command output, without the line endings
+        """
+        return iter(self.run_command(command).splitlines())
+
     def __get_gitversion_list(self) -> List[GitVersion]:
         """Generate Git version informations for all repo (topcode and submodules)
 
@@ -318,13 +504,11 @@ class Repository():
 
         if uid == "git-sha":
             get_git_sha_cmd = 'git rev-parse HEAD'
-            basic_version.uid = str(self.run_command(get_git_sha_cmd))[:8]
+            basic_version.uid = str(self.run_cached_command(get_git_sha_cmd))[:8]
         else:
             basic_version.uid = uid
 
-        get_version_cmd = 'git describe --tags --first-parent --always --long'
-        full_version = (
-            self.run_command(get_version_cmd)).rstrip()
+        full_version = self.__describe_head()
 
         # format is either (master tag) maj.min.pat-commit-gitsha or
         # (branch tag) maj.min.pat-branch.itration-commit-gitsha
@@ -340,8 +524,7 @@ class Repository():
             commits = sub_str[1]
 
         basic_version.version = latest_tag if commits == "0" else full_version
-        basic_version.timestamp = datetime.datetime.utcnow().replace(
-            microsecond=0).isoformat() + "+00:00"
+        basic_version.timestamp = build_datetime().strftime("%Y-%m-%dT%H:%M:%S+00:00")
 
     def __initialise_full_version(self, full_version: ExtendedVersionInfo) -> None:
         """Initialize ExtendedVersionInfo object
@@ -410,6 +593,35 @@ class Repository():
 
         return full_version_obj
 
+    def get_config_versions(self, configs: List[VersionConfig]) -> List[Tuple[VersionInfo, ExtendedVersionInfo]]:
+        """User function to generate basic and extended version info of several build configurations, collecting the
+        git information only once
+
+        Args:
+            configs (List[VersionConfig]): Build configurations
+
+        Returns:
+            (List[Tuple[VersionInfo, ExtendedVersionInfo]]): Basic and extended version info of each configuration
+        """
+        self.verify_project_path()
+        git_versions = self.__get_gitversion_list()
+
+        config_versions = []
+        for config in configs:
+            basic_version = VersionInfo(config.device_type, config.device_display_name, config.config_name,
+                                        config.config_id)
+            self.__initialise_version(basic_version, config.uid)
+
+            full_version = ExtendedVersionInfo(
+                device_type=config.device_type, device_display_name=config.device_display_name,
+                config_name=config.config_name, config_id=config.config_id, project=basic_version.project,
+                uid=basic_version.uid, version=basic_version.version, timestamp=basic_version.timestamp,
+                git_versions=copy.deepcopy(git_versions))
+
+            config_versions.append((basic_version, full_version))
+
+        return config_versions
+
     def get_full_version(self, version_file_path: str) -> ExtendedVersionInfo:
         """User function to generate extended version info
 
@@ -486,23 +698,44 @@ class Repository():
 
 
 class LiveRepository(Repository):
-    """This subclass is for use in a real build process
+    """This subclass is for use in a real build process. Close it, or use it as a context manager, to release the
+    pack files mapped when reading the .git directory.
     """
 
-    def __init__(self, project_path: str, device_type: str, device_display_name: str, config_name: str, config_id: int):
+    def __init__(self, project_path: str, device_type: str, device_display_name: str, config_name: str, config_id: int,
+                 *, read_git_directly: bool = True, merges_since_last_tag: bool = False):
         """Initialise a LiveRepository object
 
         Args:
             project_path (str): Path to the project
             config_name (str): Name of the build configuration
             config_id (int): ID of the build configuration
+            read_git_directly (bool, optional): Answer the git commands supported by `GitReader` by reading the .git
+                directory instead of spawning git. Defaults to True.
+            merges_since_last_tag (bool, optional): Only look for the branches merged since the last tag of each
+                repository. Defaults to False.
         """
-        Repository.__init__(self, project_path, device_type, device_display_name, config_name, config_id)
+        Repository.__init__(self, project_path, device_type, device_display_name, config_name, config_id,
+                            merges_since_last_tag=merges_since_last_tag)
 
         self.check_path_sanity(project_path)
+        self._git_reader = GitReader(project_path) if read_git_directly else None
+
+    def close(self) -> None:
+        """Release the pack files mapped by the git reader
+        """
+        if self._git_reader is not None:
+            self._git_reader.close()
+
+    def __enter__(self) -> "LiveRepository":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def run_command(self, command: str) -> str:
-        """Run Git Command
+        """Run Git Command. The commands supported by `GitReader` are answered without spawning git, falling back to
+        the git command line if the repository cannot be read directly.
 
         Args:
             command(str): Git command to run
@@ -510,9 +743,33 @@ class LiveRepository(Repository):
         Returns:
             (str): Git command output
         """
+        if self._git_reader is not None:
+            output = self._git_reader.run_command(command)
+            if output is not None:
+                return output
+
         return str(subprocess.check_output(command, shell=True, stderr=subprocess.DEVNULL, cwd=self.project_path),
                    encoding="UTF-8")
 
+    def run_command_lines(self, command: str) -> Iterator[str]:
+        """Run Git Command and iterate over the lines of its output as git produces them
+
+        Args:
+            command (str): Git command to run
+
+        Raises:
+            subprocess.CalledProcessError: The command failed
+
+        Yields:
+            Iterator[str]: Lines of the git command output, without the line endings
+        """
+        with subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              cwd=self.project_path, encoding="UTF-8") as process:
+            for line in process.stdout:
+                yield line.rstrip("\n")
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, command)
+
     def check_path_sanity(self, path: str) -> None:
         """Check if the path is a valid string
 
@@ -537,7 +794,7 @@ class LiveRepository(Repository):
                 "Project path exists but not a directory")
 
         try:
-            self.run_command('git remote get-url origin')
+            self.run_cached_command('git remote get-url origin')
         except subprocess.CalledProcessError as exec_origin:
             raise InvalidProjectPathError(
                 "Project path exists but not a Git repository") from exec_origin
@@ -564,16 +821,19 @@ class TahiniVersion():
             VersionInfo: Basic version info object
         """
 
-        repo = LiveRepository(project_path, device_type, device_display_name, config_name, config_id)
-        return repo.get_basic_version(uid)
+        with LiveRepository(project_path, device_type, device_display_name, config_name, config_id) as repo:
+            return repo.get_basic_version(uid)
 
     @staticmethod
-    def create_extended_version_info(project_path, version_info_path) -> ExtendedVersionInfo:
+    def create_extended_version_info(project_path, version_info_path,
+                                     merges_since_last_tag: bool = False) -> ExtendedVersionInfo:
         """Create an ExtendedVersion object from an existing version info file
 
         Args:
             project_path (str): FW project path
             version_info_path (str): Path to version info json file
+            merges_since_last_tag (bool, optional): Only look for the branches merged since the last tag of each
+                repository. Defaults to False.
 
         Returns:
             ExtendedVersionInfo: Full version information of the FW project
@@ -581,7 +841,86 @@ class TahiniVersion():
 
         version_info = VersionInfo.load_json(version_info_path)
 
-        repo = LiveRepository(project_path, version_info.device_type, version_info.device_display_name,
-                              version_info.config_name, version_info.config_id)
+        with LiveRepository(project_path, version_info.device_type, version_info.device_display_name,
+                            version_info.config_name, version_info.config_id,
+                            merges_since_last_tag=merges_since_last_tag) as repo:
+            return repo.get_full_version(version_info_path)
+
+    @staticmethod
+    def load_version_configs(configs_path: str) -> List[VersionConfig]:
+        """Load a list of build configurations from a json file, e.g.
+        [{"device_type": "cm824", "config_name": "fw_cm824", "config_id": 9, "fw_uid": "0x1234"}, ...]
+
+        "device_display_name" defaults to the device type, and "fw_uid" to "0x0".
+
+        Args:
+            configs_path (str): Path to the json file
+
+        Raises:
+            InvalidArgumentError: A configuration is missing a field, or its name is used by another configuration
+
+        Returns:
+            List[VersionConfig]: Build configurations
+        """
+        with open(configs_path, "r", encoding="UTF-8") as configs_file:
+            configs_data = json.load(configs_file)
+
+        configs = []
+        for config_data in configs_data:
+            try:
+                configs.append(VersionConfig(device_type=config_data["device_type"],
+                                             device_display_name=config_data.get("device_display_name",
+                                                                                 config_data["device_type"]),
+                                             config_name=config_data["config_name"],
+                                             config_id=config_data["config_id"],
+                                             uid=config_data.get("fw_uid") or "0x0"))
+            except KeyError as exc:
+                raise InvalidArgumentError(f"Missing field {exc} in build configuration {config_data}") from exc
+
+        # The files of a configuration are written to a directory named after it
+        config_names = set()
+        for config in configs:
+            if config.config_name in config_names:
+                raise InvalidArgumentError(f"Duplicate build configuration name '{config.config_name}'")
+            config_names.add(config.config_name)
+        return configs
+
+    @staticmethod
+    def create_config_version_infos(project_path: str, configs: List[VersionConfig], output_dir: str,
+                                    merges_since_last_tag: bool = False) -> List[Tuple[str, str]]:
+        """Write the version.info.json file and the extended version info file of several build configurations,
+        with a single scan of the git repository and its submodules.
+
+        The files are written to `<output_dir>/<config_name>/version.info.json` and
+        `<output_dir>/<config_name>/extended.version.info.json`.
+
+        Args:
+            project_path (str): Project path
+            configs (List[VersionConfig]): Build configurations
+            output_dir (str): Directory where the files are written
+            merges_since_last_tag (bool, optional): Only look for the branches merged since the last tag of each
+                repository. Defaults to False.
+
+        Returns:
+            List[Tuple[str, str]]: Paths of the basic and extended version info files of each configuration
+        """
+        with LiveRepository(project_path, None, None, None, None,
+                            merges_since_last_tag=merges_since_last_tag) as repo:
+            config_versions = repo.get_config_versions(configs)
+
+        output_paths = []
+        for basic_version, full_version in config_versions:
+            config_dir = os.path.join(output_dir, basic_version.config_name)
+            os.makedirs(config_dir, exist_ok=True)
+
+            version_info_path = os.path.join(config_dir, "version.info.json")
+            with open(version_info_path, "w", encoding="UTF-8") as version_file:
+                version_file.write(basic_version.to_json(indent=4))
+
+            extended_version_info_path = os.path.join(config_dir, "extended.version.info.json")
+            with open(extended_version_info_path, "w", encoding="UTF-8") as version_file:
+                version_file.write(full_version.to_json(indent=4))
+
+            output_paths.append((version_info_path, extended_version_info_path))
 
-        return repo.get_full_version(version_info_path)
+        return output_paths
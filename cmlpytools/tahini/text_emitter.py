@@ -0,0 +1,75 @@
+"""
+Buffered text emitter used by the generators of large text files (C headers...)
+"""
+from typing import Iterable, List, Optional, TextIO
+
+
+class TextEmitter:
+    """Accumulate chunks of text and either write them to a stream in large blocks, or collect them to be
+    joined once at the end. This avoids building a large output with repeated string concatenation.
+
+    Example:
+        with open(path, "w", encoding="utf-8") as output:
+            with TextEmitter(output) as emitter:
+                emitter.write("...")
+    """
+
+    DEFAULT_BUFFER_SIZE = 1 << 16
+
+    def __init__(self, stream: Optional[TextIO] = None, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """Create a new emitter
+
+        Args:
+            stream (Optional[TextIO], optional): Stream to write the text to. If None, the text is collected
+                and can be retrieved with `getvalue()`. Defaults to None.
+            buffer_size (int, optional): Number of characters buffered before writing to the stream.
+        """
+        self._stream = stream
+        self._buffer_size = buffer_size
+        self._chunks: List[str] = []
+        self._buffered = 0
+
+    def write(self, text: str) -> None:
+        """Emit a chunk of text
+
+        Args:
+            text (str): Text to emit
+        """
+        self._chunks.append(text)
+        if self._stream is not None:
+            self._buffered += len(text)
+            if self._buffered >= self._buffer_size:
+                self.flush()
+
+    def writelines(self, lines: Iterable[str]) -> None:
+        """Emit several chunks of text. No line separator is added.
+
+        Args:
+            lines (Iterable[str]): Chunks of text to emit
+        """
+        for line in lines:
+            self.write(line)
+
+    def flush(self) -> None:
+        """Write the buffered text to the stream. Does nothing if the text is being collected.
+        """
+        if self._stream is not None and self._chunks:
+            self._stream.write("".join(self._chunks))
+            self._chunks = []
+            self._buffered = 0
+
+    def getvalue(self) -> str:
+        """Get all the text collected so far. Only available if no stream was provided.
+
+        Returns:
+            str: Collected text
+        """
+        if self._stream is not None:
+            raise ValueError("The text is written to a stream and cannot be retrieved")
+        return "".join(self._chunks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _type, _value, _traceback):
+        self.flush()
@@ -0,0 +1,104 @@
+"""
+Benchmark of RegmapCfgMergeFile merging 10 namespaced config files of 2k registers each.
+Run with `python -m tests.minfs.benchmark_namespace_merger`
+
+The config files write the registers of the dual actuator test regmap in turn, so that every file has both common
+and namespaced registers. The regmap is loaded once, outside of the measured time.
+"""
+import json
+import os
+import tempfile
+import timeit
+from cmlpytools import tahini
+from cmlpytools.minfs.regmap_namespace_merger import RegmapCfgMergeFile, attach_namespace
+
+DIR_PATH = os.path.dirname(os.path.realpath(__file__))
+FULL_REGMAP = os.path.join(DIR_PATH, "data", "test_fullregmap_dual_actl.cmapsource.json")
+NAMESPACES = 10
+REGISTERS_PER_FILE = 2000
+REPEAT = 3
+
+
+def merge_search_per_register(top_level_config: str, json_path: str, cmap: tahini.CmapFullRegmap) -> dict:
+    """Merge the config files like RegmapCfgMergeFile did before it used a search index: search the regmap for every
+    register, scan the list of common registers, and remove the common registers from the data one at a time.
+
+    Args:
+        top_level_config (str): a top level config file
+        json_path (str): path to the cml json configs
+        cmap (tahini.CmapFullRegmap): regmap already loaded
+
+    Returns:
+        dict: merged config
+    """
+    with open(top_level_config, 'r', encoding="UTF-8") as f_cfg:
+        regmap_params = json.load(f_cfg)['minfs']['regmap_params']
+
+    merged_data = []
+    common_regs = []
+    for config_index, config_file in enumerate(regmap_params):
+        with open(os.path.join(json_path, config_file['path']), 'r', encoding="UTF-8") as f_cfg:
+            json_data = json.load(f_cfg)
+        for register in json_data['data']:
+            match = tahini.search(name=register['register'], cmap_type=tahini.CmapType.REGISTER, node=cmap)
+            if not match.result.namespace:
+                if config_index == 0:
+                    common_regs.append(register)
+                    continue
+                for common_reg in common_regs:
+                    if register['register'] == common_reg['register']:
+                        if register['value'] != common_reg['value']:
+                            raise Exception("Common register in config files contain different values")
+                        break
+                else:
+                    common_regs.append(register)
+        for register in common_regs:
+            if register in json_data['data']:
+                json_data['data'].remove(register)
+        merged_data.extend(attach_namespace(json_data['data'], config_file['namespace']))
+
+    return {**json_data, 'data': merged_data + common_regs}
+
+
+def write_configs(json_path: str, cmap: tahini.CmapFullRegmap) -> str:
+    """Write the top level config and the config files of the benchmark
+
+    Args:
+        json_path (str): directory of the config files
+        cmap (tahini.CmapFullRegmap): regmap the registers are taken from
+
+    Returns:
+        str: path to the top level config
+    """
+    register_names = []
+    nodes = list(cmap.regmap.children)
+    while nodes:
+        node = nodes.pop(0)
+        if node.type == tahini.CmapType.REGISTER and not node.repeat_for and node.name not in register_names:
+            register_names.append(node.name)
+        if node.struct is not None:
+            nodes.extend(node.struct.children)
+
+    regmap_params = []
+    for namespace in range(NAMESPACES):
+        data = [{"register": register_names[index % len(register_names)], "value": index % len(register_names)}
+                for index in range(REGISTERS_PER_FILE)]
+        with open(os.path.join(json_path, f"config{namespace}.json"), "w", encoding="UTF-8") as f_cfg:
+            json.dump({"struct": "cml_params", "data": data}, f_cfg)
+        regmap_params.append({"namespace": f"act{namespace}", "path": f"config{namespace}.json"})
+
+    top_level_config = os.path.join(json_path, "top_level.json")
+    with open(top_level_config, "w", encoding="UTF-8") as f_cfg:
+        json.dump({"minfs": {"regmap_params": regmap_params}}, f_cfg)
+    return top_level_config
+
+
+if __name__ == '__main__':
+    full_regmap = tahini.CmapFullRegmap.load_json(FULL_REGMAP)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tl_config = write_configs(temp_dir, full_regmap)
+        for name, function in (
+                ("search_per_register", lambda: merge_search_per_register(tl_config, temp_dir, full_regmap)),
+                ("RegmapCfgMergeFile", lambda: RegmapCfgMergeFile(tl_config, temp_dir, full_regmap).merged_json)):
+            duration = min(timeit.repeat(function, number=1, repeat=REPEAT))
+            print(f"{name:<24} {duration * 1000:10.2f} ms for {NAMESPACES} x {REGISTERS_PER_FILE} registers")
@@ -0,0 +1,68 @@
+"""
+Microbenchmark of the calls to the minfs library when writing 10k regmap config entries.
+Run with `python -m tests.minfs.benchmark_shared`
+
+A regmap config file holds at most 255 entries (the entry count is a byte), so the entries are written in files of
+250 entries.
+"""
+import ctypes
+import timeit
+from cmlpytools.minfs import shared
+from cmlpytools.minfs.shared import RegmapFileWriter, MinFsError, MINFS_RET_OK
+
+TOTAL_ENTRIES = 10000
+ENTRIES_PER_FILE = 250
+ENTRY_DATA = bytearray([0xBA, 0xAD, 0xBE, 0xEF])
+REPEAT = 5
+
+
+def add_entry_per_call_binding(writer: RegmapFileWriter, addr: int, data: bytearray) -> None:
+    """Add an entry like the wrapper did before the prototypes were bound at load time: configure the function and
+    copy the data on every call.
+
+    Args:
+        writer (RegmapFileWriter): Writer handle
+        addr (int): Regmap address of the entry
+        data (bytearray): Data of the entry
+    """
+    c_add_entry = shared._DLL.RegmapFileWriter_AddEntry  # pylint: disable=protected-access
+    c_add_entry.argtypes = [ctypes.c_void_p, ctypes.c_ushort, ctypes.c_char_p, ctypes.c_ushort]
+    data = bytearray(data)
+    ret = c_add_entry(writer._hdl, addr, bytes(data), len(data))  # pylint: disable=protected-access
+    if ret != MINFS_RET_OK:
+        raise MinFsError(ret)
+
+
+def write_per_call_binding() -> None:
+    """Write the entries one call at a time, configuring the function on every call
+    """
+    for _ in range(TOTAL_ENTRIES // ENTRIES_PER_FILE):
+        writer = RegmapFileWriter(ENTRIES_PER_FILE, ENTRIES_PER_FILE * len(ENTRY_DATA))
+        for index in range(ENTRIES_PER_FILE):
+            add_entry_per_call_binding(writer, index * len(ENTRY_DATA), ENTRY_DATA)
+        writer.get_file()
+
+
+def write_add_entry() -> None:
+    """Write the entries one call at a time with the pre-bound function
+    """
+    for _ in range(TOTAL_ENTRIES // ENTRIES_PER_FILE):
+        writer = RegmapFileWriter(ENTRIES_PER_FILE, ENTRIES_PER_FILE * len(ENTRY_DATA))
+        for index in range(ENTRIES_PER_FILE):
+            writer.add_entry(index * len(ENTRY_DATA), ENTRY_DATA)
+        writer.get_file()
+
+
+def write_add_entries() -> None:
+    """Write the entries with the bulk API
+    """
+    for _ in range(TOTAL_ENTRIES // ENTRIES_PER_FILE):
+        writer = RegmapFileWriter(ENTRIES_PER_FILE, ENTRIES_PER_FILE * len(ENTRY_DATA))
+        writer.add_entries((index * len(ENTRY_DATA), ENTRY_DATA) for index in range(ENTRIES_PER_FILE))
+        writer.get_file()
+
+
+if __name__ == '__main__':
+    for function in (write_per_call_binding, write_add_entry, write_add_entries):
+        duration = min(timeit.repeat(function, number=1, repeat=REPEAT))
+        print(f"{function.__name__:<24} {duration * 1000:8.2f} ms for {TOTAL_ENTRIES} entries")
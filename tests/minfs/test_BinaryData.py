@@ -58,6 +58,19 @@ class TestBinaryData(unittest.TestCase):
 
         self.assertEqual(file, header_data, "files are not identical")
 
+    def test_tocheader_multiple_lines(self):
+        DATA = bytearray(range(20))
+        DATA_STR = ("0x00,0x01,0x02,0x03,0x04,0x05,0x06,0x07,  0x08,0x09,0x0A,0x0B,0x0C,0x0D,0x0E,0x0F, \\\n"
+                    "    0x10,0x11,0x12,0x13,")
+
+        header_data = FILE_TEMPLATE.replace("%%BYTE_ARRAY%%", DATA_STR)
+        binary_child = BinaryDataChild()
+        binary_child.data = DATA
+        binary_child.tocheader("bin_header.h")
+        file = open("bin_header.h", 'r', encoding="utf-8").read()
+
+        self.assertEqual(file, header_data, "files are not identical")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from functools import partial
+from unittest import mock
+from os import path
+from cmlpytools.minfs import file_cache
+from cmlpytools.minfs.file_cache import *
+from cmlpytools.minfs.file import File
+from cmlpytools.minfs.regmap_cfg_file import RegmapCfgFile
+
+DIR_PATH = path.dirname(path.realpath(__file__))
+PATH_TO_DATA = path.join(DIR_PATH, "data")
+
+
+class TestFileCache(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._cache_dir = path.join(self._temp_dir.name, "cache")
+
+    def test_changed_input(self):
+        """Only the files whose inputs changed are built again"""
+        cfg_path = path.join(self._temp_dir.name, "config.json")
+        shutil.copy(path.join(PATH_TO_DATA, "haptics_regmap_distances.json"), cfg_path)
+        regmap_file = path.join(PATH_TO_DATA, "haptics-regmap_cmapsource.json")
+        builders = [partial(RegmapCfgFile, cfg_path, regmap_file, "config0", 2),
+                    partial(File, path.join(PATH_TO_DATA, "binary_regmap_file.bin"), "CSA_FILE")]
+
+        cache = FileCache(self._cache_dir)
+        built_files = cache.build_files(builders)
+        cached_files = cache.build_files(builders)
+        self.assertEqual((cache.stats.hits, cache.stats.misses, cache.stats.entries), (2, 2, 2))
+        for built_file, cached_file in zip(built_files, cached_files):
+            self.assertEqual((built_file.file_name, built_file.file_type, bytes(built_file.data)),
+                             (cached_file.file_name, cached_file.file_type, bytes(cached_file.data)))
+
+        with open(cfg_path, "r", encoding="utf-8") as cfg_file:
+            cfg_data = json.load(cfg_file)
+        cfg_data["data"].pop()
+        with open(cfg_path, "w", encoding="utf-8") as cfg_file:
+            json.dump(cfg_data, cfg_file)
+
+        cache.build_files(builders)
+        self.assertEqual((cache.stats.hits, cache.stats.misses, cache.stats.stored), (3, 3, 3))
+        self.assertNotEqual(cache.key(builders[0]), cache.key(partial(RegmapCfgFile, cfg_path, regmap_file,
+                                                                      "config0", 1)))
+
+    def test_lru_eviction(self):
+        """The least recently used entries are removed first when the cache is too large"""
+        entry_size = len(File(path.join(PATH_TO_DATA, "binary_regmap_file.bin"), "CSA_FILE").data) + 10
+        cache = FileCache(self._cache_dir, max_size=2 * entry_size)
+        fs_file = File(path.join(PATH_TO_DATA, "binary_regmap_file.bin"), "CSA_FILE")
+
+        cache.put("first", fs_file)
+        cache.put("second", fs_file)
+        self.assertIsNotNone(cache.get("first"))
+        cache.put("third", fs_file)
+
+        self.assertIsNotNone(cache.get("first"))
+        self.assertIsNone(cache.get("second"))
+        self.assertIsNotNone(cache.get("third"))
+        self.assertEqual((cache.stats.evicted, cache.stats.entries), (1, 2))
+
+    def test_corrupt_entry(self):
+        """An entry that cannot be read is a miss, and is removed"""
+        fs_file = File(path.join(PATH_TO_DATA, "binary_regmap_file.bin"), "CSA_FILE")
+        cache = FileCache(self._cache_dir)
+        for content in (b"", b"\x01", b"\x01\x20CSA", b"\xff\x01A"):
+            cache.put("entry", fs_file)
+            with open(path.join(self._cache_dir, "entry" + ENTRY_SUFFIX), "wb") as entry_file:
+                entry_file.write(content)
+            self.assertIsNone(cache.get("entry"))
+            self.assertEqual(cache.stats.entries, 0)
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (0, 4))
+
+    @unittest.skipIf(os.name == "nt", "Windows files have no POSIX permissions")
+    def test_entry_mode(self):
+        """Entries get the default permissions of new files"""
+        cache = FileCache(self._cache_dir)
+        umask = os.umask(0o022)
+        try:
+            cache.put("entry", File(path.join(PATH_TO_DATA, "binary_regmap_file.bin"), "CSA_FILE"))
+        finally:
+            os.umask(umask)
+        self.assertEqual(stat.S_IMODE(os.stat(path.join(self._cache_dir, "entry" + ENTRY_SUFFIX)).st_mode), 0o644)
+
+    def test_code_in_key(self):
+        """Changing the code packing the files changes the keys"""
+        builder = partial(File, path.join(PATH_TO_DATA, "binary_regmap_file.bin"), "CSA_FILE")
+        cache = FileCache(self._cache_dir)
+        key = cache.key(builder)
+        with mock.patch("cmlpytools.minfs.file_cache._code_digest", return_value="0" * 64):
+            self.assertNotEqual(cache.key(builder), key)
+
+    def test_tahini_code_in_key(self):
+        """Changing tahini, which parses the regmaps and the cmapsource, changes the keys"""
+        builder = partial(File, path.join(PATH_TO_DATA, "binary_regmap_file.bin"), "CSA_FILE")
+        cache = FileCache(self._cache_dir)
+        key = cache.key(builder)
+
+        real_file_digest = file_cache._file_digest
+
+        def edited_file_digest(file_path):
+            if file_path.endswith(path.join("tahini", "cmap_schema.py")):
+                return "0" * 64
+            return real_file_digest(file_path)
+
+        file_cache._code_digest.cache_clear()
+        self.addCleanup(file_cache._code_digest.cache_clear)
+        with mock.patch("cmlpytools.minfs.file_cache._file_digest", side_effect=edited_file_digest):
+            self.assertNotEqual(cache.key(builder), key)
+
+
+if __name__ == '__main__':
+    unittest.main()
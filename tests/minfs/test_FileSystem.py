@@ -1,9 +1,17 @@
+import io
 import unittest
+import zlib
 from os import path
+from unittest import mock
 from cmlpytools.minfs.file import *
+from cmlpytools.minfs.command_parser import CommandParser
 from cmlpytools.minfs.regmap_cfg_file import RegmapCfgFile
 from cmlpytools.minfs.calmap_file import CalmapFile
-from cmlpytools.minfs.file_system import FileSystem
+from cmlpytools.minfs.file_system import FileSystem, FsLayoutError
+from cmlpytools.minfs.file_builder import BuiltFile, build_files
+from cmlpytools.minfs.image_delta import changed_pages
+from cmlpytools.minfs.image_reader import FileSystemImage
+from functools import partial
 
 DIR_PATH = path.dirname(path.realpath(__file__))
 PATH_TO_DATA = path.join(DIR_PATH, "data")
@@ -21,6 +29,77 @@ class TestFileSystem(unittest.TestCase):
         self.assertEqual(file_system.uid, "0x%x" % 0xffffffff, "Incorrect uid")
         self.assertEqual(len(file_system.data), 8, "Incorrect data size")
 
+    def test_uid(self):
+        """The uid is computed over the content of the files, and does not change from one run to another"""
+        regmap_cfg_file = RegmapCfgFile(path.join(PATH_TO_DATA, "haptics_regmap_cfg_correct.json"),
+                                        path.join(PATH_TO_DATA, "haptics-regmap_cmapsource.json"))
+        calmap_file = CalmapFile(path.join(PATH_TO_DATA, "calmap_regmap_cmapsource.json"),
+                                 path.join(PATH_TO_DATA, "calmap_file_valid.json"))
+
+        file_system = FileSystem([regmap_cfg_file, calmap_file])
+
+        expected_uid = zlib.crc32(bytes(regmap_cfg_file.data) + bytes(calmap_file.data))
+        self.assertEqual(file_system.uid, "0x%x" % expected_uid, "Incorrect uid")
+        self.assertIn(bytes(calmap_file.data), bytes(file_system.data))
+
+    def test_build_files_in_parallel(self):
+        """Files built by several processes are the same, and in the same order, as files built one after another"""
+        regmap_file = path.join(PATH_TO_DATA, "haptics-regmap_cmapsource.json")
+        builders = [partial(RegmapCfgFile, path.join(PATH_TO_DATA, "haptics_regmap_distances.json"), regmap_file,
+                            f"config{mode}", mode) for mode in range(3)]
+        builders.append(partial(CalmapFile, path.join(PATH_TO_DATA, "calmap_regmap_cmapsource.json"),
+                                path.join(PATH_TO_DATA, "calmap_file_valid.json")))
+        builders.append(partial(File, path.join(PATH_TO_DATA, "binary_regmap_file.bin"), "CSA_FILE"))
+
+        sequential_files = build_files(builders)
+        parallel_files = build_files(builders, jobs=2)
+
+        # The library sets the fourth byte of the regmap config and calmap headers differently in each process
+        def content(fs_file):
+            data = bytes(fs_file.data)
+            if fs_file.file_type in (FileTypes.REGMAP_CFG, FileTypes.CALMAP):
+                data = data[:3] + data[4:]
+            return fs_file.file_name, fs_file.file_type, data
+
+        self.assertEqual([content(fs_file) for fs_file in sequential_files],
+                         [content(fs_file) for fs_file in parallel_files])
+
+    def test_page_aligned_layout(self):
+        """Page-aligned files can be read back, and a file growing within its slack only changes its own pages"""
+        calmap_file = CalmapFile(path.join(PATH_TO_DATA, "calmap_regmap_cmapsource.json"),
+                                 path.join(PATH_TO_DATA, "calmap_file_valid.json"))
+        bin_file = File(path.join(PATH_TO_DATA, "binary_regmap_file.bin"), "CSA_FILE")
+        files = [calmap_file, bin_file]
+
+        # Aligned on 8 bytes, the files are where the library puts them
+        packed = FileSystemImage(FileSystem(files).data)
+        aligned = FileSystemImage(FileSystem(files, page_size=8).data)
+        self.assertEqual([(fs_file.name, fs_file.offset, bytes(fs_file.data)) for fs_file in packed],
+                         [(fs_file.name, fs_file.offset, bytes(fs_file.data)) for fs_file in aligned])
+        self.assertEqual(packed.uid, aligned.uid)
+
+        file_system = FileSystem(files, page_size=256, slack=16)
+        self.assertEqual([entry.offset for entry in file_system.layout], [256, 512])
+        self.assertEqual(len(file_system.data), 1024)
+        self.assertIn("4 page(s) of 256 bytes", file_system.layout_report())
+
+        grown_file = BuiltFile(calmap_file.file_name, calmap_file.file_type, bytes(calmap_file.data) + b"\x00" * 8)
+        grown_system = FileSystem([grown_file, bin_file], page_size=256, slack=16)
+        # The index holds the length of the files and the uid, so its page changes as well
+        self.assertEqual(changed_pages(memoryview(file_system.data), memoryview(grown_system.data), 256), [(0, 2)])
+
+        with self.assertRaises(FsLayoutError):
+            FileSystem(files, page_size=0x8000)
+
+    def test_page_slack_without_page_size(self):
+        """fs rejects a page slack when the files are not page-aligned"""
+        with mock.patch("sys.argv", ["minfs", "fs", "--page-slack", "16"]), \
+                mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            with self.assertRaises(SystemExit) as context:
+                CommandParser()
+        self.assertEqual(context.exception.code, 1)
+        self.assertIn("--page-size", stdout.getvalue())
+
 
 if __name__ == '__main__':
     unittest.main()
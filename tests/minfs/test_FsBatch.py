@@ -0,0 +1,95 @@
+import io
+import json
+import tempfile
+import unittest
+from os import path
+from unittest import mock
+from cmlpytools.minfs.command_parser import CommandParser
+from cmlpytools.minfs.fs_batch import *
+from cmlpytools.minfs.file import File
+
+DIR_PATH = path.dirname(path.realpath(__file__))
+PATH_TO_DATA = path.join(DIR_PATH, "data")
+
+
+class TestFsBatch(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._manifest_path = path.join(self._temp_dir.name, "manifest.json")
+
+    def _write_manifest(self, manifest_data):
+        with open(self._manifest_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest_data, manifest_file)
+
+    def test_build_many(self):
+        """Each file system is the same as the one built from its own files, and shared files are built once"""
+        config = {"type": "regmap-cfg", "path": path.join(PATH_TO_DATA, "haptics_regmap_distances.json"),
+                  "name": "config0", "compression": 2}
+        binary = {"type": "bin", "path": path.join(PATH_TO_DATA, "binary_regmap_file.bin"), "file_type": "CSA_FILE"}
+        self._write_manifest({
+            "regmap": path.join(PATH_TO_DATA, "haptics-regmap_cmapsource.json"),
+            "images": [{"output": "out/a.bin", "c_header": "out/a.h", "files": [config]},
+                       {"output": "out/b.bin", "files": [config, binary]},
+                       {"output": "out/c.bin", "page_size": 256, "files": [binary]}]})
+
+        manifest = load_fs_manifest(self._manifest_path)
+        results = fs_batch_build(manifest, jobs=1)
+
+        self.assertEqual(len(manifest.builders), 2)
+        self.assertEqual([result.shared_file_count for result in results], [0, 1, 1])
+        self.assertTrue(path.exists(path.join(self._temp_dir.name, "out", "a.h")))
+
+        # The library sets the fourth byte of regmap config headers differently from one build to another, so only
+        # the file system made of a binary file is compared
+        expected_c = FileSystem([File(binary["path"], binary["file_type"])], page_size=256)
+        with open(path.join(self._temp_dir.name, "out", "c.bin"), "rb") as bin_file:
+            self.assertEqual(bin_file.read(), bytes(expected_c.data))
+        self.assertEqual(results[2].uid, expected_c.uid)
+        with open(path.join(self._temp_dir.name, "out", "b.bin"), "rb") as bin_file:
+            self.assertIn(File(binary["path"], binary["file_type"]).data, bin_file.read())
+        self.assertIn("2 distinct member file(s), 4 requested", format_fs_summary(results, len(manifest.builders)))
+
+    def test_invalid_manifest(self):
+        """Files with an unknown type, or without a regmap, are rejected"""
+        self._write_manifest({"images": [{"output": "a.bin", "files": [{"type": "elf", "path": "a.elf"}]}]})
+        with self.assertRaises(InvalidFsManifestError):
+            load_fs_manifest(self._manifest_path)
+
+        self._write_manifest({"images": [{"output": "a.bin", "files": [{"type": "calmap", "path": "c.json"}]}]})
+        with self.assertRaises(InvalidFsManifestError):
+            load_fs_manifest(self._manifest_path)
+
+    def test_invalid_manifest_inputs(self):
+        """A missing manifest or input file, invalid json, an unknown bin file type and non integer page sizes are
+        reported as invalid manifests naming the image"""
+        with self.assertRaises(InvalidFsManifestError):
+            load_fs_manifest(self._manifest_path)
+        with open(self._manifest_path, "w", encoding="utf-8") as manifest_file:
+            manifest_file.write("{")
+        with self.assertRaises(InvalidFsManifestError):
+            load_fs_manifest(self._manifest_path)
+
+        binary = {"type": "bin", "path": path.join(PATH_TO_DATA, "binary_regmap_file.bin"), "file_type": "CSA_FILE"}
+        for image in [{"output": "a.bin", "files": [dict(binary, path="missing.bin")]},
+                      {"output": "a.bin", "files": [dict(binary, file_type="ELF_FILE")]},
+                      {"output": "a.bin", "page_size": "256", "files": [binary]},
+                      {"output": "a.bin", "page_size": 256, "page_slack": 1.5, "files": [binary]}]:
+            self._write_manifest({"images": [{"output": "ok.bin", "files": [binary]}, image]})
+            with self.assertRaisesRegex(InvalidFsManifestError, "image 1"):
+                load_fs_manifest(self._manifest_path)
+
+    def test_build_many_invalid_manifest(self):
+        """build-many reports an invalid manifest without a traceback"""
+        self._write_manifest({"images": [{"output": "a.bin", "files": [{"type": "elf", "path": "a.elf"}]}]})
+        with mock.patch("sys.argv", ["minfs", "build-many", self._manifest_path]), \
+                mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            with self.assertRaises(SystemExit) as context:
+                CommandParser()
+        self.assertEqual(context.exception.code, 1)
+        self.assertIn("elf", stdout.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
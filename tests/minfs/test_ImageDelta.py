@@ -0,0 +1,97 @@
+import io
+import tempfile
+import unittest
+from os import path
+from unittest import mock
+from cmlpytools.minfs.command_parser import CommandParser
+from cmlpytools.minfs.image_delta import *
+
+PAGE_SIZE = 256
+
+
+class TestImageDelta(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._old_path = path.join(self._temp_dir.name, "old.bin")
+        self._new_path = path.join(self._temp_dir.name, "new.bin")
+        self._patch_path = path.join(self._temp_dir.name, "patch.mfsd")
+
+    def _write_images(self, old_data, new_data):
+        with open(self._old_path, "wb") as old_file:
+            old_file.write(old_data)
+        with open(self._new_path, "wb") as new_file:
+            new_file.write(new_data)
+
+    def test_changed_pages(self):
+        """Only the changed pages are in the patch, and applying it gives the new image"""
+        old_data = bytes(range(256)) * 40
+        new_data = bytearray(old_data)
+        new_data[10] ^= 0xff
+        new_data[PAGE_SIZE + 1] ^= 0xff
+        new_data[20 * PAGE_SIZE] ^= 0xff
+        new_data += b"\xaa" * 100
+        self._write_images(old_data, new_data)
+
+        summary = make_delta(self._old_path, self._new_path, self._patch_path, PAGE_SIZE)
+        self.assertEqual((summary.page_count, summary.changed_page_count, summary.run_count), (41, 4, 3))
+        self.assertEqual(summary.patch_size, DELTA_HEADER.size + 3 * DELTA_RUN.size + 3 * PAGE_SIZE + 100)
+
+        output_path = path.join(self._temp_dir.name, "output.bin")
+        apply_delta(self._old_path, self._patch_path, output_path)
+        with open(output_path, "rb") as output_file:
+            self.assertEqual(output_file.read(), bytes(new_data))
+        self.assertTrue(verify_delta(output_path, self._patch_path))
+        self.assertFalse(verify_delta(self._old_path, self._patch_path))
+
+    def test_smaller_image(self):
+        """A new image smaller than the old one is patched in place"""
+        old_data = bytes(range(256)) * 8
+        self._write_images(old_data, old_data[:PAGE_SIZE + 10])
+
+        summary = make_delta(self._old_path, self._new_path, self._patch_path, PAGE_SIZE)
+        self.assertEqual(summary.changed_page_count, 1)
+        apply_delta(self._old_path, self._patch_path)
+        with open(self._old_path, "rb") as output_file:
+            self.assertEqual(output_file.read(), old_data[:PAGE_SIZE + 10])
+
+    def test_wrong_image(self):
+        """A patch is not applied to an image other than its old image"""
+        self._write_images(b"\x00" * 1000, b"\x01" * 1000)
+        make_delta(self._old_path, self._new_path, self._patch_path, PAGE_SIZE)
+        with self.assertRaises(InvalidDeltaError):
+            apply_delta(self._new_path, self._patch_path, path.join(self._temp_dir.name, "output.bin"))
+
+    def test_output_is_input(self):
+        """The patch cannot overwrite one of its images, nor the patched image the patch"""
+        self._write_images(b"\x00" * 1000, b"\x01" * 1000)
+        with self.assertRaises(ValueError):
+            make_delta(self._old_path, self._new_path, self._new_path, PAGE_SIZE)
+        with self.assertRaises(ValueError):
+            make_delta(self._old_path, self._new_path, path.join(self._temp_dir.name, ".", "old.bin"), PAGE_SIZE)
+        with open(self._new_path, "rb") as new_file:
+            self.assertEqual(new_file.read(), b"\x01" * 1000)
+
+        make_delta(self._old_path, self._new_path, self._patch_path, PAGE_SIZE)
+        with self.assertRaises(ValueError):
+            apply_delta(self._old_path, self._patch_path, self._patch_path)
+
+    def test_delta_apply_command_errors(self):
+        """delta-apply reports a wrong image or an invalid patch without a traceback"""
+        self._write_images(b"\x00" * 1000, b"\x01" * 1000)
+        make_delta(self._old_path, self._new_path, self._patch_path, PAGE_SIZE)
+        output_path = path.join(self._temp_dir.name, "output.bin")
+        for arguments in ([self._new_path, self._patch_path, "-o", output_path],
+                          [self._new_path, self._old_path, "--verify"]):
+            with self.subTest(arguments=arguments), \
+                    mock.patch("sys.argv", ["minfs", "delta-apply"] + arguments), \
+                    mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                with self.assertRaises(SystemExit) as context:
+                    CommandParser()
+                self.assertEqual(context.exception.code, 1)
+                self.assertEqual(len(stdout.getvalue().splitlines()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import io
+import os
+import struct
+import tempfile
+import unittest
+from os import path
+from unittest import mock
+from cmlpytools.minfs.image_reader import *
+from cmlpytools.minfs.calmap_file import CalmapFile
+from cmlpytools.minfs.command_parser import CommandParser
+from cmlpytools.minfs.file import File
+from cmlpytools.minfs.file_system import FileSystem
+from cmlpytools.minfs.regmap_cfg_file import RegmapCfgFile
+from cmlpytools.minfs.shared import RegmapFileWriter
+from cmlpytools.minfs.utilities import merge_bin
+
+DIR_PATH = path.dirname(path.realpath(__file__))
+PATH_TO_DATA = path.join(DIR_PATH, "data")
+
+
+class TestImageReader(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._regmap_cfg_file = RegmapCfgFile(path.join(PATH_TO_DATA, "haptics_regmap_distances.json"),
+                                              path.join(PATH_TO_DATA, "haptics-regmap_cmapsource.json"), "config0", 2)
+        self._calmap_file = CalmapFile(path.join(PATH_TO_DATA, "calmap_regmap_cmapsource.json"),
+                                       path.join(PATH_TO_DATA, "calmap_file_valid.json"))
+        self._bin_file = File(path.join(PATH_TO_DATA, "binary_regmap_file.bin"), "CSA_FILE", "csa")
+        self._file_system = FileSystem([self._regmap_cfg_file, self._calmap_file, self._bin_file])
+
+    def test_file_system_in_merged_binary(self):
+        """The files of a file system merged in a firmware binary are read at its load address"""
+        fs_path = path.join(self._temp_dir.name, "fs.bin")
+        firmware_path = path.join(self._temp_dir.name, "firmware.bin")
+        merged_path = path.join(self._temp_dir.name, "merged.bin")
+        self._file_system.tobin(fs_path)
+        with open(firmware_path, "wb") as firmware_file:
+            firmware_file.write(b"\xff" * 0x1000)
+        merge_bin(firmware_path, fs_path, 0x2000, merged_path)
+
+        with MappedImage(merged_path) as image:
+            fs_image = FileSystemImage(image.view, 0x2000)
+            self.assertEqual(len(fs_image), 3)
+            for fs_file, expected in zip(fs_image, [self._regmap_cfg_file, self._calmap_file, self._bin_file]):
+                self.assertEqual((fs_file.name, fs_file.file_type, bytes(fs_file.data)),
+                                 (expected.file_name, expected.file_type, bytes(expected.data)))
+            self.assertEqual(f"0x{fs_image.uid:x}", self._file_system.uid)
+            self.assertEqual(fs_image.compute_uid(), fs_image.uid)
+            self.assertEqual(fs_image.size, len(self._file_system.data))
+            self.assertEqual(len(CalmapImage(fs_image.find("calmap_f").data)), 6)
+            self.assertIn("uid 0x%x (ok)" % fs_image.uid, format_fs_image(fs_image, entries=True))
+
+            written = extract_files(fs_image, path.join(self._temp_dir.name, "out"), ["csa"])
+            self.assertEqual([path.basename(output_path) for output_path in written], ["02_csa.bin"])
+            with self.assertRaises(InvalidImageError):
+                extract_files(fs_image, path.join(self._temp_dir.name, "out"), ["missing"])
+            del fs_image
+
+    def test_regmap_cfg_entries(self):
+        """The entries of a regmap config file are the ones written by the library"""
+        writer = RegmapFileWriter(2, 6)
+        writer.add_entry(0x10, b"\x01\x02\x03\x04")
+        writer.add_entry(0x200, b"\xaa\xbb")
+        writer.set_fw_version(0x11223344, 0x55)
+
+        image = RegmapCfgImage(writer.copy_file())
+        self.assertEqual((image.fw_uid, image.build_id), (0x11223344, 0x55))
+        self.assertEqual([(entry.addr, bytes(entry.data)) for entry in image],
+                         [(0x10, b"\x01\x02\x03\x04"), (0x200, b"\xaa\xbb")])
+
+    def test_invalid_images(self):
+        """Images with an unsupported version or a truncated index are rejected"""
+        data = bytearray(self._file_system.data)
+        with self.assertRaises(InvalidImageError):
+            FileSystemImage(data[:20])
+        data[0] = 1
+        with self.assertRaises(InvalidImageError):
+            FileSystemImage(data)
+        with self.assertRaises(InvalidImageError):
+            RegmapCfgImage(struct.pack("<BBBxI", 0, 0xff, 2, 0))
+
+        empty_path = path.join(self._temp_dir.name, "empty.bin")
+        open(empty_path, "wb").close()
+        with MappedImage(empty_path) as image:
+            with self.assertRaises(InvalidImageError):
+                FileSystemImage(image.view)
+
+    def test_inspect_command_errors(self):
+        """inspect and extract exit with an error on a uid mismatch or an invalid image, without a traceback"""
+        fs_path = path.join(self._temp_dir.name, "fs.bin")
+        data = bytearray(self._file_system.data)
+        data[FileSystemImage(data)[2].offset] ^= 0xff
+        with open(fs_path, "wb") as fs_file:
+            fs_file.write(data)
+
+        with mock.patch("sys.argv", ["minfs", "inspect", fs_path]), \
+                mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            with self.assertRaises(SystemExit) as context:
+                CommandParser()
+        self.assertEqual(context.exception.code, 1)
+        self.assertIn("mismatch", stdout.getvalue())
+
+        for command in ["inspect", "extract"]:
+            argv = ["minfs", command, fs_path, "--offset", "0x10"]
+            if command == "extract":
+                argv.append(path.join(self._temp_dir.name, "out"))
+            with mock.patch("sys.argv", argv), mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                with self.assertRaises(SystemExit) as context:
+                    CommandParser()
+            self.assertEqual(context.exception.code, 1)
+            self.assertEqual(len(stdout.getvalue().splitlines()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
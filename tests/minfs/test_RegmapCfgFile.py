@@ -2,7 +2,9 @@ from builtins import str
 from builtins import range
 import unittest
 from os import path
+from unittest import mock
 from cmlpytools.minfs.regmap_cfg_file import *
+from cmlpytools.minfs.regmap_cfg_file import _optimal_entries
 
 
 DIR_PATH = path.dirname(path.realpath(__file__))
@@ -77,6 +79,52 @@ class TestRegmapCfgFile(unittest.TestCase):
         num_entries = regmap_cfg_file.data[2]
         self.assertEqual(num_entries, 3)
 
+    def test_optimal_compression(self):
+        """Mode 3 gives the smallest file, with the fewest entries among the smallest files"""
+        regmap_cfg_json_file = path.join(PATH_TO_DATA, "haptics_regmap_distances.json")
+        regmap_file = path.join(PATH_TO_DATA, "haptics-regmap_cmapsource.json")
+
+        sizes = [len(RegmapCfgFile(regmap_cfg_json_file, regmap_file, "config0", mode).data) for mode in range(3)]
+        regmap_cfg_file = RegmapCfgFile(regmap_cfg_json_file, regmap_file, "config0", 3)
+        self.assertEqual(regmap_cfg_file.data[2], 3)
+        self.assertEqual(len(regmap_cfg_file.data), min(sizes))
+
+        report = compression_report(regmap_cfg_json_file, regmap_file)
+        self.assertEqual(len(report.splitlines()), 1 + len(COMPRESSION_MODES))
+
+    def test_optimal_entries(self):
+        """Registers are merged when the padding costs less than an entry header, within the maximum entry size"""
+        registers = [{'register': name, 'address': address, 'data': bytes(size)}
+                     for name, address, size in [("a", 0, 2), ("b", 4, 4), ("c", 20, 2), ("d", 27, 1), ("e", 28, 4)]]
+
+        entries = [(entry.address, entry.len) for entry in _optimal_entries(registers, 6, 0xFFFF)]
+        self.assertEqual(entries, [(0, 8), (20, 12)])
+
+        entries = [(entry.address, entry.len) for entry in _optimal_entries(registers, 6, 8)]
+        self.assertEqual(entries, [(0, 8), (20, 2), (27, 5)])
+
+        registers[1]['address'] = 1
+        with self.assertRaises(RegmapCfgParseError):
+            _optimal_entries(registers, 6, 0xFFFF)
+
+    def test_loaded_regmap(self):
+        """The regmap can be loaded once and shared between files, which gives the same files as loading it from
+        its path.
+        """
+        regmap_cfg_json_file = path.join(PATH_TO_DATA, "haptics_regmap_distances.json")
+        regmap_file = path.join(PATH_TO_DATA, "haptics-regmap_cmapsource.json")
+
+        tahini.cmap_loader.clear_cmap_cache()
+        with mock.patch.object(tahini.CmapFullRegmap, "load_json", wraps=tahini.CmapFullRegmap.load_json) as load:
+            from_path = [RegmapCfgFile(regmap_cfg_json_file, regmap_file, "config0", mode) for mode in range(3)]
+            self.assertEqual(load.call_count, 1)
+
+        cmap, index = tahini.load_indexed_cmap(regmap_file)
+        for mode in range(3):
+            loaded = RegmapCfgFile(regmap_cfg_json_file, cmap, "config0", mode, index)
+            # The fourth byte of the header changes from one file to another
+            self.assertEqual(bytes(loaded.data[4:]), bytes(from_path[mode].data[4:]))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 import json
 from os import path
-from cmlpytools.minfs.regmap_namespace_merger import RegmapCfgMergeFile
+from cmlpytools.minfs.regmap_namespace_merger import RegmapCfgMergeFile, remove_registers
 
 DIR_PATH = path.dirname(path.realpath(__file__))
 PATH_TO_DATA = path.join(DIR_PATH, "data")
@@ -42,5 +42,12 @@ class TestRegmapCfgMergeFile(unittest.TestCase):
         self.assertIn('config files contain different values', str(
             context.exception), "Failed to catch conflicting commons")
 
+    def test_remove_registers(self):
+        """Each register removed only removes the first equal register of the data"""
+        data = [{"register": "a", "value": 1}, {"register": "b", "value": 2}, {"register": "a", "value": 1},
+                {"register": "a", "value": 3}]
+        kept = remove_registers(data, {"a": [{"register": "a", "value": 1}], "c": [{"register": "c", "value": 1}]})
+        self.assertEqual(kept, data[1:])
+
 if __name__ == '__main__':
     unittest.main()
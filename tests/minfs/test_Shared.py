@@ -82,6 +82,55 @@ class TestSharedLibrary(unittest.TestCase):
         except:
             self.fail("failed to add file")
 
+    def test_AddEntries(self):
+        """
+        Adding entries in bulk gives the same file as adding them one by one
+        """
+        ENTRIES = [(0x1234, bytearray([0xBA, 0xAD])), (0x1240, b"\xBE\xEF\x00\x01"), (0x1250, bytes(300))]
+        DATA_SIZE = sum(len(data) for _, data in ENTRIES)
+
+        single_handle = RegmapFileWriter(len(ENTRIES), DATA_SIZE)
+        for addr, data in ENTRIES:
+            single_handle.add_entry(addr, data)
+        bulk_handle = RegmapFileWriter(len(ENTRIES), DATA_SIZE)
+        bulk_handle.add_entries(ENTRIES)
+
+        # The fourth byte of the header changes from one handle to another
+        self.assertEqual(single_handle.get_file()[4:], bulk_handle.get_file()[4:])
+
+        with self.assertRaises(MinFsError):
+            bulk_handle.add_entries([(0x1300, b"\x00")])
+
+    def test_GetFileView(self):
+        """
+        The file is a read-only view of the library buffer, which stays valid after the handle is released
+        """
+        ADDR = 0x1234
+        DATA = bytearray([0xBA, 0xAD, 0xBE, 0xEF])
+
+        whandle = RegmapFileWriter(1, len(DATA))
+        whandle.add_entry(ADDR, DATA)
+        file = whandle.get_file()
+        file_copy = whandle.copy_file()
+        del whandle
+
+        self.assertTrue(file.readonly)
+        with self.assertRaises(TypeError):
+            file[0] = 0
+        self.assertIsInstance(file_copy, bytearray)
+        self.assertEqual(file, file_copy)
+        self.assertEqual(bytes(file[-len(DATA):]), bytes(DATA))
+
+    def test_SetFwVersion(self):
+        """
+        Set the firmware version of a regmap config file
+        """
+        whandle = RegmapFileWriter(1, 4)
+        whandle.set_fw_version(0x12345678, 3)
+        whandle.add_entry(0x1234, bytearray([0xBA, 0xAD, 0xBE, 0xEF]))
+
+        self.assertIn(bytes([0x78, 0x56, 0x34, 0x12]), bytes(whandle.get_file()))
+
     def test_CalmapAddEntry(self):
         '''
         Test that a calmap entry can be added successfully
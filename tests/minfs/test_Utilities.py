@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+from os import path
+from cmlpytools.minfs.utilities import merge_bin, merge_bin_batch, patch_bin
+
+
+class TestUtilities(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+
+    def _write(self, name, data):
+        file_path = path.join(self._temp_dir.name, name)
+        with open(file_path, "wb") as output_file:
+            output_file.write(data)
+        return file_path
+
+    def _read(self, file_path):
+        with open(file_path, "rb") as input_file:
+            return input_file.read()
+
+    def test_merge_bin(self):
+        """The firmware is truncated or padded with zeros up to the load address, followed by the parameters"""
+        firmware = bytes(range(256)) * 4
+        fw_path = self._write("firmware.bin", firmware)
+        params_path = self._write("params.bin", b"\xaa" * 100)
+        output_path = path.join(self._temp_dir.name, "merged.bin")
+
+        merge_bin(fw_path, params_path, 0x200, output_path)
+        self.assertEqual(self._read(output_path), firmware[:0x200] + b"\xaa" * 100)
+        merge_bin(fw_path, params_path, 0x500, output_path)
+        self.assertEqual(self._read(output_path), firmware + b"\x00" * 0x100 + b"\xaa" * 100)
+
+    def test_batch_and_in_place(self):
+        """Merging several variants, or patching a merged binary in place, gives the same binaries as merge_bin"""
+        firmware = bytes(range(256)) * 4
+        fw_path = self._write("firmware.bin", firmware)
+        params_paths = [self._write("params_a.bin", b"\xaa" * 100), self._write("params_b.bin", b"\xbb" * 50)]
+        output_paths = [path.join(self._temp_dir.name, name) for name in ("a.bin", "b.bin")]
+
+        merge_bin_batch(fw_path, [(params_path, 0x300, output_path)
+                                  for params_path, output_path in zip(params_paths, output_paths)])
+        self.assertEqual(self._read(output_paths[0]), firmware[:0x300] + b"\xaa" * 100)
+        self.assertEqual(self._read(output_paths[1]), firmware[:0x300] + b"\xbb" * 50)
+
+        patch_bin(params_paths[1], 0x300, output_paths[0])
+        self.assertEqual(self._read(output_paths[0]), self._read(output_paths[1]))
+
+    def test_output_is_input(self):
+        """Merging into the firmware file gives the same binary as merging into another file, and the parameters
+        file cannot be the output"""
+        firmware = bytes(range(256)) * 4
+        fw_path = self._write("firmware.bin", firmware)
+        params_path = self._write("params.bin", b"\xaa" * 100)
+
+        merge_bin(fw_path, params_path, 0x200, fw_path)
+        self.assertEqual(self._read(fw_path), firmware[:0x200] + b"\xaa" * 100)
+
+        with self.assertRaises(ValueError):
+            merge_bin(fw_path, params_path, 0x200, params_path)
+        self.assertEqual(self._read(params_path), b"\xaa" * 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
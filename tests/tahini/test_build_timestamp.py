@@ -0,0 +1,56 @@
+"""
+Test the reproducible date and time embedded in the generated files
+"""
+import datetime
+import os
+import unittest
+from unittest import mock
+from cmlpytools.tahini.build_timestamp import build_date, build_datetime, set_source_date_epoch, \
+    InvalidTimestampError, SOURCE_DATE_EPOCH
+from cmlpytools.tahini.legacy_json_to_header import legacy_data_to_c_header
+from tests.tahini.test_version_schema import MockRepositoryMaster
+
+
+class TestBuildTimestamp(unittest.TestCase):
+    """Test SOURCE_DATE_EPOCH and --timestamp
+
+    Args:
+        unittest (<module 'unittest'>): Unittest module
+    """
+
+    @mock.patch.dict(os.environ, {SOURCE_DATE_EPOCH: "1700000000"})
+    def test_source_date_epoch(self):
+        """The date and time come from SOURCE_DATE_EPOCH
+        """
+        self.assertEqual(build_datetime(), datetime.datetime(2023, 11, 14, 22, 13, 20, tzinfo=datetime.timezone.utc))
+        self.assertEqual(build_date(), datetime.date(2023, 11, 14))
+
+    @mock.patch.dict(os.environ, {SOURCE_DATE_EPOCH: "yesterday"})
+    def test_invalid_source_date_epoch(self):
+        """SOURCE_DATE_EPOCH must be a number of seconds
+        """
+        with self.assertRaises(InvalidTimestampError):
+            build_datetime()
+
+    @mock.patch.dict(os.environ, {})
+    def test_set_source_date_epoch(self):
+        """--timestamp accepts seconds or ISO 8601 dates, UTC by default
+        """
+        set_source_date_epoch("1700000000")
+        self.assertEqual(os.environ[SOURCE_DATE_EPOCH], "1700000000")
+        set_source_date_epoch("2023-11-14T22:13:20")
+        self.assertEqual(os.environ[SOURCE_DATE_EPOCH], "1700000000")
+        set_source_date_epoch("2023-11-15T00:13:20+02:00")
+        self.assertEqual(os.environ[SOURCE_DATE_EPOCH], "1700000000")
+        with self.assertRaises(InvalidTimestampError):
+            set_source_date_epoch("next week")
+
+    @mock.patch.dict(os.environ, {SOURCE_DATE_EPOCH: "1700000000"})
+    def test_reproducible_outputs(self):
+        """Version info and C headers do not depend on the current time
+        """
+        test_obj = MockRepositoryMaster(None, None, None, "CONFIG_NAME", 10)
+        self.assertEqual(test_obj.get_basic_version("0123ABCD").timestamp, "2023-11-14T22:13:20+00:00")
+
+        header = legacy_data_to_c_header({"Parameters": []}, "module.caef.json")
+        self.assertIn("Copyright (C) 2023 Cambridge Mechatronics", header)
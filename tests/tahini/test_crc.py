@@ -0,0 +1,241 @@
+"""
+Test the CRC-appended Griffin binary images
+"""
+import io
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from unittest import mock
+import crcmod
+from cmlpytools.tahini import crc32 as crc32_module
+from cmlpytools.tahini.crc32 import crc32, Crc32, CRC32_INIT, crc32_combine, crc32_patch
+from cmlpytools.tahini.tahini_crc import TahiniCrc, SIZE_FIELD_OFFSET, InvalidImageError
+from cmlpytools.tahini.tahini import Tahini
+from cmlpytools.tahini.crc_batch import load_crc_manifest, crc_batch_stamp, format_crc_summary, \
+    InvalidCrcManifestError
+
+CRCMOD_FUNCTION = crcmod.mkCrcFun(0x1C9D204F5, initCrc=0xFFFFFFFF, rev=True, xorOut=0)
+
+
+def crcmod_crc32(data):
+    """Reference CRC, as previously computed by `tahini crc`
+
+    Args:
+        data (bytes): Data to process
+
+    Returns:
+        int: CRC32
+    """
+    return CRCMOD_FUNCTION(data) ^ 0xFFFFFFFF
+
+
+class TestCrc(unittest.TestCase):
+    """Test the CRC32 and `tahini crc`
+
+    Args:
+        unittest (<module 'unittest'>): Unittest module
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        # The size field of the input image must be zero
+        data = bytearray(range(256)) * 20 + b"tail"
+        data[SIZE_FIELD_OFFSET:SIZE_FIELD_OFFSET + 4] = bytes(4)
+        self.data = bytes(data)
+
+    def test_slicing_by_8(self):
+        """The table implementation gives the same CRC as crcmod, whatever the alignment of the data
+        """
+        for length in list(range(20)) + [len(self.data)]:
+            data = self.data[:length]
+            # pylint: disable=protected-access
+            self.assertEqual(crc32_module._crc32_update_tables(CRC32_INIT, memoryview(data)), CRCMOD_FUNCTION(data))
+        self.assertEqual(crc32(self.data), crcmod_crc32(self.data))
+
+    @mock.patch.object(crc32_module, "_CRCMOD_UPDATE", None)
+    def test_incremental(self):
+        """The CRC can be computed in chunks
+        """
+        crc = Crc32()
+        for start in range(0, len(self.data), 1000):
+            crc.update(memoryview(self.data)[start:start + 1000])
+        self.assertEqual(crc.value, crcmod_crc32(self.data))
+        self.assertEqual(crc.length, len(self.data))
+
+    def test_stamp(self):
+        """The image gets its size at 0xC0 and its CRC at the end, in a file or any other stream
+        """
+        input_path = os.path.join(self.temp_dir, "input.bin")
+        with open(input_path, "wb") as input_file:
+            input_file.write(self.data)
+
+        expected = bytearray(self.data)
+        expected[SIZE_FIELD_OFFSET:SIZE_FIELD_OFFSET + 4] = len(self.data).to_bytes(4, byteorder='little')
+        expected += crcmod_crc32(expected).to_bytes(4, byteorder='little')
+
+        with mock.patch("cmlpytools.tahini.tahini_crc.CHUNK_SIZE", 1000), \
+                mock.patch("sys.stderr", new_callable=io.StringIO):
+            output_path = os.path.join(self.temp_dir, "output.bin")
+            with open(output_path, "wb") as output_file:
+                TahiniCrc.stamp(input_path, output_file)
+            with open(output_path, "rb") as output_file:
+                self.assertEqual(output_file.read(), expected)
+
+            output = io.BytesIO()
+            TahiniCrc.stamp(input_path, output)
+            self.assertEqual(output.getvalue(), expected)
+
+    def test_output_error(self):
+        """Errors while writing the stamped image are not reported as input errors
+        """
+        input_path = os.path.join(self.temp_dir, "input.bin")
+        with open(input_path, "wb") as input_file:
+            input_file.write(self.data)
+
+        output = io.BytesIO()
+        output.close()
+        with mock.patch("sys.stdout", output), mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            with self.assertRaises(ValueError):
+                TahiniCrc.main(input_path, False)
+            TahiniCrc.main(self.temp_dir, False)
+        self.assertTrue(stderr.getvalue().endswith("Error while opening input file\n"))
+
+    def test_verbose_dump(self):
+        """The verbose dump of the input is the same whatever the chunk size
+        """
+        input_path = os.path.join(self.temp_dir, "input.bin")
+        with open(input_path, "wb") as input_file:
+            input_file.write(self.data)
+
+        with mock.patch("cmlpytools.tahini.tahini_crc.CHUNK_SIZE", 1000), \
+                mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            TahiniCrc.stamp(input_path, io.BytesIO(), verbose=True)
+        dump = stderr.getvalue().splitlines()[1]
+        self.assertEqual(dump, " ".join(f"{b:02x}" for b in self.data))
+
+    def test_combine_and_patch(self):
+        """The CRC of concatenated or patched data is computed from the CRC of the original data
+        """
+        for split in (0, 1, 7, 100, len(self.data)):
+            first, second = self.data[:split], self.data[split:]
+            self.assertEqual(crc32_combine(crc32(first), crc32(second), len(second)), crc32(self.data))
+
+        for offset, new_data in ((0, b"\x12\x34"), (1000, b"patched bytes"), (len(self.data) - 3, b"end"),
+                                 (10, b"")):
+            patched = bytearray(self.data)
+            patched[offset:offset + len(new_data)] = new_data
+            old_data = self.data[offset:offset + len(new_data)]
+            self.assertEqual(crc32_patch(crc32(self.data), len(self.data), offset, old_data, new_data),
+                             crc32(patched))
+
+        with self.assertRaises(ValueError):
+            crc32_patch(0, len(self.data), len(self.data) - 1, b"ab", b"cd")
+
+    def test_verify_and_patch(self):
+        """A stamped image can be verified, and patched in place with its CRC updated
+        """
+        input_path = os.path.join(self.temp_dir, "input.bin")
+        with open(input_path, "wb") as input_file:
+            input_file.write(self.data)
+        image_path = os.path.join(self.temp_dir, "image.bin")
+        with mock.patch("cmlpytools.tahini.tahini_crc.CHUNK_SIZE", 1000), \
+                mock.patch("sys.stderr", new_callable=io.StringIO):
+            with open(image_path, "wb") as image_file:
+                TahiniCrc.stamp(input_path, image_file)
+            self.assertTrue(TahiniCrc.verify(image_path))
+            self.assertFalse(TahiniCrc.verify(input_path))
+
+            crc = TahiniCrc.patch(image_path, 3000, b"unit 42 parameters")
+            self.assertTrue(TahiniCrc.verify(image_path))
+            with open(image_path, "rb") as image_file:
+                image = image_file.read()
+            self.assertEqual(image[3000:3018], b"unit 42 parameters")
+            self.assertEqual(image[-4:], crc.to_bytes(4, byteorder='little'))
+
+            with self.assertRaises(InvalidImageError):
+                TahiniCrc.patch(image_path, SIZE_FIELD_OFFSET - 1, b"ab")
+            with self.assertRaises(InvalidImageError):
+                TahiniCrc.patch(image_path, len(self.data) - 1, b"ab")
+            with self.assertRaises(InvalidImageError):
+                TahiniCrc.patch(input_path, 3000, b"ab")
+
+    def test_batch(self):
+        """Stamping the images of a manifest in batch mode gives the same files as stamping them one by one
+        """
+        manifest = []
+        for index in range(3):
+            input_path = os.path.join(self.temp_dir, f"fw_{index}.bin")
+            with open(input_path, "wb") as input_file:
+                input_file.write(self.data * (index + 1))
+            manifest.append({"input": f"fw_{index}.bin", "output": f"release/fw_{index}.bin"})
+        manifest_path = os.path.join(self.temp_dir, "manifest.json")
+        with open(manifest_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file)
+
+        results = crc_batch_stamp(load_crc_manifest(manifest_path), jobs=2)
+
+        self.assertEqual(sorted(os.listdir(os.path.join(self.temp_dir, "release"))),
+                         ["fw_0.bin", "fw_1.bin", "fw_2.bin"])
+        for index, result in enumerate(results):
+            expected = io.BytesIO()
+            with mock.patch("sys.stderr", new_callable=io.StringIO):
+                crc = TahiniCrc.stamp(os.path.join(self.temp_dir, f"fw_{index}.bin"), expected)
+            with open(result.output_path, "rb") as output_file:
+                self.assertEqual(output_file.read(), expected.getvalue())
+            self.assertEqual((result.size, result.crc), (len(self.data) * (index + 1), crc))
+            self.assertIn(f"0x{crc:08x}  {result.output_path}", format_crc_summary(results))
+
+    @unittest.skipIf(os.name == "nt", "Windows files have no POSIX permissions")
+    def test_batch_output_mode(self):
+        """Stamped images get the default permissions of new files, or keep those of the files they replace
+        """
+        input_path = os.path.join(self.temp_dir, "fw.bin")
+        with open(input_path, "wb") as input_file:
+            input_file.write(self.data)
+        new_path = os.path.join(self.temp_dir, "new.bin")
+        existing_path = os.path.join(self.temp_dir, "existing.bin")
+        with open(existing_path, "wb"):
+            pass
+        os.chmod(existing_path, 0o640)
+
+        umask = os.umask(0o022)
+        try:
+            crc_batch_stamp([(input_path, new_path), (input_path, existing_path)], jobs=1)
+        finally:
+            os.umask(umask)
+
+        self.assertEqual(stat.S_IMODE(os.stat(new_path).st_mode), 0o644)
+        self.assertEqual(stat.S_IMODE(os.stat(existing_path).st_mode), 0o640)
+
+    def test_invalid_manifest(self):
+        """Each image of a manifest needs an input and an output
+        """
+        manifest_path = os.path.join(self.temp_dir, "manifest.json")
+        with open(manifest_path, "w", encoding="utf-8") as manifest_file:
+            json.dump([{"input": "fw.bin"}], manifest_file)
+        with self.assertRaises(InvalidCrcManifestError):
+            load_crc_manifest(manifest_path)
+
+    def test_batch_command_errors(self):
+        """A missing manifest or input file, or invalid json, is reported on stderr without a traceback
+        """
+        manifest_path = os.path.join(self.temp_dir, "manifest.json")
+        missing_input = json.dumps([{"input": "missing.bin", "output": "out.bin"}])
+        for manifest in (None, "[", missing_input):
+            if manifest is not None:
+                with open(manifest_path, "w", encoding="utf-8") as manifest_file:
+                    manifest_file.write(manifest)
+            with mock.patch("sys.argv", ["tahini", "crc", "--batch", manifest_path]), \
+                    mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+                with self.assertRaises(SystemExit) as context:
+                    Tahini()
+            self.assertEqual(context.exception.code, 1)
+            self.assertEqual(len(stderr.getvalue().splitlines()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Compare the output of GitReader with the git command line on local fixture repositories
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+from cmlpytools.tahini.git_reader import GitReader
+
+GIT_IDENTITY = ["-c", "user.name=Tahini Test", "-c", "user.email=tahini@test", "-c", "protocol.file.allow=always",
+                "-c", "init.defaultBranch=master", "-c", "tag.gpgSign=false", "-c", "commit.gpgSign=false"]
+
+
+def git(path, *args):
+    """Run a git command in a fixture repository
+
+    Args:
+        path (str): Path to the repository
+        args (str): Git arguments
+
+    Returns:
+        str: Command output
+    """
+    return subprocess.check_output(["git"] + GIT_IDENTITY + list(args), cwd=path, text=True,
+                                   stderr=subprocess.DEVNULL)
+
+
+def create_repository(path, project_name, tags):
+    """Create a fixture repository with a merged branch and some tags
+
+    Args:
+        path (str): Path to the repository
+        project_name (str): Name used in the remote url
+        tags (list): (tag name, annotated) of the tags, one commit each
+    """
+    os.makedirs(path)
+    git(path, "init", "-q")
+    git(path, "remote", "add", "origin", f"https://example.com/group/{project_name}.git")
+    for index, (tag_name, annotated) in enumerate(tags):
+        # The same file is updated every time so that the packed objects are stored as deltas
+        with open(os.path.join(path, "data.txt"), "a", encoding="utf-8") as data_file:
+            data_file.write(f"line {index}\n" * 50)
+        git(path, "add", "data.txt")
+        git(path, "commit", "-q", "-m", f"commit {index}")
+        if annotated:
+            git(path, "tag", "-a", tag_name, "-m", f"Release {tag_name}")
+        else:
+            git(path, "tag", tag_name)
+
+    git(path, "checkout", "-q", "-b", "FW-1234-feature")
+    git(path, "commit", "-q", "--allow-empty", "-m", "feature")
+    git(path, "checkout", "-q", "master")
+    git(path, "merge", "-q", "--no-ff", "FW-1234-feature", "-m", "Merge branch 'FW-1234-feature' into 'master'")
+    git(path, "commit", "-q", "--allow-empty", "-m", "after merge")
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class TestGitReader(unittest.TestCase):
+    """Check that GitReader gives the same output as git
+
+    Args:
+        unittest (<module 'unittest'>): Unittest module
+    """
+
+    def setUp(self):
+        # TemporaryDirectory also removes the read-only git objects on Windows
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.temp_dir.cleanup)
+        self.topcode_path = os.path.join(self.temp_dir.name, "topcode")
+        create_repository(self.topcode_path, "topcode",
+                          [("1.0.0", False), ("1.1.0", True), ("1.2.0-1234.5", True), ("light", False)])
+
+    def assert_same_output(self, path):
+        """Run all the supported commands with GitReader and git, and compare their output
+
+        Args:
+            path (str): Path to the repository
+        """
+        with GitReader(path) as reader:
+            for command in GitReader.COMMANDS:
+                expected = subprocess.check_output(command, shell=True, cwd=path, text=True)
+                self.assertEqual(reader.run_command(command), expected, command)
+
+    def test_loose_objects(self):
+        """Loose refs and objects
+        """
+        self.assert_same_output(self.topcode_path)
+
+    def test_packed_objects(self):
+        """Packed refs and objects, including deltas
+        """
+        git(self.topcode_path, "gc", "-q", "--aggressive")
+        self.assertFalse(os.path.isfile(os.path.join(self.topcode_path, ".git", "refs", "tags", "1.0.0")))
+        self.assert_same_output(self.topcode_path)
+
+    def test_detached_head(self):
+        """Detached HEAD in the middle of the history, on an annotated tag
+        """
+        git(self.topcode_path, "checkout", "-q", "1.1.0")
+        self.assert_same_output(self.topcode_path)
+
+    def test_sub_directory(self):
+        """The repository is found from one of its directories
+        """
+        sub_directory = os.path.join(self.topcode_path, "sub", "directory")
+        os.makedirs(sub_directory)
+        self.assert_same_output(sub_directory)
+
+    def test_submodule(self):
+        """Submodules have a .git file pointing to their git directory
+        """
+        submodule_origin = os.path.join(self.temp_dir.name, "submodule")
+        create_repository(submodule_origin, "submodule", [("2.3.4", True)])
+        git(self.topcode_path, "submodule", "add", "-q", submodule_origin, "libs/submodule")
+        git(self.topcode_path, "commit", "-q", "-m", "Add submodule")
+
+        submodule_path = os.path.join(self.topcode_path, "libs", "submodule")
+        self.assertTrue(os.path.isfile(os.path.join(submodule_path, ".git")))
+        self.assert_same_output(submodule_path)
+        self.assert_same_output(self.topcode_path)
+
+    def test_unsupported(self):
+        """Unsupported commands and repositories are left to git
+        """
+        with GitReader(self.topcode_path) as reader:
+            self.assertIsNone(reader.run_command("git log --merges --pretty=%s"))
+
+        git(self.topcode_path, "config", "url.https://mirror.com/.insteadOf", "https://example.com/")
+        with GitReader(self.topcode_path) as reader:
+            self.assertIsNone(reader.run_command("git remote get-url origin"))
+
+        with GitReader(self.temp_dir.name) as reader:
+            self.assertIsNone(reader.run_command("git rev-parse HEAD"))
+
+    def test_system_config(self):
+        """The system config is the one selected by the git environment variables, and git is used when it is unknown
+        """
+        system_config_path = os.path.join(self.temp_dir.name, "gitconfig")
+        with open(system_config_path, "w", encoding="utf-8") as config_file:
+            config_file.write('[url "https://mirror.com/"]\n\tinsteadOf = https://example.com/\n')
+
+        with mock.patch.dict(os.environ, {"GIT_CONFIG_SYSTEM": system_config_path}):
+            with GitReader(self.topcode_path) as reader:
+                self.assertIsNone(reader.run_command("git remote get-url origin"))
+        with mock.patch.dict(os.environ, {"GIT_CONFIG_SYSTEM": system_config_path, "GIT_CONFIG_NOSYSTEM": "1"}):
+            with GitReader(self.topcode_path) as reader:
+                self.assertEqual(reader.run_command("git remote get-url origin"),
+                                 "https://example.com/group/topcode.git\n")
+        with mock.patch("shutil.which", return_value=os.path.join(self.temp_dir.name, "git")):
+            with GitReader(self.topcode_path) as reader:
+                self.assertIsNone(reader.run_command("git remote get-url origin"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,14 @@
 """
 Tests for the search function
 """
+import os
+import tempfile
 import unittest
 from os import path
 from cmlpytools.tahini import legacy_json_to_input_regmap, TahiniCmap, search, CmapType, InputJson
+from cmlpytools.tahini import legacy_json_to_c_header
+from cmlpytools.tahini.legacy_json_batch import legacy_json_batch_convert
+from cmlpytools.tahini.legacy_json_to_header import legacy_json_save_c_header
 
 DIR_PATH = path.dirname(path.realpath(__file__))
 PATH_TO_DATA = path.join(DIR_PATH, "legacy_jsons")
@@ -168,3 +173,38 @@ class TestLegacyConverter(unittest.TestCase):
         _ = TahiniCmap.cmap_regmap_from_input_json(input_json)
 
         self.assertEqual("Ctrl4WsParameters", input_json.regmap[7].name)
+
+    def test_batch_conversion(self):
+        """Check that converting a directory in batch mode gives the same files as converting them one by one
+        """
+        with tempfile.TemporaryDirectory() as output_dir:
+            output_paths = legacy_json_batch_convert(PATH_TO_DATA, output_dir, jobs=2)
+            self.assertEqual(4, len(output_paths))
+            self.assertEqual(path.join(output_dir, "bias_model.json"), output_paths[0])
+            with open(output_paths[0], encoding="utf-8") as output:
+                self.assertEqual(self.import_legacy_json("bias_model.caef.json").to_json(), output.read())
+
+            output_paths = legacy_json_batch_convert(PATH_TO_DATA, output_dir, c_header=True, jobs=2)
+            self.assertEqual(path.join(output_dir, "sma_control_common.h"), output_paths[2])
+            with open(output_paths[2], encoding="utf-8") as output:
+                self.assertEqual(legacy_json_to_c_header(path.join(PATH_TO_DATA, "sma_control_common.caef.json")),
+                                 output.read())
+
+    def test_save_c_header(self):
+        """Check that the C header file is only replaced once the conversion succeeds
+        """
+        legacy_path = path.join(PATH_TO_DATA, "sma_control_common.caef.json")
+        with tempfile.TemporaryDirectory() as output_dir:
+            output_path = path.join(output_dir, "sma_control_common.h")
+            legacy_json_save_c_header(legacy_path, output_path)
+            with open(output_path, encoding="utf-8") as output:
+                self.assertEqual(legacy_json_to_c_header(legacy_path), output.read())
+
+            invalid_path = path.join(output_dir, "invalid.caef.json")
+            with open(invalid_path, "w", encoding="utf-8") as invalid_file:
+                invalid_file.write("{")
+            with self.assertRaises(ValueError):
+                legacy_json_save_c_header(invalid_path, output_path)
+            with open(output_path, encoding="utf-8") as output:
+                self.assertEqual(legacy_json_to_c_header(legacy_path), output.read())
+            self.assertEqual(["invalid.caef.json", "sma_control_common.h"], sorted(os.listdir(output_dir)))
@@ -9,7 +9,8 @@ from cmlpytools.tahini.cmap_schema import RegisterOrStruct as CmapRegisterOrStru
 from cmlpytools.tahini.cmap_schema import Regmap as CmapRegmap
 from cmlpytools.tahini.cmap_schema import Struct as CmapStruct
 from cmlpytools.tahini.cmap_schema import Type as CmapType
-from cmlpytools.tahini.search import search
+from cmlpytools.tahini.cmap_schema import FullRegmap as CmapFullRegmap
+from cmlpytools.tahini.search import search, SearchIndex
 
 # pylint: disable=duplicate-code
 
@@ -318,3 +319,47 @@ class TestSearch(unittest.TestCase):
         match = search(name="omega2", cmap_type=CmapType.REGISTER, node=TestSearch._CMAP_REGMAP)
 
         self.assertIsNotNone(match)
+
+    def test_search_index_matches_search(self):
+        """Check that the search index finds the same elements as a search, from the regmap and from a struct
+        """
+        cmap = CmapFullRegmap(scheme=None, version=None, regmap=TestSearch._CMAP_REGMAP)
+        index = SearchIndex(cmap)
+        beta = TestSearch._CMAP_REGMAP.children[1]
+        names = ["alpha", "beta", "gamma", "delta", "epsilon_dy", "epsilon_d2", "zeta_drz", "zeta_d1", "etary",
+                 "thetarz_1", "thetarz_x", "omega", "omega2", "omega3", "zeta", "ALPHA", "Epsilon_dZ"]
+
+        for name in names:
+            for cmap_type in (CmapType.REGISTER, CmapType.STRUCT):
+                for node in (None, cmap, TestSearch._CMAP_REGMAP, beta):
+                    with self.subTest(name=name, cmap_type=cmap_type, node=node is not None):
+                        expected = search(name=name, cmap_type=cmap_type, node=node or TestSearch._CMAP_REGMAP)
+                        match = index.search(name=name, cmap_type=cmap_type, node=node)
+                        if expected is None:
+                            self.assertIsNone(match)
+                        else:
+                            self.assertIs(expected.result, match.result)
+                            self.assertEqual(expected.address, match.address)
+
+    def test_search_index_mixed_case_regmap(self):
+        """Check that the search index finds the elements of a regmap whose names are not in lower case
+        """
+        regmap = CmapRegmap(children=[
+            CmapRegisterOrStruct(name="alpha", type=CmapType.REGISTER, addr=256, size=2,
+                                 register=CmapRegister(ctype=CmapCtype.UINT16)),
+            CmapRegisterOrStruct(name="betax", type=CmapType.REGISTER, addr=258, size=2,
+                                 register=CmapRegister(ctype=CmapCtype.UINT16),
+                                 repeat_for=[CmapArrayIndex(count=2, aliases=["left", "right"], offset=2)])
+        ])
+        # The schema only creates lower case names, the nodes are renamed afterwards like in a hand-edited regmap
+        regmap.children[0].name = "Alpha"
+        regmap.children[1].name = "BetaX"
+        index = SearchIndex(CmapFullRegmap(scheme=None, version=None, regmap=regmap))
+
+        for name in ("Alpha", "alpha", "ALPHA", "BetaXRight", "betaxleft", "BETAX1"):
+            with self.subTest(name=name):
+                expected = search(name=name, cmap_type=CmapType.REGISTER, node=regmap)
+                match = index.search(name=name, cmap_type=CmapType.REGISTER)
+                self.assertIsNotNone(expected)
+                self.assertIs(expected.result, match.result)
+                self.assertEqual(expected.address, match.address)
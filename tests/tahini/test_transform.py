@@ -0,0 +1,62 @@
+"""
+This program tests that `tahini transform` gives the same result as applying the individual tahini
+methods one after the other
+"""
+# pylint: disable=wrong-import-position
+import io
+from os import path
+import unittest
+from unittest import mock
+from cmlpytools.tahini.tahini import Tahini
+from cmlpytools.tahini.tahini_transform import TahiniTransform, InvalidTransformError
+from cmlpytools.tahini.tahini_add_json_info import TahiniAddJsonInfo
+from cmlpytools.tahini.tahini_remove_param_prefix import TahiniRemoveParamPrefix
+from cmlpytools.tahini.input_json_schema import InputJson
+
+PATH_TO_DATA = "./tests/tahini/data"
+
+class TestTransform(unittest.TestCase):
+    """Test class for transform tahini method
+    """
+    def test_remove_param_prefix(self):
+        """Test if the removeparamprefix transform gives the expected result"""
+        input_json_file = path.join(PATH_TO_DATA, "test_remove_param_prefix.json")
+        output_json_file = path.join(PATH_TO_DATA, "test_remove_param_prefix_result.json")
+
+        transforms = [TahiniTransform.transform_from_description("removeparamprefix")]
+        json_result = TahiniTransform.transform_input_json_path(input_json_file, transforms)
+
+        self.assertEqual(InputJson.load_json(output_json_file), json_result)
+
+    def test_pipeline(self):
+        """Test if a list of transforms gives the same result as the individual methods applied in sequence"""
+        input_json_file = path.join(PATH_TO_DATA, "test_input_json_example.json")
+        for i in range(1, 4):
+            additional_json_file = path.join(PATH_TO_DATA, f"test_extra_regmap_info{i}.json")
+
+            expected = TahiniRemoveParamPrefix.remove_param_prefix(input_json_file)
+            TahiniAddJsonInfo.combine_input_json(expected, InputJson.load_json(additional_json_file))
+            TahiniRemoveParamPrefix.remove_input_json_param_prefix(expected)
+
+            transforms = [TahiniTransform.transform_from_description(description) for description in
+                          ("removeparamprefix", f"addjsoninfo={additional_json_file}", "removeparamprefix")]
+            json_result = TahiniTransform.transform_input_json_path(input_json_file, transforms)
+
+            self.assertEqual(expected, json_result, f"Transform test {i} failed")
+
+    def test_invalid_transform(self):
+        """Test if invalid transform descriptions are rejected"""
+        with self.assertRaises(InvalidTransformError):
+            TahiniTransform.transform_from_description("unknown")
+        with self.assertRaises(InvalidTransformError):
+            TahiniTransform.transform_from_description("addjsoninfo")
+
+    def test_invalid_transform_command(self):
+        """Test if `tahini transform` reports invalid transform descriptions as usage errors"""
+        input_json_file = path.join(PATH_TO_DATA, "test_remove_param_prefix.json")
+        with mock.patch("sys.argv", ["tahini", "transform", input_json_file, "unknown"]), \
+                mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            with self.assertRaises(SystemExit) as context:
+                Tahini()
+        self.assertEqual(context.exception.code, 2)
+        self.assertIn("Unknown transform 'unknown'", stderr.getvalue())
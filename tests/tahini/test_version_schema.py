@@ -3,11 +3,15 @@ Import unittest module to test
 """
 
 import datetime
+import os
 import tempfile
+import time
 import unittest
 import json
 from cmlpytools.tahini.version_schema import GitVersion, LastTag, ExtendedVersionInfo
-from cmlpytools.tahini.tahini_version import LiveRepository, Repository, InvalidProjectPathError, InvalidArgumentError
+from cmlpytools.tahini import tahini_version
+from cmlpytools.tahini.tahini_version import LiveRepository, Repository, InvalidProjectPathError, \
+    InvalidArgumentError, VersionConfig
 
 
 class MockRepositoryMaster(Repository):
@@ -156,6 +160,191 @@ class MockRepositoryBranch(Repository):
         pass
 
 
+class CountingRepositoryMaster(MockRepositoryMaster):
+    """Mock Repository for Master build, counting the git commands run
+    """
+
+    def __init__(self, *args):
+        MockRepositoryMaster.__init__(self, *args)
+        self.command_count = {}
+
+    def run_command(self, command):
+        self.command_count[command] = self.command_count.get(command, 0) + 1
+        return MockRepositoryMaster.run_command(self, command)
+
+
+class TestCachedCommands(unittest.TestCase):
+    """Check that the git commands are run only once per repository object
+
+    Args:
+        unittest (<module 'unittest'>): Unittest module
+    """
+
+    def test_cached_commands(self):
+        """Generate basic and extended version info from the same object, each command must run once
+        """
+        test_obj = CountingRepositoryMaster(None, None, None, "CONFIG_NAME", 10)
+
+        basic_version = test_obj.get_basic_version("git-sha")
+        full_version = test_obj.get_full_version("./tests/tahini/data/test_version.info.json")
+
+        self.assertEqual(basic_version.uid, "0123ABCD")
+        self.assertEqual(basic_version.version, "1.2.3-4567.8-9-gABCDEF")
+        self.assertEqual(full_version.git_versions[0].last_tag.branch_id, 4567)
+        self.assertEqual(full_version.git_versions[0].last_tag.release_num, 8)
+        self.assertEqual(set(test_obj.command_count.values()), {1})
+        # The last tag is derived from the long description of HEAD
+        self.assertNotIn("git describe --tags --first-parent --always --abbrev=0", test_obj.command_count)
+
+
+class TestConfigVersions(unittest.TestCase):
+    """Check the generation of the version info of several build configurations
+
+    Args:
+        unittest (<module 'unittest'>): Unittest module
+    """
+
+    def test_config_versions(self):
+        """Each configuration gets its own version info, the git commands are run once for all of them
+        """
+        test_obj = CountingRepositoryMaster(None, None, None, None, None)
+        configs = [VersionConfig("cm824", "CM824", "CONFIG_A", 1, "git-sha"),
+                   VersionConfig("cm8x4", "CM8X4", "CONFIG_B", 2, "0x1234")]
+
+        config_versions = test_obj.get_config_versions(configs)
+
+        self.assertEqual(len(config_versions), 2)
+        for config, (basic_version, full_version) in zip(configs, config_versions):
+            self.assertEqual(basic_version.config_name, config.config_name)
+            self.assertEqual(full_version.config_name, config.config_name)
+            self.assertEqual(full_version.config_id, config.config_id)
+            self.assertEqual(full_version.device_display_name, config.device_display_name)
+            self.assertEqual(full_version.uid, basic_version.uid)
+            self.assertEqual(full_version.version, "1.2.3-4567.8-9-gABCDEF")
+            self.assertEqual([version.name for version in full_version.git_versions],
+                             ["topcode", "submodule1", "submodule2"])
+        self.assertEqual(config_versions[0][0].uid, "0123ABCD")
+        self.assertEqual(config_versions[1][0].uid, "0x1234")
+        self.assertEqual(set(test_obj.command_count.values()), {1})
+
+    def test_duplicate_config_name(self):
+        """Two configurations cannot share a name, as their files are written to a directory named after it
+        """
+        with tempfile.TemporaryDirectory() as configs_dir:
+            configs_path = os.path.join(configs_dir, "configs.json")
+            with open(configs_path, "w", encoding="UTF-8") as configs_file:
+                json.dump([{"device_type": "cm824", "config_name": "fw", "config_id": 1},
+                           {"device_type": "cm8x4", "config_name": "fw", "config_id": 2}], configs_file)
+            with self.assertRaises(InvalidArgumentError):
+                tahini_version.TahiniVersion.load_version_configs(configs_path)
+
+
+class SlowSubmoduleRepositoryMaster(MockRepositoryMaster):
+    """Mock Repository for Master build, where the first submodule answers last
+    """
+
+    def run_command(self, command):
+        if command.startswith("git -C topcode/submodule1"):
+            time.sleep(0.05)
+        return MockRepositoryMaster.run_command(self, command)
+
+
+class TestSubmoduleOrder(unittest.TestCase):
+    """Check that the submodules are reported in order when their information is collected in parallel
+
+    Args:
+        unittest (<module 'unittest'>): Unittest module
+    """
+
+    def test_submodule_order(self):
+        """The branch ids of each submodule must stay attached to the right submodule
+        """
+        test_obj = SlowSubmoduleRepositoryMaster(None, None, None, "CONFIG_NAME", 10)
+
+        full_version = test_obj.get_full_version("./tests/tahini/data/test_version.info.json")
+
+        self.assertEqual([version.name for version in full_version.git_versions],
+                         ["topcode", "submodule1", "submodule2"])
+        self.assertEqual(full_version.git_versions[1].branch_ids, ['BRANCH-01', 'BRANCH-03', 'BRANCH-05'])
+        self.assertEqual(full_version.git_versions[2].branch_ids, ['BRANCH-02', 'BRANCH-04', 'BRANCH-06'])
+
+
+class SinceLastTagRepositoryMaster(CountingRepositoryMaster):
+    """Mock Repository for Master build, with git logs restricted to the merges since the last tag
+    """
+
+    def run_command(self, command):
+        if command == "git submodule foreach --recursive git describe --tags --first-parent --always --long":
+            return "Entering 'topcode/submodule1'" + "\n" + "2.3.4-5678.9-0-g1234567" + "\n" + \
+                "Entering 'topcode/submodule2'" + "\n" + "3.4.5-6789.10-3-g89abcde"
+        if command == "git log --merges --pretty=%s 1.2.3-4567.8..HEAD":
+            self.command_count[command] = self.command_count.get(command, 0) + 1
+            return "Merge branch 'branch-07-topcode' into 'master'"
+        if command == "git -C topcode/submodule1 log --merges 2.3.4-5678.9..HEAD":
+            return ""
+        if command == "git -C topcode/submodule2 log --merges 3.4.5-6789.10..HEAD":
+            return "Merge branch 'branch-08-submodule2' into 'master'"
+        return CountingRepositoryMaster.run_command(self, command)
+
+
+class HexTagRepositoryMaster(SinceLastTagRepositoryMaster):
+    """Mock Repository for Master build, with a submodule tag made of hexadecimal digits and a submodule without tag
+    """
+
+    def run_command(self, command):
+        if command == "git submodule foreach --recursive git describe --tags --first-parent --always --long":
+            return "Entering 'topcode/submodule1'" + "\n" + "deadbeef-2-g1234567" + "\n" + \
+                "Entering 'topcode/submodule2'" + "\n" + "89abcde"
+        if command == "git -C topcode/submodule1 log --merges deadbeef..HEAD":
+            return "Merge branch 'branch-09-submodule1' into 'master'"
+        return SinceLastTagRepositoryMaster.run_command(self, command)
+
+
+class TestMergesSinceLastTag(unittest.TestCase):
+    """Check the scan of the merge commits since the last tag, and the cache of the merged branches
+
+    Args:
+        unittest (<module 'unittest'>): Unittest module
+    """
+
+    def test_merges_since_last_tag(self):
+        """Only the branches merged since the last tag are listed
+        """
+        test_obj = SinceLastTagRepositoryMaster(None, None, None, "CONFIG_NAME", 10)
+        test_obj.merges_since_last_tag = True
+
+        full_version = test_obj.get_full_version("./tests/tahini/data/test_version.info.json")
+
+        self.assertEqual(full_version.git_versions[0].branch_ids, ['BRANCH-07'])
+        self.assertEqual(full_version.git_versions[1].branch_ids, [])
+        self.assertEqual(full_version.git_versions[2].branch_ids, ['BRANCH-08'])
+
+    def test_hexadecimal_tag(self):
+        """A tag made of hexadecimal digits is not mistaken for the sha of a submodule without tag
+        """
+        test_obj = HexTagRepositoryMaster(None, None, None, "CONFIG_NAME", 10)
+        test_obj.merges_since_last_tag = True
+
+        full_version = test_obj.get_full_version("./tests/tahini/data/test_version.info.json")
+
+        self.assertEqual(full_version.git_versions[1].branch_ids, ['BRANCH-09'])
+        self.assertEqual(full_version.git_versions[2].branch_ids, ['BRANCH-02', 'BRANCH-04', 'BRANCH-06'])
+
+    def test_cached_merge_list(self):
+        """The merge log is scanned once for all the build configs of a Repository object
+        """
+        test_obj = SinceLastTagRepositoryMaster(None, None, None, None, None)
+        test_obj.merges_since_last_tag = True
+        configs = [VersionConfig(f"cm82{config_id}", f"CM82{config_id}", "CONFIG_NAME", config_id, "git-sha")
+                   for config_id in range(3)]
+
+        config_versions = test_obj.get_config_versions(configs)
+
+        for _, full_version in config_versions:
+            self.assertEqual(full_version.git_versions[0].branch_ids, ['BRANCH-07'])
+        self.assertEqual(test_obj.command_count.get("git log --merges --pretty=%s 1.2.3-4567.8..HEAD"), 1)
+
+
 class TestVersionInfo(unittest.TestCase):
     """This tests whether Repository class can be used to get git information
     as ExtendedVersionInfo object while building from master